@@ -1,51 +1,151 @@
 from math import floor, sqrt
-import tensorflow as tf
 import numpy as np
-from tensorflow import keras as KER
-from tensorflow.keras.optimizers import Adadelta, Adagrad, Adam, SGD, RMSprop
-from tensorflow.keras.losses import MeanSquaredError, KLDivergence, CategoricalCrossentropy
 import random
+import collections
+from agent.numpy_anet import NumpyANET
 
 
 class Actor:
     """ Class for making an Actor that represents the NN that given a state will produce a probability
     distribution over all legal moves from that state. The network is trained in each episode
     to build an intelligent target policy that can be used in the tournament against other players"""
-    def __init__(self, learning_rate, epsilon, decay_rate, board_size, nn_dims, activation, optimizer, loss_function, filename=""):
+    def __init__(self, learning_rate, epsilon, decay_rate, board_size, nn_dims, activation, optimizer, loss_function, filename="", value_head=False, prediction_cache_size=0, inference="keras", train_epochs=1, train_batch_size=32):
         self.epsilon = epsilon
         self.decay_rate = decay_rate
         self.size = board_size
-        self.anet = ANET(board_size, nn_dims, activation, optimizer, loss_function, learning_rate)
+        self.train_epochs = train_epochs  # Passes over each minibatch from the replay buffer
+        self.train_batch_size = train_batch_size  # Cases per gradient step
+        self.inference = inference  # "keras" (compiled TF graph, needed to train), or "numpy" (exported weights, play only)
+        if inference == "numpy":
+            self.anet = NumpyANET(board_size, value_head)
+        else:
+            from agent.anet import ANET  # Imported here, so TensorFlow is only imported by actors that use Keras
+            self.anet = ANET(board_size, nn_dims, activation, optimizer, loss_function, learning_rate, value_head)
         self.name = ""  # Used in tournament
         self.filename = filename  # Used in tournament
+        self.num_evaluated_positions = 0  # Number of positions given to the ANET, used to measure evaluation throughput
+        self.prediction_cache_size = prediction_cache_size  # Number of predictions kept by (state, player), where the least recently used is evicted (0 = no cache)
+        self.prediction_cache = collections.OrderedDict()  # state with player indicator -> (distribution, value or None), cleared whenever the weights change
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
 
     def set_name(self, name):
         """ Sets name of actor used during the tournament to differ between the agents playing against each other"""
-        self.name = name + "_" + self.filename.split("ep_")[1].split(".h5")[0]
+        self.name = name + "_" + self.filename.split("ep_")[1].split(".")[0]
 
     def target_policy(self, state, player, is_top_policy=False):
         """ The target/default policy (on-policy) that is used to choose actions during rollout simulations in MCTS or tournaments in Topp.
         The random element ensures exploration during rollout, while during tournament is_top_policy = True to only use the NN (i.e. exploitation)"""
-        if not is_top_policy and self.epsilon >= random.uniform(0, 1):
+        if not is_top_policy and self.is_exploring():
             legal_indexes = []
             for index in range(len(state)):
                 if state[index] == 0:
                     legal_indexes.append(index)
             action_index = legal_indexes[random.randrange(len(legal_indexes))]
         else:
-            player_board_state = [player]
-            player_board_state.extend(state)
-            tensor_state = convert_to_tensor(player_board_state)
-            prediction = self.anet.predict(tensor_state).numpy()[0]  # Numpy array containing predicted desirability for each child state (i.e. actions leading to child states). Use of 0: [[...]] -> [...]
-            for index in range(len(state)):
-                if state[index] != 0:  # illegal moves are set to 0 desirability
-                    prediction[index] = 0
-            total = np.sum(prediction)
-            prediction *= 1/abs(total)  # re-normalize after non-legal action indexes are set to 0
-
-            action_index = np.where(prediction == np.max(prediction[np.nonzero(prediction)]))[0][0]  # Return index of maximum value in prediction excluding 0 that represents illegal action
+            action_index = self.get_action_indexes([state], [player])[0]  # Index of the most probable legal action, from the compiled forward pass
         return self.get_action_from_index(action_index, state, player)
 
+    def target_policy_batch(self, states, players):
+        """ The target policy for several rollouts at once, returning one action per given state and player. Each rollout
+        explores with probability epsilon like target_policy, while the states of all the other rollouts are given to the
+        ANET in a single batched forward pass"""
+        action_indexes = [None] * len(states)
+        exploiting = []  # Positions of the rollouts that use the NN action
+        for i, state in enumerate(states):
+            if self.is_exploring():
+                legal_indexes = np.flatnonzero(state.to_array() == 0)
+                action_indexes[i] = legal_indexes[random.randrange(len(legal_indexes))]
+            else:
+                exploiting.append(i)
+        if exploiting:
+            for i, action_index in zip(exploiting, self.get_action_indexes([states[i] for i in exploiting], [players[i] for i in exploiting])):
+                action_indexes[i] = action_index
+        return [self.get_action_from_index(action_index, state, player) for action_index, state, player in zip(action_indexes, states, players)]
+
+    def is_exploring(self):
+        """ Returns True with probability epsilon, meaning that a random action should be chosen instead of the NN action"""
+        return self.epsilon >= random.uniform(0, 1)
+
+    def get_distribution(self, state, player):
+        """ Returns the probability distribution predicted by the ANET over all actions from the given state, where
+        illegal actions (i.e. cells that are already owned by a player) have probability 0. A batch of one state is given
+        to the compiled forward pass"""
+        return self.get_distributions([state], [player])[0]
+
+    def get_distributions(self, states, players):
+        """ Returns the probability distributions predicted by the ANET for several states at once, using one compiled
+        forward pass for the whole batch. Row i is the distribution over all actions from states[i] when players[i] is to
+        move, where illegal actions have probability 0"""
+        return self.predict(states, players)[0]
+
+    def predict(self, states, players):
+        """ Returns the distributions and the values (None without a value head) of the given states. With a prediction
+        cache, the states that have been predicted since the weights last changed are taken from the cache, and only the
+        other states are given to the ANET in one compiled forward pass. The key of a state is the state with the player
+        indicator, so the bytes of the state are hashed by the dictionary"""
+        if self.prediction_cache_size == 0:
+            return self.forward(states, players)
+        keys = [state.with_player(player) for state, player in zip(states, players)]
+        predictions = [self.prediction_cache.get(key) for key in keys]
+        missing = [i for i, prediction in enumerate(predictions) if prediction is None]
+        self.cache_hits += len(keys) - len(missing)
+        self.cache_misses += len(missing)
+        for key, prediction in zip(keys, predictions):
+            if prediction is not None:
+                self.prediction_cache.move_to_end(key)
+        if missing:
+            distributions, values = self.forward([states[i] for i in missing], [players[i] for i in missing])
+            for j, i in enumerate(missing):
+                predictions[i] = (distributions[j].copy(), None if values is None else values[j])  # A copy, so the cache does not keep the whole batch alive
+                self.prediction_cache[keys[i]] = predictions[i]
+                if len(self.prediction_cache) > self.prediction_cache_size:
+                    self.prediction_cache.popitem(last=False)
+                    self.cache_evictions += 1
+        values = np.array([value for _, value in predictions]) if self.anet.value_head else None
+        return np.array([distribution for distribution, _ in predictions]), values
+
+    def forward(self, states, players):
+        """ Returns the distributions and the values (None without a value head) of the given states from one forward
+        pass of the ANET (compiled by TensorFlow, or in NumPy)"""
+        self.num_evaluated_positions += len(states)
+        inputs = stack_inputs(states, players)
+        if self.anet.value_head:
+            distributions, values = self.anet.predict_distributions_values(inputs)
+            return distributions, values[:, 0]
+        return self.anet.predict_distributions(inputs), None
+
+    def clear_prediction_cache(self):
+        """ Removes all cached predictions, which is needed whenever the weights of the ANET change"""
+        self.prediction_cache.clear()
+
+    def get_cache_hit_rate(self):
+        """ Returns the share of predicted states that were found in the prediction cache"""
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups > 0 else 0
+
+    def get_action_indexes(self, states, players):
+        """ Returns the cell index of the most probable legal action from each of the given states, using one compiled
+        forward pass for the whole batch"""
+        return np.argmax(self.get_distributions(states, players), axis=1)
+
+    def get_actions(self, states, players):
+        """ Returns the most probable legal action = [cell_location, player] from each of the given states (greedy
+        target policy without exploration), using one compiled forward pass for the whole batch"""
+        return [self.get_action_from_index(action_index, state, player) for action_index, state, player in zip(self.get_action_indexes(states, players), states, players)]
+
+    def evaluate(self, state, player):
+        """ Returns the probability distribution over all actions and the value of the given state predicted by an ANET
+        with a value head, using a single forward pass. The value estimates the outcome: 1 if player 1 wins and -1 if player 2 wins"""
+        distributions, values = self.evaluate_batch([state], [player])
+        return distributions[0], values[0]
+
+    def evaluate_batch(self, states, players):
+        """ Returns the probability distributions and the values predicted by an ANET with a value head for several
+        states at once, using one forward pass for the whole batch"""
+        return self.predict(states, players)
+
     @staticmethod
     def get_action_from_index(action_index, state, player):
         """ The target policy will return the index of the action with the highest probability,
@@ -56,12 +156,24 @@ class Actor:
         return chosen_action
 
     def train(self, minibatch):
-        """ Trains the  neural network on a given random minibatch from replay buffer. This minibatch contains several
-         cases, where each case=(s,D) (i.e. a state (OBS: with player indicator) and its target distribution produced by MCTS)"""
-        for i in range(len(minibatch)):
-            x_train = convert_to_tensor(minibatch[i][0])  # The state with a player indicator (e.g. [1, 0, 0, 0, 0, 0, 0, 0, 0, 0] for player 1 in state [0, 0, 0, 0, 0, 0, 0, 0, 0])
-            y_train = convert_to_tensor(minibatch[i][1])  # The target distribution produced by MCTS
-            self.anet.train(x_train, y_train)
+        """ Trains the  neural network on a given random minibatch from replay buffer. The minibatch is the stacked arrays
+        of its cases, where each case=(s,D,z) (i.e. a state (OBS: with player indicator), its target distribution produced
+        by MCTS and the outcome of the episode). The ANET takes one gradient step per train_batch_size cases in each of
+        the train_epochs passes. Returns the mean loss of the last pass"""
+        states, distributions, outcomes = minibatch
+        x_train = states.astype(np.float32)  # Row i is the state of case i with a player indicator (e.g. [1, 0, 0, 0, 0, 0, 0, 0, 0, 0] for player 1 in state [0, 0, 0, 0, 0, 0, 0, 0, 0])
+        y_train = distributions  # The target distributions produced by MCTS
+        if self.anet.value_head:
+            y_train = [y_train, outcomes[:, np.newaxis]]  # The value head is trained towards the outcome of the episode
+        loss = self.anet.train(x_train, y_train, self.train_epochs, self.train_batch_size)
+        self.clear_prediction_cache()  # The predictions of the old weights are no longer valid
+        return loss
+
+    def get_policy_errors(self, minibatch):
+        """ Returns the L1 distance between the distribution predicted by the ANET and the target distribution of each
+        case of the given minibatch, used as priorities of the cases in the replay buffer"""
+        states, distributions, _ = minibatch
+        return np.abs(self.anet.predict_distributions(states) - distributions).sum(axis=1)
 
     def decay_epsilon(self):
         """ Decay epsilon to reduce the amount of exploring in later episodes"""
@@ -78,73 +190,39 @@ class Actor:
         else:
             save_directory = "./models/" + str(dir_num) + "_models"  # training models are saved in models_x directory
         path = save_directory + "/ANET_" + str(self.size) + "_ep_" + str(episode_num) + ".h5"  # h5 file format is recommended for storing NN parameters
-        self.anet.model.save_weights(filepath=path)
+        self.anet.save(path)  # Also exports the weights to a .npz file for the NumPy forward pass
 
     def load(self, path):
-        """Load saved parameters of ANET for use in tournament play"""
-        self.anet.model.load_weights(filepath=path)
-
-
-class ANET:
-    """ Class for making and training the neural network so it can be used to predict the action desirability
-    for a given state. The choice of activation, optimizer and loss-function is customizable and is defined in configs"""
-    def __init__(self, board_size, nn_dims, activation, optimizer, loss_function, learning_rate):
-        self.input_size = 1 + board_size ** 2  # An indicator of the player is added to input value, so the size is equal board_size^2 + 1
-        self.output_size = board_size ** 2
-        self.hidden_layers_dim = nn_dims
-        self.alpha = learning_rate
-        self.activation = activation  # List of strings
-        self.optimizer = self.get_optimizer(optimizer)
-        self.loss_function = self.get_loss_function(loss_function)
-        self.model = self.init_nn()
-
-    def init_nn(self):
-        """ Initializes the neural sequential model by adding layers and compiling the model."""
-        model = KER.models.Sequential()
-        model.add(KER.layers.Dense(self.input_size, input_shape=(self.input_size, )))
-        for i in range(len(self.hidden_layers_dim)):
-            model.add(KER.layers.Dense(self.hidden_layers_dim[i], activation=self.activation[i]))
-        model.add(KER.layers.Dense(self.output_size, activation="softmax"))
-        model.compile(optimizer=self.optimizer, loss=self.loss_function)
-        # model.summary()
-        return model
-
-    def predict(self, tensor_state):
-        """ Forward pass in neural model to produce the probability distribution over the given state"""
-        return self.model(tensor_state)
-
-    def train(self, x_train, y_train):  # backward-pass in neural network
-        """ Backward pass in neural model to train the network when given a case from the Replay buffer. x_train is the
-        state with a player indicator, while y_train is the target value (i.e. distribution produced by using node counters found in MCTS)"""
-        self.model.fit(x_train, y_train, epochs=1, batch_size=32, verbose=False, callbacks=[])
-
-    def get_optimizer(self, optimizer):
-        """ Allows for customizable optimizer defined in config"""
-        if optimizer == "adam":
-            return Adam(self.alpha)
-        elif optimizer == "adagrad":
-            return Adagrad(self.alpha)
-        elif optimizer == "adadelta":
-            return Adadelta(self.alpha)
-        elif optimizer == "sgd":
-            return SGD(self.alpha)
-        elif optimizer == "RMSprop":
-            return RMSprop(self.alpha)
-
-    @staticmethod
-    def get_loss_function(loss):
-        """ Allows for customizable loss-function defined in config"""
-        if loss == "mean-squared-error":
-            return MeanSquaredError()
-        elif loss == "KLDivergence":
-            return KLDivergence()
-        elif loss == "crossentropy":
-            return CategoricalCrossentropy()
-
-
-def convert_to_tensor(state):
-    """Convert given state from string format to tensor (i.e. array-like object) needed to be able to
-    give the board state as input to the neural network"""
-    state_array = np.array(list(state))  # make numpy array of string
-    tensor_state = tf.convert_to_tensor(state_array, np.float32)  # convert numpy array to tensor
-    return tf.convert_to_tensor(np.expand_dims(tensor_state, axis=0))  # insert axis on pos 0 to get a tensor shape that corresponds to the input_shape of the neural network (e.g. (15, ) --> (1, 15))
+        """Load saved parameters of ANET for use in tournament play. With NumPy inference the weights exported next to
+        the given path are loaded"""
+        self.anet.load(path)
+        self.clear_prediction_cache()
+
+    def try_load(self, path):
+        """ Loads the saved parameters of a Keras ANET if they fit its architecture, and returns True if they were loaded"""
+        if not self.anet.try_load(path):
+            return False
+        self.clear_prediction_cache()
+        return True
+
+    def export(self, path):
+        """ Exports the weights of a Keras ANET to a .npz file next to the given model path for the NumPy forward pass"""
+        self.anet.export(path)
+
+    def set_weights(self, weights):
+        """ Sets the weights of the ANET (e.g. weights sent to a worker process) and clears the prediction cache"""
+        self.anet.model.set_weights(weights)
+        self.clear_prediction_cache()
+
+
+def stack_states(states):
+    """ Returns the network input of several states (bytes with one cell state per byte, e.g. BoardStates with player
+    indicator) as one 2D array of cell states, where row i is states[i]. The bytes are joined once and read without
+    copying, so a cast to float32 is the only conversion left"""
+    return np.frombuffer(b"".join(states), dtype=np.int8).reshape(len(states), -1)
+
+
+def stack_inputs(states, players):
+    """ Returns the network input of several states as one 2D array of cell states, where row i is states[i] with the
+    indicator of players[i] in front"""
+    return stack_states([state.with_player(player) for state, player in zip(states, players)])
@@ -0,0 +1,147 @@
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras as KER
+from tensorflow.keras.optimizers import Adadelta, Adagrad, Adam, SGD, RMSprop
+from tensorflow.keras.losses import MeanSquaredError, KLDivergence, CategoricalCrossentropy
+from agent.numpy_anet import NumpyANET
+
+
+class ANET:
+    """ Class for making and training the neural network so it can be used to predict the action desirability
+    for a given state. The choice of activation, optimizer and loss-function is customizable and is defined in configs"""
+    def __init__(self, board_size, nn_dims, activation, optimizer, loss_function, learning_rate, value_head=False):
+        self.value_head = value_head  # Adds a second output estimating the value of the state (i.e. the outcome of the game)
+        self.input_size = 1 + board_size ** 2  # An indicator of the player is added to input value, so the size is equal board_size^2 + 1
+        self.output_size = board_size ** 2
+        self.hidden_layers_dim = nn_dims
+        self.alpha = learning_rate
+        self.activation = activation  # List of strings
+        self.optimizer = self.get_optimizer(optimizer)
+        self.loss_function = self.get_loss_function(loss_function)
+        self.model = self.init_nn()
+        input_signature = [tf.TensorSpec(shape=(None, self.input_size), dtype=tf.float32)]  # Any batch size is traced once, so the graph is never retraced
+        self.compiled_forward = tf.function(self.forward, input_signature=input_signature)
+
+    def init_nn(self):
+        """ Initializes the neural sequential model by adding layers and compiling the model."""
+        if self.value_head:
+            return self.init_policy_value_nn()
+        model = KER.models.Sequential()
+        model.add(KER.layers.Dense(self.input_size, input_shape=(self.input_size, )))
+        for i in range(len(self.hidden_layers_dim)):
+            model.add(KER.layers.Dense(self.hidden_layers_dim[i], activation=self.activation[i]))
+        model.add(KER.layers.Dense(self.output_size, activation="softmax"))
+        model.compile(optimizer=self.optimizer, loss=self.loss_function)
+        # model.summary()
+        return model
+
+    def init_policy_value_nn(self):
+        """ Initializes a neural model with the same hidden layers and two outputs: the probability distribution over all
+        actions (policy head) and a tanh estimate of the outcome of the game from the given state (value head).
+        The value head is trained with mean squared error, while the policy head uses the loss function of the config"""
+        inputs = KER.Input(shape=(self.input_size, ))
+        hidden = KER.layers.Dense(self.input_size)(inputs)
+        for i in range(len(self.hidden_layers_dim)):
+            hidden = KER.layers.Dense(self.hidden_layers_dim[i], activation=self.activation[i])(hidden)
+        policy = KER.layers.Dense(self.output_size, activation="softmax", name="policy")(hidden)
+        value = KER.layers.Dense(1, activation="tanh", name="value")(hidden)
+        model = KER.models.Model(inputs=inputs, outputs=[policy, value])
+        model.compile(optimizer=self.optimizer, loss=[self.loss_function, MeanSquaredError()])
+        return model
+
+    def forward(self, inputs):
+        """ Forward pass where the probability of illegal actions (i.e. cells that are already owned by a player) is set
+        to 0 and each distribution is re-normalized, all in tensor operations. Compiled to a graph by tf.function, so the
+        Keras layers are not called eagerly. Returns the distributions, and the values when the model has a value head"""
+        outputs = self.model(inputs, training=False)
+        policy = outputs[0] if self.value_head else outputs
+        masked_policy = policy * tf.cast(tf.equal(inputs[:, 1:], 0), policy.dtype)  # The first input is the player indicator
+        distributions = masked_policy / tf.reduce_sum(masked_policy, axis=1, keepdims=True)
+        if self.value_head:
+            return distributions, outputs[1]
+        return distributions
+
+    def predict_distributions(self, inputs):
+        """ Compiled forward pass giving the masked distributions of a batch of inputs (states with player indicator)"""
+        if self.value_head:
+            return self.compiled_forward(inputs.astype(np.float32))[0].numpy()
+        return self.compiled_forward(inputs.astype(np.float32)).numpy()
+
+    def predict_distributions_values(self, inputs):
+        """ Compiled forward pass of a model with a value head, giving the masked distributions and the values of a batch
+        of inputs (states with player indicator)"""
+        distributions, values = self.compiled_forward(inputs.astype(np.float32))
+        return distributions.numpy(), values.numpy()
+
+    def train(self, x_train, y_train, epochs=1, batch_size=32):  # backward-pass in neural network
+        """ Backward pass in neural model to train the network on the stacked cases of a minibatch from the Replay buffer.
+        x_train holds the states with a player indicator, while y_train holds the target values (i.e. distributions produced
+        by using node counters found in MCTS, and the outcomes with a value head). The cases are shuffled in each epoch and
+        given to train_on_batch in slices of batch_size, which avoids the callbacks and data handling that fit sets up in
+        every call. Returns the mean loss of the last epoch"""
+        targets = y_train if isinstance(y_train, list) else [y_train]
+        losses = []
+        for _ in range(epochs):
+            order = np.random.permutation(len(x_train))
+            losses = []
+            for start in range(0, len(x_train), batch_size):
+                batch = order[start:start + batch_size]
+                batch_targets = [target[batch] for target in targets]
+                loss = self.model.train_on_batch(x_train[batch], batch_targets if self.value_head else batch_targets[0])
+                losses.append(loss[0] if isinstance(loss, list) else loss)  # The total loss comes first with a value head
+        return float(np.mean(losses)) if losses else 0.0
+
+    def save(self, path):
+        """ Saves the weights of the model in the given path, and exports them for the NumPy forward pass"""
+        self.export(path)
+        self.model.save_weights(filepath=path)
+
+    def load(self, path):
+        """ Loads the weights of the model saved in the given path"""
+        self.model.load_weights(filepath=path)
+
+    def try_load(self, path):
+        """ Loads the weights saved in the given path if they fit the architecture of the model, and returns True if they
+        were loaded. Weights of another architecture (e.g. another board size, or a model with or without the value
+        head) make Keras raise a ValueError, possibly after some layers were loaded, so the previous weights are restored"""
+        weights = self.model.get_weights()
+        try:
+            self.load(path)
+        except ValueError:
+            self.model.set_weights(weights)
+            return False
+        return True
+
+    def export(self, path):
+        """ Exports the weights and activations of the model to a .npz file next to the given model path, so the model
+        can be used by NumpyANET without TensorFlow"""
+        dense_layers = [layer for layer in self.model.layers if isinstance(layer, KER.layers.Dense)]
+        if self.value_head:
+            policy_layer, value_layer = self.model.get_layer("policy"), self.model.get_layer("value")
+        else:
+            policy_layer, value_layer = dense_layers[-1], None
+        layers = [(*layer.get_weights(), layer.activation.__name__) for layer in dense_layers if layer is not policy_layer and layer is not value_layer]
+        NumpyANET.save(path, layers, policy_layer.get_weights(), value_layer.get_weights() if self.value_head else None)
+
+    def get_optimizer(self, optimizer):
+        """ Allows for customizable optimizer defined in config"""
+        if optimizer == "adam":
+            return Adam(self.alpha)
+        elif optimizer == "adagrad":
+            return Adagrad(self.alpha)
+        elif optimizer == "adadelta":
+            return Adadelta(self.alpha)
+        elif optimizer == "sgd":
+            return SGD(self.alpha)
+        elif optimizer == "RMSprop":
+            return RMSprop(self.alpha)
+
+    @staticmethod
+    def get_loss_function(loss):
+        """ Allows for customizable loss-function defined in config"""
+        if loss == "mean-squared-error":
+            return MeanSquaredError()
+        elif loss == "KLDivergence":
+            return KLDivergence()
+        elif loss == "crossentropy":
+            return CategoricalCrossentropy()
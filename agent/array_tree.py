@@ -0,0 +1,361 @@
+import numpy as np
+from environment.board_state import BoardState
+
+
+class ArrayTree:
+    """ Class for storing an MCTS tree as a structure of arrays instead of one Node object per state. The counter, value,
+    player, winner, action, parent and child range of node i are stored at index i of preallocated NumPy arrays, and the
+    state of node i is row i of a 2D byte array. The children of a node are a contiguous range in the edge arrays, which
+    hold the index of each child (-1 until the child is created), the cell index of the action leading to it and the
+    winner of the state the action produces. All arrays double in size when full.
+    ArrayNode gives the same interface as Node, so MCTS can use both backends"""
+    def __init__(self, board_size, initial_capacity=1024):
+        self.size = board_size
+        self.num_cells = board_size ** 2
+        self.num_nodes = 0
+        self.num_edges = 0
+        self.states = np.zeros((initial_capacity, self.num_cells), dtype=np.int8)
+        self.counters = np.zeros(initial_capacity, dtype=np.int32)
+        self.values = np.zeros(initial_capacity, dtype=np.float64)
+        self.players = np.zeros(initial_capacity, dtype=np.int8)
+        self.winners = np.zeros(initial_capacity, dtype=np.int8)
+        self.proven_winners = np.zeros(initial_capacity, dtype=np.int8)  # Player proven to win from the state (MCTS-Solver), 0 if not proven
+        self.actions = np.zeros(initial_capacity, dtype=np.int16)  # Cell index of the action that produced the node (-1 for a root)
+        self.parents = np.zeros(initial_capacity, dtype=np.int32)  # -1 when the node has no parent
+        self.keys = np.zeros(initial_capacity, dtype=np.uint64)  # Zobrist keys used by the transposition table
+        self.first_edges = np.zeros(initial_capacity, dtype=np.int32)
+        self.child_counts = np.zeros(initial_capacity, dtype=np.int16)
+        self.edge_children = np.zeros(initial_capacity, dtype=np.int32)
+        self.edge_actions = np.zeros(initial_capacity, dtype=np.int16)
+        self.edge_winners = np.zeros(initial_capacity, dtype=np.int8)
+        self.edge_priors = np.zeros(initial_capacity, dtype=np.float32)  # Prior probability of each action used by PUCT
+        self.edge_amaf_counters = np.zeros(initial_capacity, dtype=np.int32)  # All-moves-as-first counter of each action used by RAVE
+        self.edge_amaf_values = np.zeros(initial_capacity, dtype=np.float64)  # Sum of the evaluations counted by the AMAF counter
+
+    @staticmethod
+    def grow(array, capacity):
+        """ Returns a copy of the given array with room for the given number of rows"""
+        grown_array = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+        grown_array[:len(array)] = array
+        return grown_array
+
+    def ensure_node_capacity(self):
+        """ Doubles the node arrays if they are full"""
+        if self.num_nodes == len(self.counters):
+            capacity = 2 * len(self.counters)
+            for name in ["states", "counters", "values", "players", "winners", "proven_winners", "actions", "parents", "keys", "first_edges", "child_counts"]:
+                setattr(self, name, self.grow(getattr(self, name), capacity))
+
+    def ensure_edge_capacity(self, num_new_edges):
+        """ Doubles the edge arrays until there is room for the given number of new edges"""
+        capacity = len(self.edge_children)
+        while self.num_edges + num_new_edges > capacity:
+            capacity *= 2
+        if capacity > len(self.edge_children):
+            self.edge_children = self.grow(self.edge_children, capacity)
+            self.edge_actions = self.grow(self.edge_actions, capacity)
+            self.edge_winners = self.grow(self.edge_winners, capacity)
+            self.edge_priors = self.grow(self.edge_priors, capacity)
+            self.edge_amaf_counters = self.grow(self.edge_amaf_counters, capacity)
+            self.edge_amaf_values = self.grow(self.edge_amaf_values, capacity)
+
+    def create_node(self, state, action):
+        """ Adds a node for the given state and action = [cell_location, player] to the tree and returns it. Has the same
+        signature as the Node constructor, where a root is given the action (None, starting player)"""
+        self.ensure_node_capacity()
+        index = self.num_nodes
+        self.num_nodes += 1
+        self.states[index] = state.to_array()
+        self.counters[index] = 0
+        self.values[index] = 0
+        self.winners[index] = 0
+        self.proven_winners[index] = 0
+        self.keys[index] = 0
+        self.parents[index] = -1
+        self.first_edges[index] = 0
+        self.child_counts[index] = 0
+        if action[0] is None:  # starting player is given in the action
+            self.actions[index] = -1
+            self.players[index] = action[1]
+        else:
+            row, col = action[0]
+            self.actions[index] = row * self.size + col
+            self.players[index] = 1 if action[1] == 2 else 2
+        return ArrayNode(self, index)
+
+    def add_edges(self, parent, actions, winners):
+        """ Adds edges without child nodes from the parent to the given actions. The edges of a node are added right after
+        each other during node expansion, which keeps the children of each node in a contiguous range"""
+        num_new_edges = len(actions)
+        if self.child_counts[parent] == 0:
+            self.first_edges[parent] = self.num_edges
+        elif self.first_edges[parent] + self.child_counts[parent] != self.num_edges:
+            raise Exception("The children of a node must be added right after each other")
+        self.ensure_edge_capacity(num_new_edges)
+        start, end = self.num_edges, self.num_edges + num_new_edges
+        self.edge_children[start:end] = -1
+        self.edge_actions[start:end] = [row * self.size + col for (row, col), _ in actions]
+        self.edge_winners[start:end] = winners
+        self.edge_priors[start:end] = 1 / max(num_new_edges, 1)  # Uniform until the ANET has evaluated the node
+        self.edge_amaf_counters[start:end] = 0
+        self.edge_amaf_values[start:end] = 0
+        self.num_edges = end
+        self.child_counts[parent] += num_new_edges
+
+    def get_edge_range(self, index):
+        """ Returns the start and end of the edge range holding the children of the given node"""
+        start = self.first_edges[index]
+        return start, start + self.child_counts[index]
+
+    def get_node(self, index):
+        """ Returns a handle to the node with the given index"""
+        return ArrayNode(self, int(index))
+
+    def compact(self, root_index):
+        """ Moves the nodes that can be reached from the given root to the front of new arrays, in breadth first order
+        with the root at index 0, and drops all other nodes and edges. The new arrays are sized after the kept nodes, so
+        the memory of discarded branches is freed. Returns an array mapping each old node index to its new index (-1 for
+        dropped nodes), since handles to the old indexes are no longer valid"""
+        mapping = np.full(self.num_nodes, -1, dtype=np.int32)
+        mapping[root_index] = 0
+        order = [root_index]
+        position = 0
+        while position < len(order):
+            start, end = self.get_edge_range(order[position])
+            children = self.edge_children[start:end]
+            children = children[children >= 0]
+            new_children = children[mapping[children] < 0]  # A shared child is only added by its first parent
+            mapping[new_children] = np.arange(len(order), len(order) + len(new_children))
+            order.extend(new_children.tolist())
+            position += 1
+        order = np.array(order, dtype=np.int32)
+        child_counts = self.child_counts[order].astype(np.int64)
+        first_edges = np.cumsum(child_counts) - child_counts
+        num_edges = int(np.sum(child_counts))
+        edge_indexes = np.repeat(self.first_edges[order] - first_edges, child_counts) + np.arange(num_edges)  # The old edge index of each kept edge
+        node_capacity = max(1024, 2 * len(order))
+        edge_capacity = max(1024, 2 * num_edges)
+        parents = self.parents[order]
+        edge_children = self.edge_children[edge_indexes]
+        new_arrays = {"parents": np.where(parents >= 0, mapping[np.maximum(parents, 0)], -1), "first_edges": first_edges, "edge_children": np.where(edge_children >= 0, mapping[np.maximum(edge_children, 0)], -1)}
+        for name in ["states", "counters", "values", "players", "winners", "proven_winners", "actions", "parents", "keys", "first_edges", "child_counts"]:
+            array = getattr(self, name)
+            kept = new_arrays.get(name, array[order])
+            setattr(self, name, self.grow(kept.astype(array.dtype), node_capacity))
+        for name in ["edge_children", "edge_actions", "edge_winners", "edge_priors", "edge_amaf_counters", "edge_amaf_values"]:
+            array = getattr(self, name)
+            kept = new_arrays.get(name, array[edge_indexes])
+            setattr(self, name, self.grow(kept.astype(array.dtype), edge_capacity))
+        self.num_nodes = len(order)
+        self.num_edges = num_edges
+        return mapping
+
+    def get_action(self, cell_index, player):
+        """ Returns the action = [cell_location, player] of the given cell index"""
+        return [(int(cell_index) // self.size, int(cell_index) % self.size), player]
+
+    def get_memory_usage(self):
+        """ Returns the number of bytes allocated by the arrays of the tree"""
+        return sum(array.nbytes for array in [self.states, self.counters, self.values, self.players, self.winners, self.proven_winners, self.actions, self.parents,
+                                              self.keys, self.first_edges, self.child_counts, self.edge_children, self.edge_actions, self.edge_winners, self.edge_priors,
+                                              self.edge_amaf_counters, self.edge_amaf_values])
+
+
+class ArrayNode:
+    """ Class for a light handle to node i of an ArrayTree. It has the same interface as Node, but every value is read
+    from and written to the arrays of the tree, so handles can be created and thrown away at no memory cost"""
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, ArrayNode) and other.tree is self.tree and other.index == self.index
+
+    def __hash__(self):
+        return hash(self.index)
+
+    def __str__(self):
+        """ Changes ArrayNode representation to string format to make debugging easier"""
+        return "State: [" + str(self.get_state()) + "], Action: " + str(self.get_action())
+
+    def __repr__(self):
+        """ Changes ArrayNode representation to string format to make debugging easier"""
+        return str(self)
+
+    def set_parent(self, parent_node):
+        """ Sets the parent node containing the parent state (None detaches the node from its parent)"""
+        self.tree.parents[self.index] = -1 if parent_node is None else parent_node.index
+
+    def get_parent(self):
+        """ Returns the parent node containing the parent state"""
+        parent = self.tree.parents[self.index]
+        return ArrayNode(self.tree, int(parent)) if parent >= 0 else None
+
+    def add_child(self, child_node, action=None):
+        """ Create parent-child relationships used during MCTS leaf expansion, where the parent is only set by the first parent"""
+        self.tree.add_edges(self.index, [child_node.get_action() if action is None else action], [child_node.get_winner()])
+        self.set_child(self.get_child_count() - 1, child_node)
+
+    def add_legal_actions(self, actions, winners):
+        """ Records the legal actions from the state of this node and the winner of the state each action produces,
+        without creating the child nodes. A child node is made when the tree policy first chooses its action"""
+        self.tree.add_edges(self.index, actions, winners)
+
+    def set_child(self, child_num, child_node):
+        """ Connects the given child node to the legal action with the given position"""
+        self.tree.edge_children[self.tree.first_edges[self.index] + child_num] = child_node.index
+        if self.tree.parents[child_node.index] < 0:
+            child_node.set_parent(self)
+
+    def remove_child(self, child_node):
+        """ Disconnects the given child node, so that its action has no child node until the tree policy chooses it again"""
+        start, end = self.tree.get_edge_range(self.index)
+        children = self.tree.edge_children[start:end]
+        children[children == child_node.index] = -1  # A view of the edge array, so the edges are changed in place
+
+    def get_child_nodes(self):
+        """ Returns the child nodes that have been created, containing the child states from the state of the current node"""
+        start, end = self.tree.get_edge_range(self.index)
+        return [ArrayNode(self.tree, int(child)) for child in self.tree.edge_children[start:end] if child >= 0]
+
+    def get_child(self, child_num):
+        """ Returns the child node of the legal action with the given position, or None if it has not been created"""
+        child = self.tree.edge_children[self.tree.first_edges[self.index] + child_num]
+        return ArrayNode(self.tree, int(child)) if child >= 0 else None
+
+    def get_child_count(self):
+        """ Returns the number of legal actions recorded for this node (0 for a leaf node)"""
+        return int(self.tree.child_counts[self.index])
+
+    def get_child_action(self, child_num):
+        """ Returns the legal action with the given position"""
+        return self.tree.get_action(self.tree.edge_actions[self.tree.first_edges[self.index] + child_num], self.get_player())
+
+    def get_child_winner(self, child_num):
+        """ Returns the winner of the state produced by the legal action with the given position"""
+        return int(self.tree.edge_winners[self.tree.first_edges[self.index] + child_num])
+
+    def get_child_statistics(self):
+        """ Returns two arrays with the counter and the value of each legal action, used by the tree policy. The child
+        indexes are a contiguous range of the edge array, so the statistics are gathered in one NumPy operation.
+        Actions without a child node have not been visited, so their counter and value are 0"""
+        start, end = self.tree.get_edge_range(self.index)
+        children = self.tree.edge_children[start:end]
+        is_created = children >= 0
+        return np.where(is_created, self.tree.counters[children], 0), np.where(is_created, self.tree.values[children], 0)
+
+    def update_amaf(self, played_cells, evaluation):
+        """ All-moves-as-first update used by RAVE: every legal action whose cell was claimed by the player of this node
+        later in the simulation is updated as if it had been played from this node. played_cells is a boolean array over
+        the cells of the board, indexed by the cell index of each edge"""
+        start, end = self.tree.get_edge_range(self.index)
+        is_played = played_cells[self.tree.edge_actions[start:end]]
+        self.tree.edge_amaf_counters[start:end][is_played] += 1  # Slices are views of the edge arrays, so the edges are changed in place
+        self.tree.edge_amaf_values[start:end][is_played] += evaluation
+
+    def get_child_amaf_statistics(self):
+        """ Returns two arrays with the AMAF counter and the sum of the AMAF evaluations of each legal action, used by the
+        RAVE tree policy"""
+        start, end = self.tree.get_edge_range(self.index)
+        return self.tree.edge_amaf_counters[start:end].astype(np.float64), self.tree.edge_amaf_values[start:end]
+
+    def set_child_priors(self, priors):
+        """ Sets the prior probability of each legal action (same order as the legal actions)"""
+        start, end = self.tree.get_edge_range(self.index)
+        self.tree.edge_priors[start:end] = priors
+
+    def get_child_priors(self):
+        """ Returns an array with the prior probability of each legal action, used by the PUCT tree policy"""
+        start, end = self.tree.get_edge_range(self.index)
+        return self.tree.edge_priors[start:end].astype(np.float64)
+
+    def get_child_actions(self):
+        """ Returns the actions leading from this node to each of the created child nodes (same order as get_child_nodes)"""
+        start, end = self.tree.get_edge_range(self.index)
+        player = self.get_player()
+        return [self.tree.get_action(cell_index, player) for child, cell_index in zip(self.tree.edge_children[start:end], self.tree.edge_actions[start:end]) if child >= 0]
+
+    def get_action_to(self, child_node):
+        """ Returns the action leading from this node to the given child node"""
+        return self.get_child_actions()[self.get_child_nodes().index(child_node)]
+
+    def get_state(self):
+        """ Returns the state of the board game when this node is the root node"""
+        return BoardState(self.tree.states[self.index].tobytes())
+
+    def get_player(self):
+        """ Returns the player that will chose an action from the state of this node"""
+        return int(self.tree.players[self.index])
+
+    def set_player(self, player):
+        """ Sets the player that will chose an action from the state of this node"""
+        self.tree.players[self.index] = player
+
+    def set_winner(self, winner):
+        """ Sets the player that has won in the state of this node (0 if no player has won)"""
+        self.tree.winners[self.index] = winner
+
+    def get_winner(self):
+        """ Returns the player that has won in the state of this node (0 if no player has won)"""
+        return int(self.tree.winners[self.index])
+
+    def is_final_state(self):
+        """ Returns True if the state of this node is a winning state, which is known when the node is created"""
+        return self.tree.winners[self.index] != 0
+
+    def set_proven_winner(self, winner):
+        """ Sets the player that is proven to win from the state of this node with perfect play"""
+        self.tree.proven_winners[self.index] = winner
+
+    def get_proven_winner(self):
+        """ Returns the player that is proven to win from the state of this node, or 0 if no player is proven to win"""
+        return int(self.tree.proven_winners[self.index])
+
+    def get_child_proven_winners(self):
+        """ Returns an array with the proven winner of each legal action. An action without a child node is only proven
+        if it wins the game at once, which is known from the winner recorded at expansion"""
+        start, end = self.tree.get_edge_range(self.index)
+        children = self.tree.edge_children[start:end]
+        return np.where(children >= 0, self.tree.proven_winners[children], self.tree.edge_winners[start:end])
+
+    def set_key(self, key):
+        """ Sets the Zobrist key identifying the state and player of this node in the transposition table"""
+        self.tree.keys[self.index] = key
+
+    def get_key(self):
+        """ Returns the Zobrist key identifying the state and player of this node in the transposition table"""
+        return int(self.tree.keys[self.index])
+
+    def get_action(self):
+        """ Return the action that produced this node"""
+        cell_index = self.tree.actions[self.index]
+        if cell_index < 0:
+            return None, self.get_player()
+        return self.tree.get_action(cell_index, 1 if self.get_player() == 2 else 2)
+
+    def update_counter(self):
+        """ Increase the counter of the node, representing how many times the state has been
+        visited during MCTS. The counters are updated during backpropagation"""
+        self.tree.counters[self.index] += 1
+
+    def set_counter(self, counter):
+        """ Sets the counter of the node, used to remove a virtual loss after a batched evaluation"""
+        self.tree.counters[self.index] = counter
+
+    def get_counter(self):
+        """ Returns the counter of the node, used to produce the action probability distribution in MCTS"""
+        return int(self.tree.counters[self.index])
+
+    def get_parent_counter(self):
+        """ Returns the counter of the parent node, used to decide the path during the tree search step of MCTS"""
+        return int(self.tree.counters[self.tree.parents[self.index]])
+
+    def get_value(self):
+        """ Returns the value of the node, used to decide the path during the tree search step of MCTS"""
+        return float(self.tree.values[self.index])
+
+    def update_value(self, value):
+        """ Updates the value of the node"""
+        self.tree.values[self.index] = value
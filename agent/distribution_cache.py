@@ -0,0 +1,85 @@
+import collections
+import numpy as np
+
+
+class DistributionCache:
+    """ Class for keeping the root distributions found by MCTS between episodes, so that a position that is seen again
+    (e.g. an opening) can reuse the distribution of an earlier search instead of searching again. A Hex board rotated by
+    180 degrees is the same position for both players (each player keeps their own pair of sides), and rotating the board
+    reverses the order of the cell indexes. The key of a position is therefore the smallest of the state and its rotated
+    state together with the player to move, and a distribution is stored in the orientation of the key.
+    Only distributions from searches with at least min_visits root visits are reused, and a position keeps the distribution
+    with the most visits. The cache is bounded by max_size, and the least recently used position is evicted when it is full"""
+    def __init__(self, max_size, min_visits):
+        self.max_size = max_size
+        self.min_visits = min_visits
+        self.entries = collections.OrderedDict()  # key -> (distribution in the orientation of the key, root visits), ordered from least to most recently used
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def get_key(state, player):
+        """ Returns the canonical key of the given state and player to move, and True if the key is the rotated state"""
+        cells = bytes(state)
+        rotated_cells = cells[::-1]  # Rotating the board by 180 degrees moves cell i to cell n^2 - 1 - i
+        if rotated_cells < cells:
+            return (rotated_cells, player), True
+        return (cells, player), False
+
+    def get_distribution(self, state, player):
+        """ Returns the cached distribution of the given state and player to move when it comes from a search with at
+        least min_visits root visits, and marks the position as recently used. Returns None otherwise"""
+        key, is_rotated = self.get_key(state, player)
+        entry = self.entries.get(key)
+        if entry is None or entry[1] < self.min_visits:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0][::-1].copy() if is_rotated else entry[0].copy()
+
+    def add_distribution(self, state, player, distribution, visits):
+        """ Stores the distribution found by a search with the given number of root visits, unless the position already
+        has a distribution with more visits. Evicts the least recently used position if the cache is full"""
+        key, is_rotated = self.get_key(state, player)
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] > visits:
+            return
+        distribution = np.asarray(distribution)
+        self.entries[key] = (distribution[::-1].copy() if is_rotated else distribution.copy(), visits)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def save(self, path):
+        """ Saves the cached positions to a .npz file in the given path, in order from least to most recently used, so the
+        cache can be shared between training runs"""
+        keys = list(self.entries.keys())
+        np.savez(path, states=np.array([np.frombuffer(cells, dtype=np.int8) for cells, _ in keys], dtype=np.int8).reshape(len(keys), -1),
+                 players=np.array([player for _, player in keys], dtype=np.int8),
+                 distributions=np.array([distribution for distribution, _ in self.entries.values()], dtype=np.float32).reshape(len(keys), -1),
+                 visits=np.array([visits for _, visits in self.entries.values()], dtype=np.int64))
+
+    def load(self, path):
+        """ Adds the positions saved in the given path to the cache, keeping the distribution with the most visits of a
+        position that is already cached. The saved positions are already in the orientation of their keys"""
+        with np.load(path) as data:
+            for cells, player, distribution, visits in zip(data["states"], data["players"], data["distributions"], data["visits"]):
+                key = (cells.tobytes(), int(player))
+                entry = self.entries.get(key)
+                if entry is not None and entry[1] > visits:
+                    continue
+                self.entries[key] = (distribution, int(visits))
+                self.entries.move_to_end(key)
+                if len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+
+    def get_hit_rate(self):
+        """ Returns the share of lookups that reused a cached distribution"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0
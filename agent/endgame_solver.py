@@ -0,0 +1,110 @@
+import collections
+from environment.bitboard_hex import get_masks, CELL_BITS
+
+
+class EndgameSolver:
+    """ Class for solving Hex positions with few empty cells exactly, used by MCTS in place of a rollout. The search is
+    alpha-beta over the two outcomes win and loss, where the window can only be (loss, win), so a position is won as
+    soon as one move is found that leaves the opponent in a lost position (a beta cutoff). The positions are bitboards
+    with one byte lane per cell, as in BitboardHex. A player who can not connect their sides even with every empty cell
+    has lost, since Hex can not end in a draw, and only the empty cells that lie on a possible path of both players are
+    searched, since the outcome only depends on whether one of the players connects and the other cells can not change it.
+    Moves are ordered by a history heuristic (cells that gave a cutoff before are tried first) and then by the number
+    of stones next to the cell. Solved positions are kept in a transposition table of at most max_table_size positions,
+    where the least recently used position is evicted when it is full"""
+    def __init__(self, board_size, max_empty_cells, max_table_size=200000):
+        self.masks = get_masks(board_size)
+        self.max_empty_cells = max_empty_cells  # Positions with more empty cells are left to the rollouts
+        self.max_table_size = max_table_size
+        self.table = collections.OrderedDict()  # (player bitboard, opponent bitboard, player to move) -> index of a winning cell of the player to move, or -1 if the player loses
+        self.history = [0] * self.masks.num_cells  # Number of cutoffs given by each cell, used to order the moves
+        self.sides = {1: (self.masks.first_row, self.masks.last_row), 2: (self.masks.first_col, self.masks.last_col)}
+        self.num_solved = 0  # Positions given to solve
+        self.num_searched = 0  # Positions searched by alpha-beta (not found in the table)
+        self.hits = 0
+        self.misses = 0
+
+    def can_solve(self, state):
+        """ Returns True if the given state has few enough empty cells to be solved"""
+        return state.count(0) <= self.max_empty_cells
+
+    def solve(self, state, player):
+        """ Returns the player that wins the given state with perfect play, when the given player is the player to move"""
+        board = int.from_bytes(state, "little")
+        boards = {1: board & self.masks.lanes, 2: (board >> 1) & self.masks.lanes}  # Same lanes as BitboardHex.set_cell_states
+        opponent = 1 if player == 2 else 2
+        empty = self.masks.lanes & ~(boards[1] | boards[2])
+        self.num_solved += 1
+        return player if self.is_win(boards[player], boards[opponent], empty, player) else opponent
+
+    def get_winning_move(self, state, player):
+        """ Returns the cell index of a winning move for the given player to move, or None if the state is a loss for that
+        player. The move is read from the table, and the state is solved again if it has been evicted"""
+        board = int.from_bytes(state, "little")
+        boards = {1: board & self.masks.lanes, 2: (board >> 1) & self.masks.lanes}
+        opponent = 1 if player == 2 else 2
+        empty = self.masks.lanes & ~(boards[1] | boards[2])
+        winning_index = self.find_winning_move(boards[player], boards[opponent], empty, player)
+        return winning_index if winning_index >= 0 else None
+
+    def is_win(self, player_board, opponent_board, empty, player):
+        """ Returns True if the player to move can force a win. The opponent has not won, since the position would have
+        been final otherwise"""
+        return self.find_winning_move(player_board, opponent_board, empty, player) >= 0
+
+    def find_winning_move(self, player_board, opponent_board, empty, player):
+        """ Returns the cell index of a winning move for the player to move, or -1 if the player loses, from the table
+        or by alpha-beta search"""
+        key = (player_board, opponent_board, player)
+        winning_index = self.table.get(key)
+        if winning_index is not None:
+            self.table.move_to_end(key)
+            self.hits += 1
+            return winning_index
+        self.misses += 1
+        self.num_searched += 1
+        opponent = 1 if player == 2 else 2
+        player_region = self.get_region(player_board | empty, *self.sides[player])
+        opponent_region = self.get_region(opponent_board | empty, *self.sides[opponent]) if player_region else 0
+        winning_index = -1
+        if player_region and not opponent_region:  # The opponent can not connect, and Hex has no draws, so any move in the region of the player wins
+            winning_index = (empty & player_region).bit_length() // CELL_BITS
+        elif player_region:  # A player without a region can not connect even with every empty cell, and has lost
+            for index in self.order_moves(player_board | opponent_board, empty & player_region & opponent_region):
+                cell_bit = self.masks.cell_bits[index]
+                if self.find_winning_move(opponent_board, player_board | cell_bit, empty & ~cell_bit, opponent) < 0:  # A move that connects the player leaves the opponent without a region
+                    self.history[index] += 1
+                    winning_index = index
+                    break
+        self.table[key] = winning_index
+        if len(self.table) > self.max_table_size:
+            self.table.popitem(last=False)
+        return winning_index
+
+    def get_region(self, bits, start_side, end_side):
+        """ Returns the cells of the given bitboard that lie on a path between the two given sides through the bitboard,
+        or 0 if the sides are not connected"""
+        from_start = self.flood_fill(bits, start_side)
+        if not from_start & end_side:
+            return 0
+        return from_start & self.flood_fill(bits, end_side)
+
+    def flood_fill(self, bits, side):
+        """ Returns the cells of the given bitboard that are connected to the given side through the bitboard"""
+        reached = bits & side
+        while True:
+            grown = self.masks.expand(reached) & bits
+            if grown == reached:
+                return reached
+            reached = grown
+
+    def order_moves(self, occupied, candidates):
+        """ Returns the indexes of the candidate cells, with the cells that have given the most cutoffs first and then the
+        cells with the most stones next to them"""
+        indexes = [index for index in range(self.masks.num_cells) if candidates & self.masks.cell_bits[index]]
+        return sorted(indexes, key=lambda index: (-self.history[index], -(self.masks.neighbors[index] & occupied).bit_count()))
+
+    def get_hit_rate(self):
+        """ Returns the share of table lookups that found a solved position"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0
@@ -0,0 +1,54 @@
+import numpy as np
+
+
+class HashIndex:
+    """ Class for finding the slot of a ring buffer that holds a given key (e.g. the hash of a state), stored in NumPy
+    arrays instead of a dictionary so the index costs about 16 bytes per slot. The table is open addressing with linear
+    probing, at most half full, and a removed slot is filled by moving later entries of its probe sequence back, so
+    there are no tombstones and lookups stay short however many slots are replaced"""
+    def __init__(self, capacity):
+        self.mask = (1 << (2 * capacity - 1).bit_length()) - 1  # Table size is a power of two of at least 2 * capacity
+        self.table = np.full(self.mask + 1, -1, dtype=np.int32)  # Slot of each table entry, or -1 if the entry is empty
+        self.keys = np.zeros(capacity, dtype=np.int64)  # keys[slot] is the key of the slot
+
+    def find(self, key, is_match=None):
+        """ Returns the slot with the given key, or -1 if there is none. With is_match, a slot with the key is only
+        returned if is_match(slot) is True, and the probing continues past the other slots with the key, so different
+        items whose keys collide (e.g. states with the same hash) can all be found"""
+        i = key & self.mask
+        while True:
+            slot = int(self.table[i])
+            if slot < 0 or (self.keys[slot] == key and (is_match is None or is_match(slot))):
+                return slot
+            i = (i + 1) & self.mask
+
+    def insert(self, key, slot):
+        """ Adds the given slot with the given key, which must not be in the index (other slots may have the same key)"""
+        self.keys[slot] = key
+        i = key & self.mask
+        while self.table[i] >= 0:
+            i = (i + 1) & self.mask
+        self.table[i] = slot
+
+    def remove(self, slot):
+        """ Removes the given slot if it is in the index, and moves back the entries after it that would otherwise not
+        be found"""
+        i = int(self.keys[slot]) & self.mask
+        while self.table[i] != slot:
+            if self.table[i] < 0:
+                return
+            i = (i + 1) & self.mask
+        j = i
+        while True:
+            j = (j + 1) & self.mask
+            if self.table[j] < 0:
+                break
+            home = int(self.keys[self.table[j]]) & self.mask
+            if (i < j and (home <= i or home > j)) or (i > j and home <= i and home > j):  # The entry at j would not be found from its home after emptying i
+                self.table[i] = self.table[j]
+                i = j
+        self.table[i] = -1
+
+    def clear(self):
+        """ Removes all slots"""
+        self.table[:] = -1
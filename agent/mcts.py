@@ -1,7 +1,9 @@
-from numpy import log, sqrt
+import time
 import numpy as np
 from agent.node import Node
-from math import sqrt
+from agent.array_tree import ArrayTree
+from agent.transposition_table import TranspositionTable
+from agent.endgame_solver import EndgameSolver
 
 
 class MonteCarloTreeSearch:
@@ -9,98 +11,504 @@ class MonteCarloTreeSearch:
     which is achieved by performing four steps: 1) Tree search, 2) Node expansion, 3) Leaf evaluation and 4) Backpropagation.
     The aim of this search is to update the counters depending on how many times a state is visited during simulation,
     and these counters are used to produce target values for training of actor neural network."""
-    def __init__(self, actor, state_manager, init_state, root_player, c=1):
-        self.root = self.create_root(init_state, root_player)
+    def __init__(self, actor, state_manager, init_state, root_player, c=1, rollout_mode="step", transposition_table_size=0, tree_backend="object", leaf_batch_size=1, early_stopping=False, max_tree_size=0, selection="uct", solver=False, rave_k=0, endgame_empty_cells=0):
         self.actor = actor  # Responsible for updating the target policy = default policy (on-policy) used during rollout
         self.c = c  # exploration constant used to find exploration bonus u(s,a)
         self.state_manager = state_manager
+        self.rollout_mode = rollout_mode  # "step" checks for a winner after each rollout action, "fill" fills the board before one check
+        self.selection = selection  # "uct", or "puct" where the ANET policy gives the priors and its value head replaces rollouts
+        self.solver = solver  # MCTS-Solver: proven wins and losses are propagated up the tree, and proven subtrees are not searched
+        self.rave_k = rave_k  # RAVE equivalence parameter: the number of visits where AMAF and MCTS values are weighted equally (0 = no RAVE)
+        self.final_state = None  # Board array at the end of the last simulation, which holds the cells claimed by each player for the AMAF updates
+        self.final_states = []  # Board arrays at the end of the simulations of the last batch
+        self.endgame_solver = None  # Solves leaves with at most endgame_empty_cells empty cells exactly in place of a rollout (None = always rollouts)
+        if endgame_empty_cells > 0:
+            self.endgame_solver = EndgameSolver(state_manager.size, endgame_empty_cells)
+        self.transposition_table = None  # Shares nodes between move orders reaching the same position (None = plain tree)
+        if transposition_table_size > 0:
+            self.transposition_table = TranspositionTable(state_manager.size, transposition_table_size)
+        self.search_path = []  # The nodes chosen by the last tree search, from the root to the leaf
+        self.leaf_batch_size = leaf_batch_size  # Number of leaves evaluated together with batched NN calls (1 = one leaf at a time)
+        self.early_stopping = early_stopping  # Stop the search when the most visited root child can not be overtaken in the remaining budget
+        self.max_tree_size = max_tree_size  # Number of nodes where the least visited nodes are recycled (0 = no limit)
+        self.num_nodes = 0  # Number of nodes that can be reached from the root
+        self.peak_tree_size = 0  # Largest number of nodes in the tree since the search was made
+        self.tree = None  # Arrays holding the nodes when tree_backend = "array", while "object" makes one Node object per state
+        self.create_node = Node
+        if tree_backend == "array":
+            self.tree = ArrayTree(state_manager.size)
+            self.create_node = self.tree.create_node
+        self.root = self.create_root(init_state, root_player)
 
-    @staticmethod
-    def create_root(state, root_player):
+    def create_root(self, state, root_player):
         """ Method for creating the root node that represents the actual state of the game. MCTS is used to
         identify the most desirable action from this state"""
-        return Node(state, (None, root_player))
+        root = self.create_node(state, (None, root_player))
+        root.set_winner(self.state_manager.get_winner(state))
+        root.set_proven_winner(root.get_winner())
+        self.add_to_tree_size(1)
+        if self.transposition_table is not None:
+            root.set_key(self.transposition_table.get_key(state, root_player))
+            self.transposition_table.add_node(root.get_key(), root)
+        return root
 
     def get_root(self):
         """ Returns the root of the MCTS"""
         return self.root
 
     def set_root(self, root):
-        """ Sets the root of the MCTS"""
+        """ Sets the root of the MCTS and reuses the subtree below it. The new root is detached from its parent, so the
+        previous root and the subtrees of the siblings of the new root can be freed, and the nodes that can no longer be
+        reached are removed from the tree arrays and the transposition table"""
+        root.set_parent(None)
         self.root = root
+        self.release_unreachable_nodes()
+
+    def add_to_tree_size(self, num_new_nodes):
+        """ Counts new nodes in the size of the tree and updates the peak tree size"""
+        self.num_nodes += num_new_nodes
+        self.peak_tree_size = max(self.peak_tree_size, self.num_nodes)
+
+    def get_reachable_nodes(self):
+        """ Returns the set of nodes that can be reached from the root through created child nodes"""
+        reachable_nodes = {self.root}
+        unexplored_nodes = [self.root]
+        while unexplored_nodes:
+            for child in unexplored_nodes.pop().get_child_nodes():
+                if child not in reachable_nodes:
+                    reachable_nodes.add(child)
+                    unexplored_nodes.append(child)
+        return reachable_nodes
+
+    def release_unreachable_nodes(self):
+        """ Drops the nodes that can not be reached from the root. Node objects are freed by the garbage collector once
+        nothing refers to them, so they are only removed from the transposition table, while the tree arrays are
+        compacted to the nodes that are kept. The transposition table is given the new handles of the moved nodes"""
+        if self.tree is not None:
+            mapping = self.tree.compact(self.root.index)
+            self.root = self.tree.get_node(0)
+            self.num_nodes = self.tree.num_nodes
+            get_kept_node = lambda node: self.tree.get_node(mapping[node.index]) if mapping[node.index] >= 0 else None
+        else:
+            reachable_nodes = self.get_reachable_nodes()
+            self.num_nodes = len(reachable_nodes)
+            get_kept_node = lambda node: node if node in reachable_nodes else None
+        if self.transposition_table is not None:
+            self.transposition_table.retain(get_kept_node)
+
+    def recycle_nodes(self):
+        """ Called when the tree has reached max_tree_size nodes. The least visited child nodes are disconnected from their
+        parents, together with the subtrees below them, until at least half of the cap is free. The actions of recycled
+        nodes have no child node again, and a new node is made if the tree policy chooses them later"""
+        edges = []  # (counter of the child, parent, child) for each connection between created nodes
+        visited_nodes = {self.root}
+        unexplored_nodes = [self.root]
+        while unexplored_nodes:
+            parent = unexplored_nodes.pop()
+            for child in parent.get_child_nodes():
+                if child.get_proven_winner() == 0:  # Proven nodes are kept, since their value is known and a proven win must stay choosable
+                    edges.append((child.get_counter(), parent, child))
+                if child not in visited_nodes:
+                    visited_nodes.add(child)
+                    unexplored_nodes.append(child)
+        edges.sort(key=lambda edge: edge[0])
+        num_to_recycle = self.num_nodes - self.max_tree_size // 2
+        for _, parent, child in edges[:num_to_recycle]:
+            parent.remove_child(child)
+        self.release_unreachable_nodes()
+
+    def simulate(self, num_simulations, time_budget=None):
+        """ Performs at most the given number of simulations from the root and returns the number of simulations performed.
+        With a time budget (seconds) the search also stops when the time is up, and with early stopping it stops as soon as
+        the most visited child of the root can not be overtaken in the remaining budget. With a leaf batch size of 1 each
+        simulation performs the four MCTS steps in turn, while a larger batch size performs the simulations in batches"""
+        start_time = time.perf_counter()
+        num_performed = 0
+        while num_performed < num_simulations:
+            if 0 < self.max_tree_size <= self.num_nodes:
+                self.recycle_nodes()
+            remaining_simulations = num_simulations - num_performed
+            if time_budget is not None:
+                elapsed_time = time.perf_counter() - start_time
+                if elapsed_time >= time_budget:
+                    break
+                if num_performed > 0:  # The simulations that fit in the remaining time are estimated from the rate so far
+                    remaining_simulations = min(remaining_simulations, num_performed * (time_budget - elapsed_time) / elapsed_time)
+            if self.early_stopping and self.is_decided(remaining_simulations):
+                break
+            if self.root.get_proven_winner() != 0:  # The value of the root is known, so more simulations can not change the chosen action
+                if len(self.root.get_child_nodes()) == 0:  # A node proven before its children were made (e.g. as a leaf) needs a child to be chosen
+                    self.expand_proven_root()
+                break
+            batch_size = min(self.leaf_batch_size, num_simulations - num_performed)
+            if batch_size <= 1:
+                leaf_node = self.tree_search()
+                self.leaf_node_expansion(leaf_node)
+                final_evaluation = self.leaf_evaluation(leaf_node)
+                self.backpropagation(leaf_node, final_evaluation)
+                num_performed += 1
+            else:
+                self.batched_simulation(batch_size)
+                num_performed += batch_size
+        return num_performed
+
+    def is_decided(self, remaining_simulations):
+        """ Returns True when the most visited child of the root can not be overtaken in the given number of remaining
+        simulations, since each simulation adds one visit to a single child. A root with one legal action is decided as
+        soon as its child has been made"""
+        counters, _ = self.root.get_child_statistics()
+        if len(counters) == 0 or np.max(counters) == 0:
+            return False
+        if len(counters) == 1:
+            return True
+        second_counter, best_counter = np.partition(counters, -2)[-2:]
+        return best_counter - second_counter > remaining_simulations
+
+    def batched_simulation(self, batch_size):
+        """ Gathers the given number of leaves by tree search and expansion before any of them is evaluated. A virtual loss
+        is added along the path of each gathered leaf, so that the following searches of the batch are steered towards
+        other leaves. All leaves are then evaluated together, where the rollouts of the batch share one NN forward pass
+        per rollout step, and the virtual losses are removed before each leaf is backpropagated along its own path"""
+        leaf_nodes, search_paths, snapshots = [], [], []
+        for _ in range(batch_size):
+            leaf_node = self.tree_search()
+            self.leaf_node_expansion(leaf_node)
+            snapshots.append(self.add_virtual_loss(self.search_path))
+            leaf_nodes.append(leaf_node)
+            search_paths.append(self.search_path)
+        for snapshot in reversed(snapshots):  # Restored in reverse order, so a node shared by several paths gets its original statistics back
+            self.remove_virtual_loss(snapshot)
+        final_evaluations = self.batched_leaf_evaluation(leaf_nodes)
+        for leaf_node, search_path, final_evaluation, final_state in zip(leaf_nodes, search_paths, final_evaluations, self.final_states):
+            self.search_path = search_path
+            self.final_state = final_state
+            self.backpropagation(leaf_node, final_evaluation)
+
+    @staticmethod
+    def add_virtual_loss(search_path):
+        """ Updates the nodes of the given path as if the pending simulation was lost by the player choosing each node, and
+        returns the previous counter and value of the nodes so that the virtual loss can be removed exactly"""
+        snapshot = [(node, node.get_counter(), node.get_value()) for node in search_path]
+        search_path[0].update_counter()
+        for parent, node in zip(search_path[:-1], search_path[1:]):
+            node.update_counter()
+            loss = -1 if parent.get_player() == 1 else 1  # P1 maximizes and P2 minimizes the value
+            node.update_value((node.get_value() + loss)/node.get_counter())  # Same update as backpropagation
+        return snapshot
+
+    @staticmethod
+    def remove_virtual_loss(snapshot):
+        """ Gives the nodes of a path the counters and values they had before the virtual loss was added"""
+        for node, counter, value in snapshot:
+            node.set_counter(counter)
+            node.update_value(value)
 
     def tree_search(self):
         """ Traverse the tree from a root to a leaf node by using the tree policy. As long as the root does not produce
-        a winning state (i.e. is a final node) and it has children (i.e. is not a leaf node), the method will update the
-        values of the child nodes and then use the Tree policy (min-max) to choose the next node. It returns the chosen leaf node"""
+        a winning state (i.e. is a final node) and it has children (i.e. is not a leaf node), the method will use the
+        Tree policy (min-max) to choose the next node. It returns the chosen leaf node. A node with a proven winner is
+        treated like a final node, since its value is known without searching its subtree"""
         current_node = self.root
-        child_nodes = current_node.get_child_nodes()
-        while not self.state_manager.is_game_over(current_node.get_state()) and len(child_nodes) > 0:
-            child_values = {}
-            for child in child_nodes:  # Update value of each child node before using tree policy to choose the next root. Values are stored in child_values to avoid updating the child values outside backpropagation
-                if current_node.get_player() == 1:
-                    u = self.c * sqrt(log(child.get_parent_counter())/(1 + child.get_counter()))
-                    child_values[child] = child.get_value() + u
-                elif current_node.get_player() == 2:
-                    u = self.c * sqrt(log(child.get_parent_counter())/(1 + child.get_counter()))
-                    child_values[child] = child.get_value() - u
-            # Tree policy: choose action (and hence next root) that maximize value for P1 or minimize value for P2
-            if current_node.get_player() == 1:
-                current_node = max(child_values, key=child_values.get)  # P1 chooses action argmax(Q + u)
-            elif current_node.get_player() == 2:
-                current_node = min(child_values, key=child_values.get)  # P2 chooses action argmin(Q - u)
-            child_nodes = current_node.get_child_nodes()
+        self.search_path = [current_node]
+        while not current_node.is_final_state() and current_node.get_proven_winner() == 0 and current_node.get_child_count() > 0:
+            current_node = self.tree_policy(current_node)
+            self.search_path.append(current_node)
         return current_node  # The chosen leaf node
 
+    def tree_policy(self, node):
+        """ Tree policy: choose the child (and hence next root) that maximizes Q + u for P1 and minimizes Q - u for P2,
+        where u(s,a) = c * sqrt(log(N(s))/(1 + N(s,a))) is the exploration bonus. The values of all children are computed
+        in one NumPy operation, and since argmin(Q - u) = argmax(-Q + u) the player is folded into the sign of Q.
+        The statistics of the children are gathered in one NumPy operation by the ArrayTree backend only, while the
+        object backend builds them with a loop over its Node children (see Node.get_child_statistics).
+        The counter of the given node is used as N(s), since a shared child can have another parent.
+        With PUCT selection the bonus is u(s,a) = c * P(s,a) * sqrt(N(s))/(1 + N(s,a)), where P(s,a) is the prior of the action.
+        With RAVE the value is (1 - beta) * Q(s,a) + beta * AMAF(s,a), where beta = sqrt(k/(3N(s) + k)) gives the AMAF value
+        most weight in the first visits of a node and fades it out as the MCTS values become reliable"""
+        counters, values = node.get_child_statistics()
+        if self.rave_k > 0:
+            amaf_counters, amaf_sums = node.get_child_amaf_statistics()
+            amaf_values = np.divide(amaf_sums, amaf_counters, out=np.zeros(len(amaf_sums)), where=amaf_counters > 0)
+            beta = np.sqrt(self.rave_k / (3 * node.get_counter() + self.rave_k))
+            values = (1 - beta) * values + beta * amaf_values
+        sign = 1 if node.get_player() == 1 else -1
+        if self.selection == "puct":
+            exploration = self.c * node.get_child_priors() * np.sqrt(node.get_counter()) / (1 + counters)
+        else:
+            exploration = self.c * np.sqrt(np.log(node.get_counter()) / (1 + counters))
+        scores = sign * values + exploration
+        if self.solver:
+            scores[node.get_child_proven_winners() == (2 if node.get_player() == 1 else 1)] = -np.inf  # Actions that are proven losses are never chosen
+        child_num = int(np.argmax(scores))
+        child = node.get_child(child_num)
+        if child is None:  # The action is chosen for the first time, so its child node is created
+            child = self.create_child(node, child_num)
+        return child
+
     def leaf_node_expansion(self, leaf_node):
-        """ The child states of a parent state is generated, and the tree node housing the parent state
-        (i.e. leaf node) is connected to the nodes housing the child states (i.e. child nodes of the leaf)"""
-        if not self.state_manager.is_game_over(leaf_node.get_state()):  # if node is a leaf node that can be expanded (i.e. not final state)
-            child_nodes = self.state_manager.get_child_nodes(leaf_node.get_state(), leaf_node.get_player())
-            child_player = 1 if leaf_node.player == 2 else 2
-            for child in child_nodes:
-                leaf_node.add_child(child)  # connect child to parent, and parent to child (both executed in add_child())
-                child.set_player(child_player)
+        """ The legal actions from the state of the leaf node are recorded together with the winner of each child state,
+        which the connectivity of the leaf state gives without producing the child states. The child nodes housing the
+        child states are only made when the tree policy chooses them (see create_child), since most are never visited"""
+        if leaf_node.is_final_state() or leaf_node.get_child_count() > 0:  # if node is a final state, it can not be expanded, and a proven node that ends a search can already be expanded
+            return
+        state = leaf_node.get_state()
+        connectivity = self.state_manager.get_connectivity(state)
+        legal_actions = self.state_manager.get_legal_actions(state, leaf_node.get_player())
+        leaf_node.add_legal_actions(legal_actions, [connectivity.get_winner_after(action) for action in legal_actions])
+
+    def create_child(self, node, child_num):
+        """ Makes the child node of the legal action with the given position and connects it to the given node. With a
+        transposition table, a child state that is already in the table (i.e. reached by another order of actions) is
+        connected instead of making a new node. The Zobrist key of the child is found from the key of the given node,
+        so the child state is only produced when it is missing from the table"""
+        action = node.get_child_action(child_num)
+        child = None
+        if self.transposition_table is not None:
+            key = self.transposition_table.get_child_key(node.get_key(), action)
+            child = self.transposition_table.get_node(key)
+        if child is None:
+            child_state = self.state_manager.get_next_state(node.get_state(), action)
+            child = self.create_node(child_state, action)  # Player is included in action
+            child.set_winner(node.get_child_winner(child_num))
+            child.set_proven_winner(node.get_child_winner(child_num))  # A final state is proven won by its winner
+            self.add_to_tree_size(1)
+            if self.transposition_table is not None:
+                child.set_key(key)
+                self.transposition_table.add_node(key, child)
+        node.set_child(child_num, child)
+        return child
 
     def leaf_evaluation(self, leaf_node):
         """ The value of a leaf node is estimated by performing a rollout simulation, using the target
-        policy (i.e. default policy) from the leaf node to a final state (i.e. winning state)."""
-        state = leaf_node.get_state()
-        player = leaf_node.get_player()
-        while not self.state_manager.is_game_over(state):
-            chosen_action = q(state, player)  # Default policy = target policy since MCTS is on-policy. This policy is created by the actor NN
-            state = self.state_manager.get_next_state(state, chosen_action)
-            player = 1 if player == 2 else 2
-        if player == 2:  # In winner state, the previous player will be the winner, since player is swapped at the end of the while loop
+        policy (i.e. default policy) from the leaf node to a final state (i.e. winning state). The rollout mode decides
+        if the rollout is performed one action at a time (step) or by filling the entire board at once (fill).
+        With PUCT selection a single forward pass of the ANET gives the value of the leaf and the priors of its actions.
+        No rollout is needed when the winner of the leaf is known (see get_known_winner)"""
+        self.final_state = leaf_node.get_state().to_array()  # Replaced by the board at the end of the rollout when there is one
+        winner = self.get_known_winner(leaf_node)
+        if winner == 0:
+            if self.selection == "puct":
+                distribution, value = self.actor.evaluate(leaf_node.get_state(), leaf_node.get_player())
+                self.set_priors(leaf_node, distribution)
+                return float(value)
+            elif self.rollout_mode == "fill":
+                distribution = None if self.actor.is_exploring() else self.actor.get_distribution(leaf_node.get_state(), leaf_node.get_player())  # A single NN call is used for the entire rollout
+                winner = self.fill_rollout(leaf_node.get_state(), leaf_node.get_player(), distribution)
+            else:
+                winner = self.step_rollout(leaf_node.get_state(), leaf_node.get_player())
+        if winner == 1:
             reward = 1
         else:
             reward = -1  # Maybe use 0?
         return reward
 
-    @staticmethod
-    def backpropagation(node, final_evaluation):
+    def batched_leaf_evaluation(self, leaf_nodes):
+        """ Leaf evaluation of several leaf nodes at once, returning one evaluation per leaf. The step rollouts of all
+        leaves are played in lockstep, so the NN actions of each rollout step come from a single batched forward pass,
+        and fill rollouts get the distributions of all guided rollouts from one forward pass. With PUCT selection the
+        values and priors of all leaves come from one forward pass. The board at the end of each simulation is kept in final_states"""
+        winners = [self.get_known_winner(leaf_node) for leaf_node in leaf_nodes]
+        active = [i for i, winner in enumerate(winners) if winner == 0]  # Leaves with an unknown winner need a rollout
+        self.final_states = [leaf_node.get_state().to_array() for leaf_node in leaf_nodes]
+        states = {i: leaf_nodes[i].get_state() for i in active}
+        players = {i: leaf_nodes[i].get_player() for i in active}
+        if self.selection == "puct":
+            evaluations = [1 if winner == 1 else -1 for winner in winners]
+            if active:
+                distributions, values = self.actor.evaluate_batch([states[i] for i in active], [players[i] for i in active])
+                for i, distribution, value in zip(active, distributions, values):
+                    self.set_priors(leaf_nodes[i], distribution)
+                    evaluations[i] = float(value)
+            return evaluations
+        if self.rollout_mode == "fill":
+            guided = [i for i in active if not self.actor.is_exploring()]
+            distributions = {}
+            if guided:
+                distributions = dict(zip(guided, self.actor.get_distributions([states[i] for i in guided], [players[i] for i in guided])))
+            for i in active:
+                winners[i] = self.fill_rollout(states[i], players[i], distributions.get(i))
+                self.final_states[i] = self.final_state
+        else:
+            connectivities = {i: self.state_manager.get_connectivity(states[i]) for i in active}
+            while active:
+                chosen_actions = self.actor.target_policy_batch([states[i] for i in active], [players[i] for i in active])
+                for i, chosen_action in zip(active, chosen_actions):
+                    states[i] = self.state_manager.get_next_state(states[i], chosen_action)
+                    connectivities[i].perform_action(chosen_action)
+                    players[i] = 1 if players[i] == 2 else 2
+                for i in active:
+                    winners[i] = connectivities[i].get_winner()
+                    if winners[i] != 0:
+                        self.final_states[i] = states[i].to_array()
+                active = [i for i in active if winners[i] == 0]
+        return [1 if winner == 1 else -1 for winner in winners]
+
+    def get_known_winner(self, leaf_node):
+        """ Returns the winner of the given leaf when it is known without a rollout, which is the winner of a final state,
+        the proven winner of the MCTS-Solver or the exact winner found by the endgame solver when few cells are empty.
+        Returns 0 when the winner is unknown"""
+        winner = leaf_node.get_winner() or leaf_node.get_proven_winner()
+        if winner == 0 and self.endgame_solver is not None and self.endgame_solver.can_solve(leaf_node.get_state()):
+            winner = self.endgame_solver.solve(leaf_node.get_state(), leaf_node.get_player())
+            if self.solver and winner == leaf_node.get_player():  # The winner is exact, so the MCTS-Solver can propagate it up the tree
+                self.prove_winning_move(leaf_node)
+            elif self.solver and leaf_node != self.root:  # A lost root is proven by its children, so that the root distribution has visited children
+                leaf_node.set_proven_winner(winner)
+        return winner
+
+    def prove_winning_move(self, node):
+        """ Makes the child of the winning move found by the endgame solver and proves both the child and the given node
+        as won by the player to move, so that the winning action can be chosen as the actual action. If no winning move
+        is found among the legal actions of the node, every action is made into a child, so the node still has children
+        to choose from when it becomes the root"""
+        size = self.state_manager.size
+        winning_index = self.endgame_solver.get_winning_move(node.get_state(), node.get_player())
+        found = False
+        for child_num in range(node.get_child_count()):
+            (row, col), _ = node.get_child_action(child_num)
+            if row * size + col == winning_index:
+                child = node.get_child(child_num) or self.create_child(node, child_num)
+                child.set_proven_winner(node.get_player())
+                found = True
+        if not found:
+            for child_num in range(node.get_child_count()):
+                if node.get_child(child_num) is None:
+                    self.create_child(node, child_num)
+        node.set_proven_winner(node.get_player())
+
+    def set_priors(self, node, distribution):
+        """ Gives each legal action of the given node its probability in the given ANET distribution as prior"""
+        size = self.state_manager.size
+        cell_indexes = [row * size + col for (row, col), _ in (node.get_child_action(child_num) for child_num in range(node.get_child_count()))]
+        node.set_child_priors(distribution[cell_indexes])
+
+    def step_rollout(self, state, player):
+        """ Performs one target policy action at a time until a player has won and returns the winner. The connectivity of the
+        leaf state is updated with each rollout action, so the winner is known right after the action without a board search"""
+        connectivity = self.state_manager.get_connectivity(state)
+        while not connectivity.is_final_state():
+            chosen_action = self.actor.target_policy(state, player)  # Default policy = target policy since MCTS is on-policy. This policy is created by the actor NN
+            state = self.state_manager.get_next_state(state, chosen_action)
+            connectivity.perform_action(chosen_action)
+            player = 1 if player == 2 else 2
+        self.final_state = state.to_array()
+        return connectivity.get_winner()
+
+    def fill_rollout(self, state, player, distribution=None):
+        """ Fills all empty cells at once, where the players take turns in claiming cells in the order given by the target
+        policy, and returns the winner. A full Hex board always has exactly one winner, and the moves made after the game
+        is won can not change who that winner is, so a single winner check of the full board replaces the check after each action.
+        The order is sampled from the given NN distribution, and a random order is used when no distribution is given"""
+        empty_indexes = np.flatnonzero(state.to_array() == 0)
+        if distribution is None:
+            np.random.shuffle(empty_indexes)  # Random order of actions
+        else:
+            gumbel_keys = np.log(distribution[empty_indexes] + 1e-12) - np.log(-np.log(np.random.uniform(size=len(empty_indexes))))
+            empty_indexes = empty_indexes[np.argsort(-gumbel_keys)]  # Order sampled from the distribution without replacement (Gumbel top-k)
+        full_state = state.to_array().copy()
+        opponent = 1 if player == 2 else 2
+        full_state[empty_indexes[0::2]] = player  # The current player claims the 1st, 3rd, 5th, ... cell in the order
+        full_state[empty_indexes[1::2]] = opponent
+        self.final_state = full_state
+        return self.state_manager.get_full_board_winner(full_state.tobytes())
+
+    def backpropagation(self, node, final_evaluation):
         """ The evaluation of a final state is propagated back up the tree, and the value and counter of
         the nodes that are located on the path to the root are updated. These counters are later used to produce
-        the action probability distribution used as target in training of the actor NN (ANET)"""
+        the action probability distribution used as target in training of the actor NN (ANET). The given node is the leaf
+        of the last tree search, and the path of that search is followed since a shared node can have several parents"""
+        if self.solver:
+            self.propagate_proofs()
+        if self.rave_k > 0:
+            self.update_amaf_statistics(final_evaluation)
         node.update_counter()
-        while node.get_parent() is not None:
-            node.get_parent().update_counter()  # N(s,a) = N(s,a) + 1
+        for parent in reversed(self.search_path[:-1]):
+            parent.update_counter()  # N(s,a) = N(s,a) + 1
             node_eval = node.get_value()
             node_eval += final_evaluation  # E_t = E_t + eval (p. 7)
             node.update_value(node_eval/node.get_counter())  # Q(s,a) = E_t/N(s,a) (p. 7)
-            node = node.get_parent()
+            node = parent
+
+    def update_amaf_statistics(self, final_evaluation):
+        """ RAVE step: updates the all-moves-as-first statistics of each node on the last search path. Cells are only ever
+        claimed, so the cells the player of a node claimed after that node are the cells that are empty in the state of
+        the node and owned by the player at the end of the simulation"""
+        for node in self.search_path:
+            if node.get_child_count() == 0:  # A final node has no legal actions to update
+                continue
+            played_cells = (self.final_state == node.get_player()) & (node.get_state().to_array() == 0)
+            node.update_amaf(played_cells, final_evaluation)
+
+    def propagate_proofs(self):
+        """ MCTS-Solver step: proves the nodes of the last search path from the leaf and up (a final node is proven won by
+        its winner when it is made). A node where the player to move has a proven winning action is a proven win for that player, and a
+        node where every action is a proven win for the opponent is a proven loss. The ancestors of a node that can not
+        be proven can not be proven either, so the propagation stops there"""
+        for node in reversed(self.search_path):
+            if node.get_proven_winner() != 0:
+                continue
+            player = node.get_player()
+            child_proven_winners = node.get_child_proven_winners()
+            winning_actions = np.flatnonzero(child_proven_winners == player)
+            if len(winning_actions) > 0:
+                if node.get_child(int(winning_actions[0])) is None:  # A winning action is made into a node, so that it can be chosen as the actual action
+                    self.create_child(node, int(winning_actions[0]))
+                node.set_proven_winner(player)
+            elif len(child_proven_winners) > 0 and np.all(child_proven_winners == (2 if player == 1 else 1)):
+                node.set_proven_winner(2 if player == 1 else 1)
+            else:
+                break
+
+    def expand_proven_root(self):
+        """ Makes the children of a proven root that has no child nodes, which happens when the root was proven while
+        it was a leaf or before the tree policy chose any of its actions (e.g. the child made by prove_winning_move, or a
+        leaf proven lost by the endgame solver). A won root gets the child of a proven winning action, while every
+        action of a lost root (or of a won root whose winning action is unknown) is made into a child, so that
+        get_root_distribution and StateManager.select_action have children to choose from"""
+        self.leaf_node_expansion(self.root)
+        if self.root.get_proven_winner() == self.root.get_player():
+            winning_actions = np.flatnonzero(self.root.get_child_proven_winners() == self.root.get_player())
+            if len(winning_actions) > 0:
+                self.create_child(self.root, int(winning_actions[0]))
+                return
+            if self.endgame_solver is not None and self.endgame_solver.can_solve(self.root.get_state()):
+                self.prove_winning_move(self.root)  # The win was found by the endgame solver, which also finds the winning move
+                return
+        for child_num in range(self.root.get_child_count()):
+            if self.root.get_child(child_num) is None:
+                self.create_child(self.root, child_num)
+
+    def make_root_children(self, distribution):
+        """ Makes the children of the root for the actions with a nonzero probability in the given distribution. Used
+        when the distribution of the root is taken from a DistributionCache instead of a search, so that
+        StateManager.select_action can choose one of the children"""
+        self.leaf_node_expansion(self.root)
+        size = self.state_manager.size
+        for child_num in range(self.root.get_child_count()):
+            (row, col), _ = self.root.get_child_action(child_num)
+            if distribution[row * size + col] > 0 and self.root.get_child(child_num) is None:
+                self.create_child(self.root, child_num)
 
     def get_root_distribution(self, node):
         """ Method for normalizing the action counters from the root (i.e. edges to child nodes) to produce
         a probability distribution that can be used as target for training the actor network (ANET)"""
         counters = [0]*self.state_manager.size**2  # The value of illegal actions will be 0, since there is no child node for illegal actions so their value in the distribution is never changed from 0
-        for child in node.get_child_nodes():
-            action_location = child.action[0]  # The action that produces the child state from the state of the given node
+        is_proven_win = node.get_proven_winner() == node.get_player()
+        for child, action in zip(node.get_child_nodes(), node.get_child_actions()):
+            action_location = action[0]  # The action that produces the child state from the state of the given node
             row, col = action_location
-            counters[row * self.state_manager.size + col] = child.get_counter()
+            if is_proven_win:  # The target of a proven win only contains the proven winning actions
+                counters[row * self.state_manager.size + col] = 1 if child.get_proven_winner() == node.get_player() else 0
+            else:
+                counters[row * self.state_manager.size + col] = child.get_counter()
         # Normalize the counters:
         numpy_counters = np.asarray(counters, dtype=np.float32)
         counter_sum = np.sum(numpy_counters)
+        if counter_sum == 0:  # No child has been visited (e.g. a proven root expanded without simulations), so every legal action is equally likely
+            for child_num in range(node.get_child_count()):
+                row, col = node.get_child_action(child_num)[0]
+                numpy_counters[row * self.state_manager.size + col] = 1
+            counter_sum = np.sum(numpy_counters)
         normalized_distribution = numpy_counters/counter_sum
         return normalized_distribution
 
@@ -1,43 +1,141 @@
+import math
+import numpy as np
+
+
 class Node:
     def __init__(self, state, action):
         """ Class for making nodes that represents different states in the game. A node  will contain
         a state, the action that produced the state and the current player that will chose an action from this state"""
-        self.name = "State: [" + str(state) + "], Action: " + str(action)
-        self.state = state  # State when this node is root
+        self.state = state  # State when this node is root (immutable BoardState, so it is shared and never copied)
         self.action = action  # Action taken from root leading to this child node
         self.parent = None
-        self.child_nodes = []
+        self.child_nodes = []  # child_nodes[i] is None until the tree policy chooses legal action i for the first time
+        self.child_actions = []  # child_actions[i] is the action leading from this node to child_nodes[i]
+        self.child_winners = []  # child_winners[i] is the winner of the state produced by child_actions[i]
+        self.child_priors = []  # child_priors[i] is the prior probability of child_actions[i] used by PUCT (uniform until the ANET has evaluated the node)
+        self.child_amaf_counters = None  # child_amaf_counters[i] counts the simulations where the player of this node claimed the cell of child_actions[i] (RAVE), made at the first AMAF update
+        self.child_amaf_values = None  # child_amaf_values[i] is the sum of the evaluations of those simulations
+        self.child_cells = None  # child_cells[i] is the cell index of child_actions[i], used to look up the claimed cells
+        self.key = None  # Zobrist key of the node when a transposition table is used
         self.node_value = 0  # the value of the action that leads to this node reflecting the desirability of the state
         self.node_counter = 0  # counts the number of times the node is visited during MCTS
+        self.winner = 0  # the player that has won in the state of this node, or 0 if the state is not a final state
+        self.proven_winner = 0  # the player that can force a win from the state of this node (MCTS-Solver), or 0 if not proven
         if action[0] is None:  # starting player is given in the action
             self.player = action[1]
         else:
             self.player = 1 if action[1] == 2 else 2  # action[1] is the player that took the action that produced this state, while self.player is the player that performs an action from this node (i.e. decides next state)
 
     def __str__(self):
-        """ Changes Node object representation to string format to make debugging easier"""
-        return self.name
+        """ Changes Node object representation to string format to make debugging easier. The name is only made when
+        it is needed, so that creating a node does not convert the state to a string"""
+        return "State: [" + str(self.state) + "], Action: " + str(self.action)
 
     def __repr__(self):
         """ Changes Node object representation to string format to make debugging easier"""
-        return self.name
+        return str(self)
 
     def set_parent(self, parent_node):
-        """ Sets the parent node containing the parent state"""
+        """ Sets the parent node containing the parent state (None detaches the node from its parent)"""
         self.parent = parent_node
 
     def get_parent(self):
         """ Returns the parent node containing the parent state"""
         return self.parent
 
-    def add_child(self, child_node):
-        """ Create parent-child relationships used during MCTS leaf expansion"""
-        self.child_nodes.append(child_node)
-        child_node.set_parent(self)
+    def add_child(self, child_node, action=None):
+        """ Create parent-child relationships used during MCTS leaf expansion. With a transposition table a child can be
+        shared by several parents, so the action of the edge is given, and the parent is only set by the first parent"""
+        self.child_nodes.append(None)
+        self.child_actions.append(child_node.get_action() if action is None else action)
+        self.child_winners.append(child_node.get_winner())
+        self.child_priors.append(1.0)
+        self.set_child(len(self.child_nodes) - 1, child_node)
+
+    def add_legal_actions(self, actions, winners):
+        """ Records the legal actions from the state of this node and the winner of the state each action produces,
+        without creating the child nodes. A child node is made when the tree policy first chooses its action"""
+        self.child_nodes.extend([None] * len(actions))
+        self.child_actions.extend(actions)
+        self.child_winners.extend(winners)
+        self.child_priors.extend([1 / max(len(actions), 1)] * len(actions))
+
+    def set_child(self, child_num, child_node):
+        """ Connects the given child node to the legal action with the given position"""
+        self.child_nodes[child_num] = child_node
+        if child_node.get_parent() is None:
+            child_node.set_parent(self)
+
+    def remove_child(self, child_node):
+        """ Disconnects the given child node, so that its action has no child node until the tree policy chooses it again"""
+        self.child_nodes = [None if child is child_node else child for child in self.child_nodes]
 
     def get_child_nodes(self):
-        """ Returns the child nodes containing the available child states from the state of the current node"""
-        return self.child_nodes
+        """ Returns the child nodes that have been created, containing the child states from the state of the current node"""
+        return [child for child in self.child_nodes if child is not None]
+
+    def get_child(self, child_num):
+        """ Returns the child node of the legal action with the given position, or None if it has not been created"""
+        return self.child_nodes[child_num]
+
+    def get_child_count(self):
+        """ Returns the number of legal actions recorded for this node (0 for a leaf node)"""
+        return len(self.child_nodes)
+
+    def get_child_action(self, child_num):
+        """ Returns the legal action with the given position"""
+        return self.child_actions[child_num]
+
+    def get_child_winner(self, child_num):
+        """ Returns the winner of the state produced by the legal action with the given position"""
+        return self.child_winners[child_num]
+
+    def get_child_statistics(self):
+        """ Returns two arrays with the counter and the value of each legal action, used by the tree policy. Actions
+        without a child node have not been visited, so their counter and value are 0. The statistics are kept on the
+        child nodes (a child can be shared by several parents with a transposition table), so the arrays are built
+        with a Python loop over the children on every call. Only the ArrayTree backend gathers them in one NumPy
+        operation, while this backend only has the scores of the tree policy vectorised"""
+        counters = np.array([child.node_counter if child is not None else 0 for child in self.child_nodes], dtype=np.float64)
+        values = np.array([child.node_value if child is not None else 0 for child in self.child_nodes], dtype=np.float64)
+        return counters, values
+
+    def update_amaf(self, played_cells, evaluation):
+        """ All-moves-as-first update used by RAVE: every legal action whose cell was claimed by the player of this node
+        later in the simulation (in the tree or in the rollout) is updated as if it had been played from this node.
+        played_cells is a boolean array over the cells of the board"""
+        if self.child_amaf_counters is None or len(self.child_amaf_counters) < len(self.child_actions):  # Made at the first update, and extended if a child has been added since
+            size = math.isqrt(len(self.state))
+            num_new_actions = len(self.child_actions) - (0 if self.child_amaf_counters is None else len(self.child_amaf_counters))
+            self.child_cells = np.array([row * size + col for (row, col), _ in self.child_actions], dtype=np.int64)
+            self.child_amaf_counters = np.concatenate([self.child_amaf_counters if self.child_amaf_counters is not None else [], np.zeros(num_new_actions)])
+            self.child_amaf_values = np.concatenate([self.child_amaf_values if self.child_amaf_values is not None else [], np.zeros(num_new_actions)])
+        is_played = played_cells[self.child_cells]
+        self.child_amaf_counters[is_played] += 1
+        self.child_amaf_values[is_played] += evaluation
+
+    def get_child_amaf_statistics(self):
+        """ Returns two arrays with the AMAF counter and the sum of the AMAF evaluations of each legal action, used by the
+        RAVE tree policy"""
+        if self.child_amaf_counters is None or len(self.child_amaf_counters) < len(self.child_actions):
+            return np.zeros(len(self.child_actions)), np.zeros(len(self.child_actions))
+        return self.child_amaf_counters, self.child_amaf_values
+
+    def set_child_priors(self, priors):
+        """ Sets the prior probability of each legal action (same order as the legal actions)"""
+        self.child_priors = list(priors)
+
+    def get_child_priors(self):
+        """ Returns an array with the prior probability of each legal action, used by the PUCT tree policy"""
+        return np.array(self.child_priors, dtype=np.float64)
+
+    def get_child_actions(self):
+        """ Returns the actions leading from this node to each of the created child nodes (same order as get_child_nodes)"""
+        return [self.child_actions[i] for i in range(len(self.child_nodes)) if self.child_nodes[i] is not None]
+
+    def get_action_to(self, child_node):
+        """ Returns the action leading from this node to the given child node"""
+        return self.child_actions[self.child_nodes.index(child_node)]
 
     def get_state(self):
         """ Returns the state of the board game when this node is the root node"""
@@ -51,6 +149,39 @@ class Node:
         """ Sets the player that will chose an action from the state of this node"""
         self.player = player
 
+    def set_winner(self, winner):
+        """ Sets the player that has won in the state of this node (0 if no player has won)"""
+        self.winner = winner
+
+    def get_winner(self):
+        """ Returns the player that has won in the state of this node (0 if no player has won)"""
+        return self.winner
+
+    def is_final_state(self):
+        """ Returns True if the state of this node is a winning state, which is known when the node is created"""
+        return self.winner != 0
+
+    def set_proven_winner(self, winner):
+        """ Sets the player that is proven to win from the state of this node with perfect play"""
+        self.proven_winner = winner
+
+    def get_proven_winner(self):
+        """ Returns the player that is proven to win from the state of this node, or 0 if no player is proven to win"""
+        return self.proven_winner
+
+    def get_child_proven_winners(self):
+        """ Returns an array with the proven winner of each legal action. An action without a child node is only proven
+        if it wins the game at once, which is known from the winner recorded at expansion"""
+        return np.array([child.proven_winner if child is not None else winner for child, winner in zip(self.child_nodes, self.child_winners)], dtype=np.int8)
+
+    def set_key(self, key):
+        """ Sets the Zobrist key identifying the state and player of this node in the transposition table"""
+        self.key = key
+
+    def get_key(self):
+        """ Returns the Zobrist key identifying the state and player of this node in the transposition table"""
+        return self.key
+
     def get_action(self):
         """ Return the action that produced this node"""
         return self.action
@@ -60,6 +191,10 @@ class Node:
         visited during MCTS. The counters are updated during backpropagation"""
         self.node_counter += 1
 
+    def set_counter(self, counter):
+        """ Sets the counter of the node, used to remove a virtual loss after a batched evaluation"""
+        self.node_counter = counter
+
     def get_counter(self):
         """ Returns the counter of the node, used to produce the action probability distribution in MCTS"""
         return self.node_counter
@@ -0,0 +1,86 @@
+import os
+import numpy as np
+
+
+class NumpyANET:
+    """ Class for running the forward pass of a trained ANET with NumPy only, so processes that only play (e.g. Topp and
+    the OHT client) neither import TensorFlow nor pay for eager Keras calls, which cost far more than the matrix
+    multiplications of the small Dense networks. The weights are exported from an ANET to a .npz file next to its .h5
+    file, with the kernel, bias and activation of every hidden layer, the softmax policy head and the optional tanh value head"""
+    def __init__(self, board_size, value_head=False):
+        self.value_head = value_head
+        self.input_size = 1 + board_size ** 2
+        self.output_size = board_size ** 2
+        self.layers = []  # (kernel, bias, activation) of each hidden layer, in the order of the forward pass
+        self.policy_layer = None  # (kernel, bias) of the softmax output
+        self.value_layer = None  # (kernel, bias) of the tanh output, only used with a value head
+
+    @staticmethod
+    def get_path(path):
+        """ Returns the path of the exported weights of the model saved in the given path (e.g. ANET_6_ep_225.h5 -->
+        ANET_6_ep_225.npz), so the same model path can be used by both inference engines"""
+        return os.path.splitext(path)[0] + ".npz"
+
+    @staticmethod
+    def save(path, layers, policy_layer, value_layer=None):
+        """ Writes the given layers to the .npz file of the given model path. layers is a list of (kernel, bias,
+        activation) of the hidden layers, while the heads are (kernel, bias)"""
+        arrays = {"activations": np.array([activation for _, _, activation in layers]), "policy_kernel": policy_layer[0], "policy_bias": policy_layer[1]}
+        for i, (kernel, bias, _) in enumerate(layers):
+            arrays["kernel_" + str(i)] = kernel
+            arrays["bias_" + str(i)] = bias
+        if value_layer is not None:
+            arrays["value_kernel"], arrays["value_bias"] = value_layer
+        np.savez(NumpyANET.get_path(path), **arrays)
+
+    def load(self, path):
+        """ Loads the exported weights of the model saved in the given path"""
+        with np.load(self.get_path(path)) as arrays:
+            activations = [str(activation) for activation in arrays["activations"]]
+            for activation in activations:
+                if activation not in ACTIVATIONS:
+                    raise Exception("Activation " + activation + " is not supported by the NumPy forward pass")
+            self.layers = [(arrays["kernel_" + str(i)].astype(np.float32), arrays["bias_" + str(i)].astype(np.float32), activations[i]) for i in range(len(activations))]
+            self.policy_layer = (arrays["policy_kernel"].astype(np.float32), arrays["policy_bias"].astype(np.float32))
+            if self.value_head:
+                self.value_layer = (arrays["value_kernel"].astype(np.float32), arrays["value_bias"].astype(np.float32))
+
+    def forward(self, inputs):
+        """ Forward pass where the probability of illegal actions (i.e. cells that are already owned by a player) is set
+        to 0 and each distribution is re-normalized, like ANET.forward. Returns the distributions, and the values when
+        the model has a value head"""
+        hidden = inputs.astype(np.float32)
+        for kernel, bias, activation in self.layers:
+            hidden = ACTIVATIONS[activation](hidden @ kernel + bias)
+        policy = softmax(hidden @ self.policy_layer[0] + self.policy_layer[1])
+        masked_policy = policy * (inputs[:, 1:] == 0)  # The first input is the player indicator
+        distributions = masked_policy / np.sum(masked_policy, axis=1, keepdims=True)
+        if self.value_head:
+            return distributions, np.tanh(hidden @ self.value_layer[0] + self.value_layer[1])
+        return distributions
+
+    def predict_distributions(self, inputs):
+        """ Forward pass giving the masked distributions of a batch of inputs (states with player indicator)"""
+        if self.value_head:
+            return self.forward(inputs)[0]
+        return self.forward(inputs)
+
+    def predict_distributions_values(self, inputs):
+        """ Forward pass of a model with a value head, giving the masked distributions and the values of a batch of
+        inputs (states with player indicator)"""
+        return self.forward(inputs)
+
+
+def softmax(x):
+    """ Softmax over the last axis, where the max is subtracted first so the exponentials can not overflow"""
+    exponentials = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return exponentials / np.sum(exponentials, axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {  # The activations available in the configs, by their Keras names
+    "linear": lambda x: x,
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0),
+    "softmax": softmax,
+}
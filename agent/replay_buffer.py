@@ -1,41 +1,180 @@
-import collections
-import random
 import numpy as np
+from agent.sum_tree import SumTree
+from agent.hash_index import HashIndex
+from agent.slot_list import SlotList
 
 
 class ReplayBuffer:
-    def __init__(self):
+    def __init__(self, max_size=750, sampling="recency", minibatch_size=256, store=None, dedup=False):
         """ Class for making the replay buffer that contains the cases = (state, distribution) that are used
         to train the actor neural network (ANET). This buffer is filled with the result of each episode,
-        and a random minibatch is created to be used in NN training"""
-        self.buffer = collections.deque()
-        self.max_size = 750  # restricted buffer size means that old cases are eventually replaced by newer cases that may give better results
+        and a random minibatch is created to be used in NN training. The cases are kept in preallocated arrays used as
+        a ring buffer, and the slots are sampled from a sum tree, so neither adding nor sampling depends on max_size.
+        With a ReplayStore, the cases of each finished episode are appended to the store instead, and the buffer samples
+        the newest max_size cases of the store directly from its memory-mapped files. Slot s then holds the newest case
+        of the store with index s modulo max_size.
+        With dedup, a case of a (state, player) that is already in the buffer is merged into the existing case instead of
+        taking a new slot, so repeated positions (e.g. openings) neither fill the buffer nor are sampled more often. The
+        merged case keeps the mean of the distributions and of the outcomes of its visits, and the number of visits. The
+        slots are then replaced in the order they were last visited instead of as a ring, so a merged case gets a new
+        insertion number and is replaced last, and a position that keeps being revisited (e.g. an opening) stays in the buffer"""
+        if dedup and store is not None:
+            raise Exception("Deduplication needs an in-memory replay buffer, since the cases of a replay store are never changed")
+        self.max_size = max_size  # restricted buffer size means that old cases are eventually replaced by newer cases that may give better results
+        self.sampling = sampling  # "recency" (newer cases are prioritized, linearly in their age) or "priority" (by the errors given to update_priorities)
+        self.minibatch_size = minibatch_size
+        self.states = None  # states[slot] is the state with player indicator of a case, allocated when the first case is added
+        self.distributions = None  # distributions[slot] is the distribution found by MCTS
+        self.outcomes = None  # outcomes[slot] is the outcome of the episode of the case (1 if player 1 won and -1 if player 2 won)
+        self.insertion_numbers = np.zeros(max_size, dtype=np.int64)  # Number of cases added before the case in the slot, + 1
+        self.sum_tree = SumTree(max_size)
+        self.max_priority = 1.0  # Priority of new cases with priority sampling, so every case is sampled at least once with high probability
+        self.num_added = 0  # Number of cases added (and merged with dedup) since the buffer was cleared, where without dedup the next case is put in slot num_added % max_size
+        self.num_pending_cases = 0  # Cases of the current episode that are waiting for the outcome of the episode
+        self.last_slots = None  # Slots of the last minibatch, used to update the priorities after training
+        self.store = store  # ReplayStore shared between training runs and processes, or None to keep the cases in memory only
+        self.pending_cases = []  # (state with player indicator, D) of the current episode, appended to the store with the outcome
+        self.pending_slots = []  # Slots of the cases of the current episode in the in-memory buffer, which get the outcome
+        self.dedup = dedup
+        self.index = HashIndex(max_size) if dedup else None  # Slot of the case of each hash of a state with player indicator
+        self.visit_counts = np.zeros(max_size, dtype=np.int32)  # Number of merged visits of the case in each slot (1 without dedup)
+        self.outcome_counts = np.zeros(max_size, dtype=np.int32)  # Number of visits of the case in each slot with a known outcome
+        self.num_merged = 0  # Cases merged into an existing case by dedup
+        self.num_cases = 0  # Filled slots with dedup, where a new case is put in the next empty slot until the buffer is full
+        self.slot_list = SlotList(max_size) if dedup else None  # Filled slots from the least to the most recently added or merged case, where the first is replaced
+        if store is not None:
+            self.refresh()
+
+    def __len__(self):
+        if self.dedup:
+            return self.num_cases
+        return min(self.num_added, self.max_size)
 
     def clear_buffer(self):
         """ Empty the buffer, which is performed in the beginning of each RL episode"""
-        self.buffer = collections.deque()
+        self.sum_tree.clear()
+        self.max_priority = 1.0
+        self.num_added = 0
+        self.num_pending_cases = 0
+        self.pending_cases = []
+        self.pending_slots = []
+        if self.index is not None:
+            self.index.clear()
+            self.slot_list.clear()
+        self.num_merged = 0
+        self.num_cases = 0
+        if self.store is not None:
+            self.refresh()  # The cases of the store are kept, since they are shared between training runs
+
+    def refresh(self):
+        """ Adds the cases committed to the store since the last refresh (by this buffer or by another process) to the
+        sum tree, where only the newest max_size cases can be sampled"""
+        num_cases = self.store.refresh()
+        indexes = np.arange(max(self.num_added, num_cases - self.max_size), num_cases)
+        if len(indexes) > 0:
+            slots = indexes % self.max_size
+            self.insertion_numbers[slots] = indexes + 1
+            self.sum_tree.update(slots, indexes + 1 if self.sampling == "recency" else np.full(len(slots), self.max_priority))
+        self.num_added = num_cases
 
     def add_case(self, node, D):
         """Add a new case to the buffer consisting of the root node state with a player indicator and the
         normalized distribution of the visit counts found in MCTS along all edges from the given root"""
-        player_board_state = [node.get_player()]
-        player_board_state.extend(node.get_state())  # player indicator is added to ensure that visit distribution is attuned to the player (good moves for 1 is bad for 2, and vice versa)
-        new_case = (player_board_state, D)
-        self.buffer.append(new_case)
-        if len(self.buffer) > self.max_size:
-            self.buffer.popleft()
-        # print("Added: " + str((root, D)), " to buffer of length: " + str(len(self.buffer)))
-
-    def get_random_minibatch(self):
-        """Return a random minibatch of cases of the given size used to train the ANET (i.e. actor). If the batch size
-        is larger than the buffer, the entire buffer is returned. If it is smaller, a random batch is selected"""
-        batch_size = min(len(self.buffer), 256)  # prev: 64
-        weights = np.linspace(0.0, 1.0, len(self.buffer))  # Add weights to cases, so newer cases are prioritized
-        random_batch = random.choices(population=self.buffer, weights=weights, k=batch_size)
-        return random_batch
-
+        player_board_state = node.get_state().with_player(node.get_player())  # player indicator is added to ensure that visit distribution is attuned to the player (good moves for 1 is bad for 2, and vice versa)
+        self.add_state_case(player_board_state, D)
 
+    def add_state_case(self, player_board_state, D):
+        """ Adds a case of the given state with player indicator (bytes with one cell state per byte) and distribution,
+        replacing the oldest case when the buffer is full"""
+        if self.store is not None:
+            self.pending_cases.append((player_board_state, D))  # Committed to the store when the outcome of the episode is known
+            self.num_pending_cases += 1
+            return
+        if self.states is None:
+            self.states = np.zeros((self.max_size, len(player_board_state)), dtype=np.int8)
+            self.distributions = np.zeros((self.max_size, len(D)), dtype=np.float32)
+            self.outcomes = np.zeros(self.max_size, dtype=np.float32)
+        key = hash(player_board_state) if self.dedup else None  # Only the hash is kept, so the index does not keep the states alive
+        slot = self.index.find(key, lambda slot: self.states[slot].tobytes() == player_board_state) if self.dedup else -1  # The state is compared, so a hash collision is not merged and the probing continues
+        if slot >= 0:
+            self.visit_counts[slot] += 1
+            self.distributions[slot] += (D - self.distributions[slot]) / self.visit_counts[slot]  # Running mean of the distributions of the visits
+            self.num_merged += 1
+            self.num_added += 1
+            self.insertion_numbers[slot] = self.num_added  # The merged case is the newest case, so it is replaced last and weighted as the newest by recency sampling
+            self.slot_list.move_to_end(slot)
+            if self.sampling == "recency":
+                self.sum_tree.update([slot], [self.num_added])
+        else:
+            slot = self.num_added % self.max_size
+            if self.dedup:
+                if self.num_cases < self.max_size:
+                    slot = self.num_cases
+                    self.num_cases += 1
+                else:
+                    slot = self.slot_list.get_first()  # The least recently added or merged case is replaced
+                    self.slot_list.remove(slot)
+                    self.index.remove(slot)
+                self.index.insert(key, slot)
+                self.slot_list.append(slot)
+            self.states[slot] = np.frombuffer(player_board_state, dtype=np.int8)
+            self.distributions[slot] = D
+            self.outcomes[slot] = 0
+            self.visit_counts[slot] = 1
+            self.outcome_counts[slot] = 0
+            self.num_added += 1
+            self.insertion_numbers[slot] = self.num_added
+            self.sum_tree.update([slot], [self.num_added if self.sampling == "recency" else self.max_priority])
+        self.pending_slots.append(slot)
+        self.num_pending_cases += 1
 
+    def add_outcome(self, winner):
+        """ Adds the outcome of the finished episode to the cases of the episode, so that each case = (state, D, z) where
+        z = 1 if player 1 won and -1 if player 2 won. The outcome is the target of the value head of the ANET"""
+        outcome = 1 if winner == 1 else -1
+        if self.store is not None:
+            if self.pending_cases:
+                states = np.frombuffer(b"".join(state for state, _ in self.pending_cases), dtype=np.int8).reshape(len(self.pending_cases), -1)
+                self.store.append(states, np.array([D for _, D in self.pending_cases], dtype=np.float32), np.full(len(self.pending_cases), outcome, dtype=np.float32))
+                self.pending_cases = []
+                self.refresh()
+            self.num_pending_cases = 0
+            return
+        for slot in self.pending_slots[-self.max_size:]:  # Older cases of a very long episode have been replaced
+            self.outcome_counts[slot] += 1
+            self.outcomes[slot] += (outcome - self.outcomes[slot]) / self.outcome_counts[slot]  # Running mean of the outcomes of the visits
+        self.pending_slots = []
+        self.num_pending_cases = 0
 
+    def get_random_minibatch(self):
+        """Return a random minibatch of cases of the given size used to train the ANET (i.e. actor). If the batch size
+        is larger than the buffer, a batch with as many cases as the buffer is returned. The cases are drawn with
+        replacement from the sum tree, and the minibatch is the stacked arrays (states with player indicator,
+        distributions, outcomes) with one row per case"""
+        if self.store is not None:
+            self.refresh()  # Another process may have appended cases to the store
+        batch_size = min(len(self), self.minibatch_size)
+        offset = 0
+        if self.sampling == "recency" and len(self) > 1:
+            offset = self.insertion_numbers[self.get_oldest_slot()]  # The oldest case gets weight 0 and the newest len - 1, as np.linspace(0, 1, len) weights (with gaps for the insertion numbers of merged cases)
+        self.last_slots = self.sum_tree.sample(batch_size, offset)
+        if self.store is not None:
+            indexes = self.last_slots + self.max_size * ((self.num_added - 1 - self.last_slots) // self.max_size)  # The newest case of the store in each slot
+            return self.store.states[indexes], self.store.distributions[indexes], self.store.outcomes[indexes]
+        return self.states[self.last_slots], self.distributions[self.last_slots], self.outcomes[self.last_slots]
 
+    def get_oldest_slot(self):
+        """ Returns the slot of the case with the smallest insertion number, which is the next case to be replaced"""
+        if self.dedup:
+            return self.slot_list.get_first()
+        return self.num_added % self.max_size if self.num_added >= self.max_size else 0
 
+    def update_priorities(self, errors):
+        """ Sets the priorities of the cases of the last minibatch to their given errors with priority sampling, so the
+        cases that the ANET predicts worst are trained on more often"""
+        if self.sampling != "priority":
+            return
+        slots, indexes = np.unique(self.last_slots, return_index=True)  # A case drawn more than once gets the error of its first draw
+        priorities = np.asarray(errors, dtype=np.float64)[indexes] + 1e-3  # Small constant, so no case is never sampled again
+        self.sum_tree.update(slots, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
@@ -0,0 +1,77 @@
+import os
+import numpy as np
+
+
+class ReplayStore:
+    """ Class for an on-disk replay store, where the cases (state with player indicator, distribution and outcome) are
+    appended to memory-mapped files in a directory, so the cases survive between training runs and after a crash, and
+    several processes can read them at the same time. The files are raw arrays that grow in chunks of chunk_size cases,
+    and a small header file keeps the number of committed cases and the widths of the arrays. The header is only
+    updated after the cases have been flushed, so a case below the committed number is never changed again: a crashed
+    writer leaves at most some uncommitted rows that are overwritten by the next append, and readers never see a case
+    that is half written. There must only be one writer at a time, while any number of processes can open the store
+    with readonly = True"""
+    def __init__(self, path, state_size=0, num_actions=0, readonly=False, chunk_size=4096):
+        self.path = path
+        self.readonly = readonly
+        self.chunk_size = chunk_size
+        header_path = os.path.join(path, "header.bin")
+        if not os.path.exists(header_path):
+            if readonly:
+                raise Exception("There is no replay store in " + path)
+            os.makedirs(path, exist_ok=True)
+            header = np.memmap(header_path, dtype=np.int64, mode="w+", shape=(3, ))
+            header[:] = [0, state_size, num_actions]
+            header.flush()
+        self.header = np.memmap(header_path, dtype=np.int64, mode="r" if readonly else "r+", shape=(3, ))  # [number of committed cases, state size, number of actions]
+        self.state_size = int(self.header[1])
+        self.num_actions = int(self.header[2])
+        self.capacity = 0
+        self.states = None  # Memory-mapped arrays with one row per case, where only the first len(self) rows are committed
+        self.distributions = None
+        self.outcomes = None
+        self.map_files(max(len(self), 1))
+
+    def __len__(self):
+        return int(self.header[0])  # Read from the mapped header, so cases committed by a writer in another process are seen
+
+    def map_files(self, num_cases):
+        """ Maps the files with room for at least num_cases cases. The writer grows the files by whole chunks, while a
+        reader maps the files as large as they are"""
+        if self.readonly:
+            capacity = os.path.getsize(os.path.join(self.path, "outcomes.bin")) // np.dtype(np.float32).itemsize
+        else:
+            capacity = max(-(-num_cases // self.chunk_size) * self.chunk_size, self.capacity)
+        mode = "r" if self.readonly else "r+"
+        arrays = []
+        for name, dtype, shape in [("states", np.int8, (capacity, self.state_size)), ("distributions", np.float32, (capacity, self.num_actions)), ("outcomes", np.float32, (capacity, ))]:
+            file_path = os.path.join(self.path, name + ".bin")
+            if not self.readonly:
+                with open(file_path, "ab") as file:
+                    file.truncate(int(np.prod(shape)) * np.dtype(dtype).itemsize)  # Extends the file with zeros, and never shrinks committed cases
+            arrays.append(np.memmap(file_path, dtype=dtype, mode=mode, shape=shape))
+        self.states, self.distributions, self.outcomes = arrays
+        self.capacity = capacity
+
+    def refresh(self):
+        """ Remaps the files of a reader if the writer has committed cases beyond the mapped part, and returns the number
+        of committed cases"""
+        num_cases = len(self)
+        if num_cases > self.capacity:
+            self.map_files(num_cases)
+        return num_cases
+
+    def append(self, states, distributions, outcomes):
+        """ Appends the given cases (arrays with one row per case) and commits them, first flushing the rows and then
+        the header with the new number of cases"""
+        start = len(self)
+        end = start + len(states)
+        if end > self.capacity:
+            self.map_files(end)
+        self.states[start:end] = states
+        self.distributions[start:end] = distributions
+        self.outcomes[start:end] = outcomes
+        for array in (self.states, self.distributions, self.outcomes):
+            array.flush()
+        self.header[0] = end
+        self.header.flush()
@@ -0,0 +1,101 @@
+import multiprocessing
+import random
+import numpy as np
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+
+_WORKER = {}  # The state manager, actor and MCTS settings of a worker process, made once by init_worker
+
+
+def init_worker(game_type, board_size, nn_dims, activation, value_head, prediction_cache_size, mcts_settings):
+    """ Makes the state manager and the actor used by all searches of a worker process. The actor is only used for
+    rollouts, so the training parameters of the network are not needed and its weights are given with each search"""
+    _WORKER["state_manager"] = StateManager(game_type, board_size)
+    _WORKER["actor"] = Actor(0.001, 0, 1, board_size, nn_dims, activation, "adam", "crossentropy", value_head=value_head, prediction_cache_size=prediction_cache_size)
+    _WORKER["mcts_settings"] = mcts_settings
+
+
+def run_worker_search(state, player, num_simulations, time_budget, weights, epsilon, seed):
+    """ Runs an independent MCTS from the given root in a worker process, and returns the counter of the root and the
+    cell index, counter and value of each child of the root"""
+    random.seed(seed)
+    np.random.seed(seed)
+    actor = _WORKER["actor"]
+    actor.set_weights(weights)  # Also clears the predictions of the previous weights
+    actor.set_epsilon(epsilon)
+    mcts = MonteCarloTreeSearch(actor, _WORKER["state_manager"], state, player, **_WORKER["mcts_settings"])
+    mcts.simulate(num_simulations, time_budget)
+    root = mcts.get_root()
+    size = _WORKER["state_manager"].size
+    child_statistics = [(row * size + col, child.get_counter(), child.get_value()) for child, ((row, col), _) in zip(root.get_child_nodes(), root.get_child_actions())]
+    return root.get_counter(), child_statistics
+
+
+class SearchPool:
+    """ Class for a pool of worker processes that perform root-parallel MCTS. Every worker searches the same root with
+    its own seed and its own tree, and the simulations of a move are split evenly between the workers. The workers are
+    started with spawn, since TensorFlow can not be used safely in a forked process"""
+    def __init__(self, num_workers, actor, game_type, board_size, **mcts_settings):
+        self.num_workers = num_workers
+        self.actor = actor  # The weights and epsilon of this actor are sent to the workers with each search
+        context = multiprocessing.get_context("spawn")
+        self.pool = context.Pool(num_workers, initializer=init_worker, initargs=(game_type, board_size, actor.anet.hidden_layers_dim, actor.anet.activation, actor.anet.value_head, actor.prediction_cache_size, mcts_settings))
+
+    def search(self, state, player, num_simulations, seed, time_budget=None):
+        """ Runs num_simulations simulations from the given root split over the workers, and returns the statistics of
+        each worker search (see run_worker_search). Every worker gets the whole time budget, since they run at the same time"""
+        weights = self.actor.anet.model.get_weights()
+        simulations_per_worker = [num_simulations // self.num_workers + (1 if i < num_simulations % self.num_workers else 0) for i in range(self.num_workers)]
+        tasks = [(state, player, simulations, time_budget, weights, self.actor.epsilon, seed + i) for i, simulations in enumerate(simulations_per_worker) if simulations > 0]
+        return self.pool.starmap(run_worker_search, tasks)
+
+    def close(self):
+        """ Stops the worker processes"""
+        self.pool.close()
+        self.pool.join()
+
+
+class RootParallelSearch(MonteCarloTreeSearch):
+    """ Class for performing root-parallel MCTS with a SearchPool, with the same interface as MonteCarloTreeSearch.
+    The local tree only holds the root and its children, where the counters of the worker searches are summed and the
+    values are averaged weighted by the counters. get_root_distribution and StateManager.select_action therefore use
+    the merged visit counts. The worker trees are not kept between moves, so a new root starts without statistics"""
+    def __init__(self, actor, state_manager, init_state, root_player, search_pool, seed=0):
+        super().__init__(actor, state_manager, init_state, root_player)
+        self.search_pool = search_pool
+        self.seed = seed  # Increased with each search, so that no two searches use the same seeds
+
+    def set_root(self, root):
+        """ Sets a new root without statistics for the state of the given node"""
+        self.num_nodes = 0
+        self.root = self.create_root(root.get_state(), root.get_player())
+
+    def simulate(self, num_simulations, time_budget=None):
+        """ Performs at most the given number of simulations from the root in the worker processes, merges the statistics and
+        returns the number of simulations performed. Each worker stops early on its own share of the budget"""
+        num_performed = 0
+        for root_counter, child_statistics in self.search_pool.search(self.root.get_state(), self.root.get_player(), num_simulations, self.seed, time_budget):
+            self.merge_statistics(root_counter, child_statistics)
+            num_performed += root_counter
+        self.seed += self.search_pool.num_workers
+        return num_performed
+
+    def merge_statistics(self, root_counter, child_statistics):
+        """ Adds the statistics of one worker search to the root and its children. A child is made the first time a
+        worker has visited its action"""
+        self.root.set_counter(self.root.get_counter() + root_counter)
+        children = {row * self.state_manager.size + col: child for child, ((row, col), _) in zip(self.root.get_child_nodes(), self.root.get_child_actions())}
+        for cell_index, counter, value in child_statistics:
+            child = children.get(cell_index)
+            if child is None:
+                action = [divmod(cell_index, self.state_manager.size), self.root.get_player()]
+                child_state = self.state_manager.get_next_state(self.root.get_state(), action)
+                child = self.create_node(child_state, action)
+                child.set_winner(self.state_manager.get_winner(child_state))
+                self.root.add_child(child, action)
+                self.add_to_tree_size(1)
+            merged_counter = child.get_counter() + counter
+            if merged_counter > 0:
+                child.update_value((child.get_value() * child.get_counter() + value * counter) / merged_counter)
+            child.set_counter(merged_counter)
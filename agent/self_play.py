@@ -0,0 +1,49 @@
+import random
+import numpy as np
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+
+
+def run_self_play_worker(worker_id, settings, case_queue, weights_path, weights_version, epsilon, stop_event):
+    """ Plays self-play episodes in a worker process until the stop event is set, and puts the cases of each episode on
+    the case queue together with the winner and the actions. The actor uses the NumPy forward pass, so the worker does
+    not import TensorFlow, and the weights published by the training process are loaded from weights_path (an exported
+    .npz file) whenever weights_version changes. Epsilon is read from the training process before each episode"""
+    random.seed(settings["seed"] + worker_id)
+    np.random.seed(settings["seed"] + worker_id)
+    board_size = settings["board_size"]
+    state_manager = StateManager(settings["game_type"], board_size)
+    actor = Actor(0.001, 0, 1, board_size, settings["nn_dims"], settings["activation"], "adam", "crossentropy", value_head=settings["value_head"], prediction_cache_size=settings["prediction_cache_size"], inference="numpy")
+    loaded_version = 0
+    while not stop_event.is_set():
+        if weights_version.value != loaded_version:
+            loaded_version = weights_version.value
+            actor.load(weights_path)  # Also clears the predictions of the previous weights
+        actor.set_epsilon(epsilon.value)
+        player = settings["starting_player"] if settings["starting_player"] != 0 else random.choice([1, 2])
+        cases, actions, winner = play_episode(actor, state_manager, player, settings["num_simulations"], settings["time_budget"], settings["mcts_settings"])
+        case_queue.put((worker_id, loaded_version, cases, actions, winner))
+
+
+def play_episode(actor, state_manager, player, num_simulations, time_budget, mcts_settings):
+    """ Plays one episode from the empty board with tree reuse, where each move is chosen from the root distribution of
+    an MCTS, and returns the cases (state with player indicator, D), the actions and the winner of the episode"""
+    state_manager.init_game()
+    state = state_manager.get_state()
+    mcts = MonteCarloTreeSearch(actor, state_manager, state, player, **mcts_settings)
+    cases = []
+    actions = []
+    while not state_manager.is_game_over(state):
+        mcts.simulate(num_simulations, time_budget)
+        D = mcts.get_root_distribution(mcts.get_root())
+        cases.append((state.with_player(player), D))
+        state_manager.reset_state(state)  # Avoid that any cell states are changed during leaf_node evaluation
+        chosen_child = state_manager.select_action(mcts.get_root(), player, D)
+        chosen_action = mcts.get_root().get_action_to(chosen_child)
+        actions.append(chosen_action)
+        state_manager.perform_action(chosen_action)
+        state = state_manager.get_state()
+        player = 1 if player == 2 else 2
+        mcts.set_root(chosen_child)
+    return cases, actions, state_manager.get_winner(state)
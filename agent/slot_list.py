@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class SlotList:
+    """ Class for keeping the filled slots of a buffer in the order they were last used, as a doubly linked list stored
+    in NumPy arrays (8 bytes per slot). A slot can be appended, removed and moved to the end in O(1), so the least
+    recently used slot (e.g. the case to replace in a replay buffer) is always the first slot of the list"""
+    def __init__(self, capacity):
+        self.next_slots = np.full(capacity, -1, dtype=np.int32)  # next_slots[slot] is the slot after the slot, or -1 for the last slot
+        self.previous_slots = np.full(capacity, -1, dtype=np.int32)  # previous_slots[slot] is the slot before the slot, or -1 for the first slot
+        self.first = -1
+        self.last = -1
+
+    def append(self, slot):
+        """ Adds the given slot, which must not be in the list, as the last slot"""
+        self.previous_slots[slot] = self.last
+        self.next_slots[slot] = -1
+        if self.last >= 0:
+            self.next_slots[self.last] = slot
+        else:
+            self.first = slot
+        self.last = slot
+
+    def remove(self, slot):
+        """ Removes the given slot from the list"""
+        previous_slot, next_slot = int(self.previous_slots[slot]), int(self.next_slots[slot])
+        if previous_slot >= 0:
+            self.next_slots[previous_slot] = next_slot
+        else:
+            self.first = next_slot
+        if next_slot >= 0:
+            self.previous_slots[next_slot] = previous_slot
+        else:
+            self.last = previous_slot
+
+    def move_to_end(self, slot):
+        """ Makes the given slot the last slot of the list"""
+        if slot != self.last:
+            self.remove(slot)
+            self.append(slot)
+
+    def get_first(self):
+        """ Returns the least recently used slot, or -1 if the list is empty"""
+        return self.first
+
+    def clear(self):
+        """ Removes all slots"""
+        self.first = -1
+        self.last = -1
@@ -0,0 +1,55 @@
+import numpy as np
+
+
+class SumTree:
+    """ Class for sampling the slots of a ring buffer with probability proportional to their weights in O(log n) time.
+    The tree is a complete binary tree stored in arrays, where node i has the children 2i and 2i + 1 and the leaves
+    are the nodes capacity, ..., 2 * capacity - 1. Each node keeps the sum of the weights and the number of filled
+    leaves below it, so the samples can also be drawn with the same offset subtracted from every weight (e.g. the
+    insertion number of the oldest case, which gives linear recency weights that never have to be rewritten)"""
+    def __init__(self, capacity):
+        self.capacity = 1 << max(capacity - 1, 0).bit_length()  # Rounded up to a power of two, so all leaves have the same depth
+        self.depth = self.capacity.bit_length() - 1
+        self.sums = np.zeros(2 * self.capacity, dtype=np.float64)
+        self.counts = np.zeros(2 * self.capacity, dtype=np.int64)
+
+    def update(self, slots, weights):
+        """ Sets the weights of the given slots (an array of distinct slot indexes), and updates the sums above them one
+        level at a time, so the cost is O(log n) NumPy operations for any number of slots"""
+        nodes = np.asarray(slots, dtype=np.int64) + self.capacity
+        self.sums[nodes] = weights
+        self.counts[nodes] = 1
+        if len(nodes) == 1:  # A single slot (e.g. a new case) is updated with scalar operations, which are faster than array operations on one element
+            node = int(nodes[0]) >> 1
+            while node > 0:
+                self.sums[node] = self.sums[2 * node] + self.sums[2 * node + 1]
+                self.counts[node] = self.counts[2 * node] + self.counts[2 * node + 1]
+                node >>= 1
+            return
+        for _ in range(self.depth):
+            nodes = np.unique(nodes >> 1)
+            self.sums[nodes] = self.sums[2 * nodes] + self.sums[2 * nodes + 1]
+            self.counts[nodes] = self.counts[2 * nodes] + self.counts[2 * nodes + 1]
+
+    def clear(self):
+        """ Removes all weights"""
+        self.sums[:] = 0
+        self.counts[:] = 0
+
+    def get_total(self, offset=0):
+        """ Returns the sum of the weights of the filled slots minus the given offset per filled slot"""
+        return self.sums[1] - offset * self.counts[1]
+
+    def sample(self, num_samples, offset=0, rng=np.random):
+        """ Returns num_samples slots drawn with replacement, with probability proportional to the weight of the slot minus
+        the given offset. All samples descend the tree at the same time, one level per NumPy operation"""
+        targets = rng.uniform(0, self.get_total(offset), size=num_samples)
+        nodes = np.ones(num_samples, dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_weights = self.sums[left] - offset * self.counts[left]
+            right_weights = self.sums[left + 1] - offset * self.counts[left + 1]
+            go_right = ((targets >= left_weights) & (right_weights > 0)) | (left_weights <= 0)  # Rounding can not lead to a subtree without weight
+            targets = np.where(go_right, targets - left_weights, targets)
+            nodes = left + go_right
+        return nodes - self.capacity
@@ -0,0 +1,72 @@
+import collections
+import random
+
+
+class TranspositionTable:
+    """ Class for sharing one node between identical positions that are reached by different orders of actions, which
+    turns the MCTS tree into a directed acyclic graph where the visit and value statistics of a position are shared.
+    Positions are identified by Zobrist hashing: each (cell, player) pair and each player to move has a random 64 bit
+    key, and the key of a position is the xor of the keys of its stones and the player to move. The key of a child is
+    found from the key of its parent with two xors, so no state has to be produced to look up a child.
+    The table is bounded by max_size, and the least recently used position is evicted when it is full. An evicted node
+    stays in the tree, it is just no longer shared with new parents"""
+    def __init__(self, board_size, max_size, seed=0):
+        rng = random.Random(seed)
+        self.size = board_size
+        self.max_size = max_size
+        self.cell_keys = [[0, rng.getrandbits(64), rng.getrandbits(64)] for _ in range(board_size ** 2)]  # cell_keys[index][player], empty cells (player 0) do not change the key
+        self.player_keys = [0, rng.getrandbits(64), rng.getrandbits(64)]  # player_keys[player to move]
+        self.nodes = collections.OrderedDict()  # key -> node, ordered from least to most recently used
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get_key(self, state, player):
+        """ Returns the Zobrist key of the given state when the given player is the player to move"""
+        key = self.player_keys[player]
+        for index in range(len(state)):
+            key ^= self.cell_keys[index][state[index]]
+        return key
+
+    def get_child_key(self, key, action):
+        """ Returns the key of the state produced by the given action = [cell_location, player] from the state with the
+        given key, by adding the key of the new stone and swapping the key of the player to move"""
+        (row, col), player = action[0], action[1]
+        next_player = 1 if player == 2 else 2
+        return key ^ self.cell_keys[row * self.size + col][player] ^ self.player_keys[player] ^ self.player_keys[next_player]
+
+    def get_node(self, key):
+        """ Returns the node stored for the given key and marks it as recently used, or None if the position is unknown"""
+        node = self.nodes.get(key)
+        if node is None:
+            self.misses += 1
+        else:
+            self.nodes.move_to_end(key)
+            self.hits += 1
+        return node
+
+    def add_node(self, key, node):
+        """ Stores the node for the given key, and evicts the least recently used node if the table is full"""
+        self.nodes[key] = node
+        if len(self.nodes) > self.max_size:
+            self.nodes.popitem(last=False)
+            self.evictions += 1
+
+    def retain(self, get_kept_node):
+        """ Keeps the stored nodes for which get_kept_node returns a node, which replaces the stored node, and removes the
+        others. Used when nodes are removed from the tree, or moved when the tree arrays are compacted. The order from
+        least to most recently used is kept"""
+        kept_nodes = collections.OrderedDict()
+        for key, node in self.nodes.items():
+            kept_node = get_kept_node(node)
+            if kept_node is not None:
+                kept_nodes[key] = kept_node
+        self.nodes = kept_nodes
+
+    def get_hit_rate(self):
+        """ Returns the share of lookups that found an existing node"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
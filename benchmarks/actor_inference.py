@@ -0,0 +1,49 @@
+""" Benchmark of the latency of Actor inference. The mean time of a single-state distribution, a single-state greedy
+action (target policy with is_top_policy = True) and a batch of BATCH_SIZE distributions is reported for random
+positions, after a warm up that traces the compiled forward pass. Run from the project root with: python -m benchmarks.actor_inference"""
+import random
+import time
+from config import train_config
+from agent.actor import Actor
+from environment.board_state import BoardState
+
+BOARD_SIZES = [4, 6]
+NUM_CALLS = 300
+BATCH_SIZE = 64
+
+
+def make_positions(board_size, num_positions, rng):
+    """ Returns random positions with the player to move, where about half of the cells are owned"""
+    positions = []
+    for _ in range(num_positions):
+        state = [rng.choice([0, 0, 1, 2]) for _ in range(board_size ** 2)]
+        state[rng.randrange(len(state))] = 0  # At least one legal action
+        positions.append((BoardState(state), rng.choice([1, 2])))
+    return positions
+
+
+def time_calls(function, arguments):
+    """ Returns the mean time in milliseconds of calling the function with each of the given arguments"""
+    start_time = time.perf_counter()
+    for argument in arguments:
+        function(*argument)
+    return 1000 * (time.perf_counter() - start_time) / len(arguments)
+
+
+def run_benchmark():
+    for board_size in BOARD_SIZES:
+        actor = Actor(train_config.learning_rate, 0, train_config.decay_rate, board_size, train_config.nn_dims,
+                      train_config.activation, train_config.optimizer, train_config.loss_function)
+        positions = make_positions(board_size, NUM_CALLS, random.Random(0))
+        batches = [([state for state, _ in positions[i:i + BATCH_SIZE]], [player for _, player in positions[i:i + BATCH_SIZE]]) for i in range(0, NUM_CALLS - BATCH_SIZE + 1, BATCH_SIZE)]
+        time_calls(actor.get_distribution, positions[:10])  # Warm up
+        time_calls(actor.get_distributions, batches[:1])
+        distribution_time = time_calls(actor.get_distribution, positions)
+        action_time = time_calls(lambda state, player: actor.target_policy(state, player, is_top_policy=True), positions)
+        batch_time = time_calls(actor.get_distributions, batches)
+        print("size {}x{}: single distribution {:.3f} ms, single greedy action {:.3f} ms, batch of {} distributions {:.3f} ms ({:.4f} ms per position)".format(
+            board_size, board_size, distribution_time, action_time, BATCH_SIZE, batch_time, batch_time / BATCH_SIZE))
+
+
+if __name__ == '__main__':
+    run_benchmark()
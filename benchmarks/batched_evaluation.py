@@ -0,0 +1,41 @@
+""" Benchmark comparing one-at-a-time leaf evaluation with batched leaf evaluation, where leaves are gathered with virtual
+loss and the rollouts of a batch share one ANET forward pass per rollout step. The ANET default policy is used
+(epsilon = 0), and the number of positions given to the ANET per second is reported for each leaf batch size. Run from
+the project root with: python -m benchmarks.batched_evaluation"""
+import time
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+from environment.board_state import BoardState
+
+BOARD_SIZE = 6
+NUM_SIMULATIONS = 64
+LEAF_BATCH_SIZES = [1, 8, 32, 64]
+
+
+def time_search(actor, state_manager, leaf_batch_size):
+    """ Returns the number of positions evaluated per second and the simulations per second of a search from the empty board"""
+    mcts = MonteCarloTreeSearch(actor, state_manager, BoardState.empty(BOARD_SIZE), 1, leaf_batch_size=leaf_batch_size)
+    actor.num_evaluated_positions = 0
+    start_time = time.perf_counter()
+    mcts.simulate(NUM_SIMULATIONS)
+    elapsed_time = time.perf_counter() - start_time
+    return actor.num_evaluated_positions / elapsed_time, NUM_SIMULATIONS / elapsed_time
+
+
+def run_benchmark():
+    state_manager = StateManager("HEX_BITBOARD", BOARD_SIZE)
+    actor = Actor(train_config.learning_rate, 0, train_config.decay_rate, BOARD_SIZE, train_config.nn_dims,
+                  train_config.activation, train_config.optimizer, train_config.loss_function)
+    time_search(actor, state_manager, 1)  # Warm up the ANET before timing
+    base_rate = None
+    for leaf_batch_size in LEAF_BATCH_SIZES:
+        position_rate, simulation_rate = time_search(actor, state_manager, leaf_batch_size)
+        base_rate = base_rate or position_rate
+        print("size {}x{}, leaf batch size {:3d}: {:9.1f} positions/s, {:7.1f} simulations/s ({:.1f}x)".format(
+            BOARD_SIZE, BOARD_SIZE, leaf_batch_size, position_rate, simulation_rate, position_rate / base_rate))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,55 @@
+""" Benchmark of the simulations saved by early stopping and a time budget per move. Self-play episodes are played with
+the random default policy, with a fixed simulation budget, with early stopping and with a time budget per move, and the
+simulations performed and saved per episode are reported. Run from the project root with: python -m benchmarks.early_stopping"""
+import random
+import time
+import numpy as np
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+
+BOARD_SIZE = 6
+NUM_SIMULATIONS = 500
+NUM_EPISODES = 3
+SETTINGS = {"fixed budget": (False, None), "early stopping": (True, None), "time budget 0.1 s": (False, 0.1), "early stopping + time budget": (True, 0.1)}
+
+
+def play_episode(actor, state_manager, early_stopping, time_budget):
+    """ Plays one self-play episode and returns the number of moves and the number of simulations performed"""
+    state_manager.init_game()
+    state = state_manager.get_state()
+    player = 1
+    mcts = MonteCarloTreeSearch(actor, state_manager, state, player, early_stopping=early_stopping)
+    num_moves, num_performed = 0, 0
+    while not state_manager.is_game_over(state):
+        num_performed += mcts.simulate(NUM_SIMULATIONS, time_budget)
+        D = mcts.get_root_distribution(mcts.get_root())
+        state_manager.reset_state(state)
+        chosen_child = state_manager.select_action(mcts.get_root(), player, D)
+        state_manager.perform_action(mcts.get_root().get_action_to(chosen_child))
+        state = state_manager.get_state()
+        player = 1 if player == 2 else 2
+        mcts.set_root(chosen_child)
+        num_moves += 1
+    return num_moves, num_performed
+
+
+def run_benchmark():
+    state_manager = StateManager("HEX_BITBOARD", BOARD_SIZE)
+    actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, BOARD_SIZE, train_config.nn_dims,
+                  train_config.activation, train_config.optimizer, train_config.loss_function)
+    for name, (early_stopping, time_budget) in SETTINGS.items():
+        random.seed(0)
+        np.random.seed(0)
+        start_time = time.perf_counter()
+        saved = []
+        for _ in range(NUM_EPISODES):
+            num_moves, num_performed = play_episode(actor, state_manager, early_stopping, time_budget)
+            saved.append(num_moves * NUM_SIMULATIONS - num_performed)
+        print("size {}x{}, {:30s}: {:6.2f} s per episode, simulations saved per episode: {}".format(
+            BOARD_SIZE, BOARD_SIZE, name, (time.perf_counter() - start_time) / NUM_EPISODES, saved))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,89 @@
+""" Benchmark of the exact endgame solver in late-episode searches. Random 6x6 positions without a winner are made with
+a given number of empty cells, and NUM_SEARCHES searches of at most NUM_SIMULATIONS simulations are run from each with
+different seeds, using rollouts only and using the endgame solver for the leaves with at most ENDGAME_EMPTY_CELLS empty
+cells (with the MCTS-Solver on in both, so a search stops when its root is proven). The time and simulations per search and the
+variance of the root distribution between the searches of a position (averaged over the cells) are reported. Full
+self-play episodes with both solvers are also played on small boards as a check, since a root proven before its
+children are made must still give a distribution to choose the actual action from. Run from the project root with:
+python -m benchmarks.endgame_solver"""
+import random
+import time
+import numpy as np
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from agent.self_play import play_episode
+from environment.state_manager import StateManager
+from environment.board_state import BoardState
+
+BOARD_SIZE = 6
+NUM_SIMULATIONS = 500
+NUM_POSITIONS = 5
+NUM_SEARCHES = 5
+EMPTY_CELLS = [10, 12, 14]
+ENDGAME_EMPTY_CELLS = 10
+EPISODE_SETTINGS = [(4, 6, 5), (4, 6, 50), (5, 8, 50)]  # (board size, endgame_empty_cells, simulations per move) of the full episodes
+NUM_EPISODES = 20
+
+
+def make_position(state_manager, num_empty_cells, rng):
+    """ Returns a random position without a winner with the given number of empty cells, and the player to move"""
+    num_cells = BOARD_SIZE ** 2
+    while True:
+        cells = rng.sample(range(num_cells), num_cells - num_empty_cells)
+        state = [0] * num_cells
+        for i, index in enumerate(cells):
+            state[index] = 1 if i % 2 == 0 else 2  # Player 1 starts, so the players own the same number of cells or player 1 owns one more
+        state = BoardState(state)
+        if state_manager.get_winner(state) == 0:
+            return state, 1 if len(cells) % 2 == 0 else 2
+
+
+def run_benchmark():
+    state_manager = StateManager("HEX_BITBOARD", BOARD_SIZE)
+    actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, BOARD_SIZE, train_config.nn_dims,
+                  train_config.activation, train_config.optimizer, train_config.loss_function)
+    for num_empty_cells in EMPTY_CELLS:
+        positions = [make_position(state_manager, num_empty_cells, random.Random(seed)) for seed in range(NUM_POSITIONS)]
+        results = {}
+        for endgame_empty_cells in [0, ENDGAME_EMPTY_CELLS]:
+            elapsed_time, num_performed, variances = 0, 0, []
+            for state, player in positions:
+                distributions = []
+                for seed in range(NUM_SEARCHES):
+                    random.seed(seed)
+                    np.random.seed(seed)
+                    start_time = time.perf_counter()
+                    mcts = MonteCarloTreeSearch(actor, state_manager, state, player, solver=True, endgame_empty_cells=endgame_empty_cells)
+                    num_performed += mcts.simulate(NUM_SIMULATIONS)
+                    elapsed_time += time.perf_counter() - start_time
+                    distributions.append(mcts.get_root_distribution(mcts.get_root()))
+                variances.append(np.mean(np.var(distributions, axis=0)))
+            num_searches = NUM_POSITIONS * NUM_SEARCHES
+            results[endgame_empty_cells] = (elapsed_time / num_searches, num_performed / num_searches, np.mean(variances))
+        print("size {}x{}, {:2d} empty cells: rollouts {:.3f} s and {:5.1f} simulations per search, variance of D {:.2e}; endgame solver (<= {} empty cells) {:.3f} s and {:5.1f} simulations per search, variance of D {:.2e}".format(
+            BOARD_SIZE, BOARD_SIZE, num_empty_cells, *results[0], ENDGAME_EMPTY_CELLS, *results[ENDGAME_EMPTY_CELLS]))
+    for board_size, endgame_empty_cells, num_simulations in EPISODE_SETTINGS:
+        print("size {}x{}, {} full episodes of {} simulations per move with the endgame solver (<= {} empty cells): {:.3f} s per episode".format(
+            board_size, board_size, NUM_EPISODES, num_simulations, endgame_empty_cells, play_episodes(board_size, endgame_empty_cells, num_simulations)))
+
+
+def play_episodes(board_size, endgame_empty_cells, num_simulations):
+    """ Plays NUM_EPISODES full episodes with the MCTS-Solver and the endgame solver, and returns the mean time per
+    episode. Raises an exception if a root distribution is not a probability distribution"""
+    state_manager = StateManager("HEX_BITBOARD", board_size)
+    actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, board_size, train_config.nn_dims,
+                  train_config.activation, train_config.optimizer, train_config.loss_function)
+    start_time = time.perf_counter()
+    for seed in range(NUM_EPISODES):
+        random.seed(seed)
+        np.random.seed(seed)
+        cases, _, _ = play_episode(actor, state_manager, 1, num_simulations, None, {"solver": True, "endgame_empty_cells": endgame_empty_cells})
+        for _, D in cases:
+            if not np.all(np.isfinite(D)) or not np.isclose(np.sum(D), 1):
+                raise Exception("Root distribution that is not a probability distribution in episode " + str(seed) + ": " + str(D))
+    return (time.perf_counter() - start_time) / NUM_EPISODES
+
+
+if __name__ == '__main__':
+    run_benchmark()
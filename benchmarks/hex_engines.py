@@ -0,0 +1,61 @@
+""" Benchmark comparing the Cell based Hex engine (HEX) with the bitboard engine (HEX_BITBOARD). Each engine plays the
+same random games through the StateManager, and every position is handled the way MCTS handles it: the game over check,
+generation of all child nodes and the transition to the next state. Run from the project root with:
+python -m benchmarks.hex_engines"""
+import random
+import time
+from environment.state_manager import StateManager
+
+BOARD_SIZES = [4, 6, 11]
+NUM_GAMES = 20
+
+
+def make_games(board_size, num_games, seed=0):
+    """ Returns random move orders (i.e. lists of cell locations) so that both engines play identical games"""
+    rng = random.Random(seed)
+    games = []
+    for _ in range(num_games):
+        locations = [(row, col) for row in range(board_size) for col in range(board_size)]
+        rng.shuffle(locations)
+        games.append(locations)
+    return games
+
+
+def play_games(state_manager, games):
+    """ Plays the given games until a winning state is reached and returns the number of state transitions and the winners"""
+    transitions = 0
+    winners = []
+    for locations in games:
+        state_manager.init_game()
+        state = state_manager.get_state()
+        player = 1
+        for location in locations:
+            if state_manager.is_game_over(state):
+                break
+            state_manager.get_child_nodes(state, player)
+            state = state_manager.get_next_state(state, [location, player])
+            transitions += 1
+            player = 1 if player == 2 else 2
+        winners.append(1 if player == 2 else 2)  # The previous player made the winning move
+    return transitions, winners
+
+
+def run_benchmark():
+    for board_size in BOARD_SIZES:
+        games = make_games(board_size, NUM_GAMES)
+        results = {}
+        for game_type in ["HEX", "HEX_BITBOARD"]:
+            state_manager = StateManager(game_type, board_size)
+            start_time = time.perf_counter()
+            transitions, winners = play_games(state_manager, games)
+            elapsed = time.perf_counter() - start_time
+            results[game_type] = (transitions, winners, elapsed)
+            print("size {}x{}, {:<12}: {:6d} transitions in {:7.3f} s ({:9.1f} transitions/s)".format(
+                board_size, board_size, game_type, transitions, elapsed, transitions / elapsed))
+        if results["HEX"][1] != results["HEX_BITBOARD"][1]:
+            raise Exception("The engines disagree on the winner of the benchmark games")
+        print("size {}x{}, speedup: {:.1f}x".format(board_size, board_size, results["HEX"][2] / results["HEX_BITBOARD"][2]))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,59 @@
+""" Benchmark comparing eager node expansion, where the child nodes and states of every legal action are made when a
+leaf is expanded, with the lazy expansion used by MonteCarloTreeSearch, where a child is made when the tree policy first
+chooses it. The search starts from the empty board, where the branching factor is largest, and uses fill rollouts with
+a random policy. It reports time per simulation and memory. Run from the project root with:
+python -m benchmarks.lazy_expansion"""
+import random
+import time
+import tracemalloc
+import numpy as np
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+from environment.board_state import BoardState
+
+BOARD_SIZES = [6, 11]
+NUM_SIMULATIONS = 2000
+
+
+class EagerMonteCarloTreeSearch(MonteCarloTreeSearch):
+    """ MCTS where every child node of a leaf is made during node expansion (the previous behaviour)"""
+    def leaf_node_expansion(self, leaf_node):
+        super().leaf_node_expansion(leaf_node)
+        for child_num in range(leaf_node.get_child_count()):
+            self.create_child(leaf_node, child_num)
+
+
+def run_search(search_class, actor, state_manager, board_size, tree_backend):
+    """ Runs the search and returns the time per simulation and the memory used by the search"""
+    random.seed(0)
+    np.random.seed(0)
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    start_time = time.perf_counter()
+    mcts = search_class(actor, state_manager, BoardState.empty(board_size), 1, rollout_mode="fill", tree_backend=tree_backend)
+    for _ in range(NUM_SIMULATIONS):
+        leaf_node = mcts.tree_search()
+        mcts.leaf_node_expansion(leaf_node)
+        mcts.backpropagation(leaf_node, mcts.leaf_evaluation(leaf_node))
+    elapsed = time.perf_counter() - start_time
+    memory = tracemalloc.get_traced_memory()[0] - start_memory
+    tracemalloc.stop()
+    return elapsed / NUM_SIMULATIONS, memory
+
+
+def run_benchmark():
+    for board_size in BOARD_SIZES:
+        state_manager = StateManager("HEX_BITBOARD", board_size)
+        actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, board_size, train_config.nn_dims,
+                      train_config.activation, train_config.optimizer, train_config.loss_function)
+        for tree_backend in ["object", "array"]:
+            for name, search_class in [("eager", EagerMonteCarloTreeSearch), ("lazy", MonteCarloTreeSearch)]:
+                time_per_simulation, memory = run_search(search_class, actor, state_manager, board_size, tree_backend)
+                print("size {}x{}, {:<6} backend, {:<5} expansion: {:7.1f} us/simulation, {:7.2f} MB".format(
+                    board_size, board_size, tree_backend, name, time_per_simulation * 1e6, memory / 1e6))
+
+
+if __name__ == '__main__':
+    run_benchmark()
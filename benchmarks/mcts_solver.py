@@ -0,0 +1,55 @@
+""" Benchmark of the simulations saved by the MCTS-Solver in late-game positions. Random 6x6 positions without a winner
+are made with a given number of empty cells, and a search of at most NUM_SIMULATIONS simulations is run from each with
+and without the solver, using the random default policy. The search with the solver stops when the root is proven.
+Run from the project root with: python -m benchmarks.mcts_solver"""
+import random
+import time
+import numpy as np
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+from environment.board_state import BoardState
+
+BOARD_SIZE = 6
+NUM_SIMULATIONS = 500
+NUM_POSITIONS = 10
+EMPTY_CELLS = [6, 10, 14]
+
+
+def make_position(state_manager, num_empty_cells, rng):
+    """ Returns a random position without a winner with the given number of empty cells, and the player to move"""
+    num_cells = BOARD_SIZE ** 2
+    while True:
+        cells = rng.sample(range(num_cells), num_cells - num_empty_cells)
+        state = [0] * num_cells
+        for i, index in enumerate(cells):
+            state[index] = 1 if i % 2 == 0 else 2  # Player 1 starts, so the players own the same number of cells or player 1 owns one more
+        state = BoardState(state)
+        if state_manager.get_winner(state) == 0:
+            return state, 1 if len(cells) % 2 == 0 else 2
+
+
+def run_benchmark():
+    state_manager = StateManager("HEX_BITBOARD", BOARD_SIZE)
+    actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, BOARD_SIZE, train_config.nn_dims,
+                  train_config.activation, train_config.optimizer, train_config.loss_function)
+    for num_empty_cells in EMPTY_CELLS:
+        positions = [make_position(state_manager, num_empty_cells, random.Random(seed)) for seed in range(NUM_POSITIONS)]
+        results = {}
+        for solver in [False, True]:
+            random.seed(0)
+            np.random.seed(0)
+            num_performed, num_proven = 0, 0
+            start_time = time.perf_counter()
+            for state, player in positions:
+                mcts = MonteCarloTreeSearch(actor, state_manager, state, player, solver=solver)
+                num_performed += mcts.simulate(NUM_SIMULATIONS)
+                num_proven += mcts.get_root().get_proven_winner() != 0
+            results[solver] = (num_performed / NUM_POSITIONS, (time.perf_counter() - start_time) / NUM_POSITIONS, num_proven)
+        print("size {}x{}, {:2d} empty cells: {:6.1f} simulations ({:.3f} s) per position without solver, {:6.1f} simulations ({:.3f} s) with solver, {}/{} roots proven".format(
+            BOARD_SIZE, BOARD_SIZE, num_empty_cells, results[False][0], results[False][1], results[True][0], results[True][1], results[True][2], NUM_POSITIONS))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,56 @@
+""" Benchmark of the training of the Actor on a minibatch from the replay buffer. Random cases (state with player
+indicator, target distribution and outcome) fill a replay buffer, and the time of Actor.train on a minibatch of
+MINIBATCH_SIZE cases is compared with the previous training, where model.fit was called once for every case. Run from
+the project root with: python -m benchmarks.minibatch_training"""
+import random
+import time
+import numpy as np
+from config import train_config
+from agent.actor import Actor
+from agent.replay_buffer import ReplayBuffer
+from benchmarks.actor_inference import make_positions
+
+BOARD_SIZE = 6
+MINIBATCH_SIZE = 256
+NUM_REPEATS = 3
+SETTINGS = [(1, 32), (1, 64), (4, 32)]  # (train_epochs, train_batch_size)
+
+
+def make_minibatch(rng):
+    """ Returns a minibatch from a replay buffer filled with random cases"""
+    replay_buffer = ReplayBuffer(minibatch_size=MINIBATCH_SIZE)
+    for state, player in make_positions(BOARD_SIZE, replay_buffer.max_size, rng):
+        distribution = np.random.default_rng(rng.randrange(2 ** 32)).dirichlet(np.ones(BOARD_SIZE ** 2)) * (state.to_array() == 0)
+        replay_buffer.add_state_case(state.with_player(player), distribution / distribution.sum())
+        replay_buffer.add_outcome(rng.choice([1, 2]))
+    return replay_buffer.get_random_minibatch()
+
+
+def train_per_case(actor, minibatch):
+    """ The previous training, with one call of model.fit per case"""
+    states, distributions, _ = minibatch
+    x_train = states.astype(np.float32)
+    for i in range(len(x_train)):
+        actor.anet.model.fit(x_train[i:i + 1], distributions[i:i + 1], epochs=1, batch_size=32, verbose=False, callbacks=[])
+
+
+def time_training(train, actor, minibatch):
+    """ Returns the mean time in seconds of training the actor on the minibatch, after one warm up"""
+    train(actor, minibatch)
+    start_time = time.perf_counter()
+    for _ in range(NUM_REPEATS):
+        train(actor, minibatch)
+    return (time.perf_counter() - start_time) / NUM_REPEATS
+
+
+def run_benchmark():
+    minibatch = make_minibatch(random.Random(0))
+    actor = Actor(train_config.learning_rate, 0, 1, BOARD_SIZE, train_config.nn_dims, train_config.activation, train_config.optimizer, train_config.loss_function)
+    print("size {}x{}, minibatch of {} cases, one fit per case: {:.3f} s".format(BOARD_SIZE, BOARD_SIZE, len(minibatch[0]), time_training(train_per_case, actor, minibatch)))
+    for train_epochs, train_batch_size in SETTINGS:
+        actor = Actor(train_config.learning_rate, 0, 1, BOARD_SIZE, train_config.nn_dims, train_config.activation, train_config.optimizer, train_config.loss_function, train_epochs=train_epochs, train_batch_size=train_batch_size)
+        print("size {}x{}, minibatch of {} cases, {} epochs of batch size {}: {:.3f} s".format(BOARD_SIZE, BOARD_SIZE, len(minibatch[0]), train_epochs, train_batch_size, time_training(lambda actor, minibatch: actor.train(minibatch), actor, minibatch)))
+
+
+if __name__ == '__main__':
+    run_benchmark()
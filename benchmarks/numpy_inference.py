@@ -0,0 +1,61 @@
+""" Benchmark of the NumPy forward pass against the compiled Keras forward pass of the Actor. A Keras ANET with random
+weights is exported to a temporary .npz file, and for each engine the startup time of a play-only process (a new Python
+process that imports the Actor, makes it and loads the weights) and the mean latency of a greedy move (target policy
+with is_top_policy = True) and of a batch of BATCH_SIZE distributions are reported. Run from the project root with:
+python -m benchmarks.numpy_inference"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from config import train_config, oht_config
+from agent.actor import Actor
+from benchmarks.actor_inference import make_positions, time_calls
+
+BOARD_SIZE = 6
+NN_DIMS = {"train": (train_config.nn_dims, train_config.activation), "oht": (oht_config.nn_dims, oht_config.activation)}
+NUM_CALLS = 300
+BATCH_SIZE = 64
+NUM_STARTUPS = 3
+STARTUP_CODE = """from agent.actor import Actor
+actor = Actor({learning_rate}, 0, 1, {board_size}, {nn_dims}, {activation}, "adam", "mean-squared-error", inference="{inference}")
+actor.load("{path}")
+"""
+
+
+def time_startup(inference, nn_dims, activation, path):
+    """ Returns the mean wall time in seconds of a new Python process that makes an Actor with the given inference engine
+    and loads the model saved in the given path"""
+    code = STARTUP_CODE.format(learning_rate=train_config.learning_rate, board_size=BOARD_SIZE, nn_dims=nn_dims, activation=activation, inference=inference, path=path)
+    environment = dict(os.environ, PYTHONPATH=os.path.abspath(os.curdir), TF_CPP_MIN_LOG_LEVEL="3")
+    start_time = time.perf_counter()
+    for _ in range(NUM_STARTUPS):
+        subprocess.run([sys.executable, "-c", code], env=environment, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start_time) / NUM_STARTUPS
+
+
+def run_benchmark():
+    positions = make_positions(BOARD_SIZE, NUM_CALLS, random.Random(0))
+    batches = [([state for state, _ in positions[i:i + BATCH_SIZE]], [player for _, player in positions[i:i + BATCH_SIZE]]) for i in range(0, NUM_CALLS - BATCH_SIZE + 1, BATCH_SIZE)]
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (nn_dims, activation) in NN_DIMS.items():
+            path = os.path.join(directory, "ANET_" + name + ".weights.h5")
+            keras_actor = Actor(train_config.learning_rate, 0, 1, BOARD_SIZE, nn_dims, activation, train_config.optimizer, train_config.loss_function)
+            keras_actor.anet.save(path)
+            numpy_actor = Actor(train_config.learning_rate, 0, 1, BOARD_SIZE, nn_dims, activation, train_config.optimizer, train_config.loss_function, inference="numpy")
+            numpy_actor.load(path)
+            difference = np.max(np.abs(keras_actor.get_distributions(*batches[0]) - numpy_actor.get_distributions(*batches[0])))
+            for inference, actor in [("keras", keras_actor), ("numpy", numpy_actor)]:
+                startup_time = time_startup(inference, nn_dims, activation, path)
+                time_calls(actor.get_distribution, positions[:10])  # Warm up
+                time_calls(actor.get_distributions, batches[:1])
+                action_time = time_calls(lambda state, player: actor.target_policy(state, player, is_top_policy=True), positions)
+                batch_time = time_calls(actor.get_distributions, batches)
+                print("size {}x{}, nn_dims {}, {:5s}: startup {:.2f} s, greedy move {:.3f} ms, batch of {} distributions {:.3f} ms (max difference to keras {:.1e})".format(
+                    BOARD_SIZE, BOARD_SIZE, nn_dims, inference, startup_time, action_time, BATCH_SIZE, batch_time, difference))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,54 @@
+""" Benchmark of the prediction cache of the Actor in searches with ANET rollouts (epsilon = 0). A self-play episode with
+tree reuse is played with and without the cache for each board size, and the time, the number of positions given to the
+ANET and the cache statistics are reported. The weights do not change during an episode, so the cache is never cleared.
+Run from the project root with: python -m benchmarks.prediction_cache"""
+import random
+import time
+import numpy as np
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+
+BOARD_SIZES = [4, 6]
+NUM_SIMULATIONS = 100
+PREDICTION_CACHE_SIZE = 100000
+
+
+def play_episode(actor, state_manager):
+    """ Plays one self-play episode with tree reuse and returns the time it took"""
+    state_manager.init_game()
+    state = state_manager.get_state()
+    player = 1
+    mcts = MonteCarloTreeSearch(actor, state_manager, state, player)
+    start_time = time.perf_counter()
+    while not state_manager.is_game_over(state):
+        mcts.simulate(NUM_SIMULATIONS)
+        D = mcts.get_root_distribution(mcts.get_root())
+        state_manager.reset_state(state)
+        chosen_child = state_manager.select_action(mcts.get_root(), player, D)
+        state_manager.perform_action(mcts.get_root().get_action_to(chosen_child))
+        state = state_manager.get_state()
+        player = 1 if player == 2 else 2
+        mcts.set_root(chosen_child)
+    return time.perf_counter() - start_time
+
+
+def run_benchmark():
+    for board_size in BOARD_SIZES:
+        state_manager = StateManager("HEX_BITBOARD", board_size)
+        for prediction_cache_size in [0, PREDICTION_CACHE_SIZE]:
+            random.seed(0)
+            np.random.seed(0)
+            actor = Actor(train_config.learning_rate, 0, train_config.decay_rate, board_size, train_config.nn_dims,
+                          train_config.activation, train_config.optimizer, train_config.loss_function, prediction_cache_size=prediction_cache_size)
+            actor.get_distribution(state_manager.get_state(), 1)  # Warm up the compiled forward pass
+            actor.clear_prediction_cache()
+            actor.num_evaluated_positions, actor.cache_hits, actor.cache_misses = 0, 0, 0
+            elapsed_time = play_episode(actor, state_manager)
+            print("size {}x{}, cache size {:6d}: {:6.2f} s per episode, {:6d} positions given to the ANET, hits {:6d}, misses {:6d}, evictions {}, hit rate {:.3f}".format(
+                board_size, board_size, prediction_cache_size, elapsed_time, actor.num_evaluated_positions, actor.cache_hits, actor.cache_misses, actor.cache_evictions, actor.get_cache_hit_rate()))
+
+
+if __name__ == '__main__':
+    run_benchmark()
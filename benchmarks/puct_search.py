@@ -0,0 +1,57 @@
+""" Benchmark comparing the number of ANET forward passes per simulation of UCT with ANET rollouts (epsilon = 0) and
+PUCT with a policy+value ANET, where the value head replaces the rollout. Both searches start from the empty board.
+A few episodes of GameAgent training with PUCT are also run on each board size, starting from the warm start weights
+of the train config (which are skipped when they do not fit the ANET). The visualizer and the saving of models are
+replaced, so nothing is drawn or written. Run from the project root with: python -m benchmarks.puct_search"""
+import time
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from agent.replay_buffer import ReplayBuffer
+from environment.state_manager import StateManager
+from environment.board_state import BoardState
+from game_agent import GameAgent
+
+BOARD_SIZES = [6, 11]
+NUM_SIMULATIONS = 50
+NUM_EPISODES = 3
+
+
+class SilentVisualizer:
+    """ Visualizer that never draws"""
+    def get_interval(self):
+        return NUM_EPISODES + 1
+
+    def visualize(self, actions, episode):
+        pass
+
+
+def train_puct(board_size):
+    """ Runs NUM_EPISODES episodes of GameAgent training with PUCT and a value head, and returns the time per episode"""
+    state_manager = StateManager("HEX_BITBOARD", board_size)
+    actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, board_size, train_config.nn_dims, train_config.activation,
+                  train_config.optimizer, train_config.loss_function, value_head=True)
+    actor.save = lambda episode, dir_num: None
+    game_agent = GameAgent(actor, NUM_EPISODES + 1, state_manager, SilentVisualizer(), ReplayBuffer(), 1, NUM_EPISODES, NUM_SIMULATIONS, selection="puct", warm_start_path=train_config.warm_start_path)
+    start_time = time.perf_counter()
+    game_agent.run()
+    return (time.perf_counter() - start_time) / NUM_EPISODES
+
+
+def run_benchmark():
+    for board_size in BOARD_SIZES:
+        state_manager = StateManager("HEX_BITBOARD", board_size)
+        for selection in ["uct", "puct"]:
+            actor = Actor(train_config.learning_rate, 0, train_config.decay_rate, board_size, train_config.nn_dims, train_config.activation,
+                          train_config.optimizer, train_config.loss_function, value_head=selection == "puct")
+            mcts = MonteCarloTreeSearch(actor, state_manager, BoardState.empty(board_size), 1, selection=selection)
+            start_time = time.perf_counter()
+            mcts.simulate(NUM_SIMULATIONS)
+            elapsed_time = time.perf_counter() - start_time
+            print("size {}x{}, {:4s}: {:5.1f} ANET calls per simulation, {:7.1f} simulations/s".format(
+                board_size, board_size, selection, actor.num_evaluated_positions / NUM_SIMULATIONS, NUM_SIMULATIONS / elapsed_time))
+        print("size {}x{}, puct: GameAgent training {:.3f} s per episode".format(board_size, board_size, train_puct(board_size)))
+
+
+if __name__ == '__main__':
+    run_benchmark()
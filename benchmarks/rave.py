@@ -0,0 +1,71 @@
+""" Benchmark of the playing strength of RAVE at fewer simulations per move. Games are played between a search with a
+given number of simulations per move and a plain UCT search with REFERENCE_SIMULATIONS simulations per move, both using
+the random default policy. The players take turns in starting, and each move is the most visited action of the root.
+The win rate of plain UCT at the same reduced number of simulations is reported as a baseline.
+Run from the project root with: python -m benchmarks.rave"""
+import random
+import time
+import numpy as np
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+
+BOARD_SIZE = 6
+REFERENCE_SIMULATIONS = 500
+NUM_SIMULATIONS = [50, 100, 200]
+NUM_GAMES = 20
+RAVE_K = 250
+
+
+def choose_action(actor, state_manager, state, player, num_simulations, rave_k):
+    """ Returns the most visited action of a search from the given state"""
+    mcts = MonteCarloTreeSearch(actor, state_manager, state, player, rave_k=rave_k)
+    mcts.simulate(num_simulations)
+    D = mcts.get_root_distribution(mcts.get_root())
+    cell_index = int(np.argmax(D))
+    return [divmod(cell_index, BOARD_SIZE), player]
+
+
+def play_game(actor, state_manager, searches):
+    """ Plays one game where searches[player] = (number of simulations, RAVE k) is the search of each player, and
+    returns the winner"""
+    state_manager.init_game()
+    state = state_manager.get_state()
+    player = 1
+    while not state_manager.is_game_over(state):
+        num_simulations, rave_k = searches[player]
+        action = choose_action(actor, state_manager, state, player, num_simulations, rave_k)
+        state_manager.reset_state(state)
+        state_manager.perform_action(action)
+        state = state_manager.get_state()
+        player = 1 if player == 2 else 2
+    return state_manager.get_winner(state)
+
+
+def win_rate(actor, state_manager, num_simulations, rave_k):
+    """ Returns the share of games won by the given search against plain UCT with REFERENCE_SIMULATIONS simulations"""
+    random.seed(0)
+    np.random.seed(0)
+    num_wins = 0
+    for game in range(NUM_GAMES):
+        player = 1 if game % 2 == 0 else 2
+        searches = {player: (num_simulations, rave_k), 3 - player: (REFERENCE_SIMULATIONS, 0)}
+        num_wins += play_game(actor, state_manager, searches) == player
+    return num_wins / NUM_GAMES
+
+
+def run_benchmark():
+    state_manager = StateManager("HEX_BITBOARD", BOARD_SIZE)
+    actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, BOARD_SIZE, train_config.nn_dims,
+                  train_config.activation, train_config.optimizer, train_config.loss_function)
+    for num_simulations in NUM_SIMULATIONS:
+        start_time = time.perf_counter()
+        uct_win_rate = win_rate(actor, state_manager, num_simulations, 0)
+        rave_win_rate = win_rate(actor, state_manager, num_simulations, RAVE_K)
+        print("size {}x{}, {:3d} simulations against UCT with {}: UCT wins {:.2f}, RAVE (k = {}) wins {:.2f} of {} games ({:.1f} s)".format(
+            BOARD_SIZE, BOARD_SIZE, num_simulations, REFERENCE_SIMULATIONS, uct_win_rate, RAVE_K, rave_win_rate, NUM_GAMES, time.perf_counter() - start_time))
+
+
+if __name__ == '__main__':
+    run_benchmark()
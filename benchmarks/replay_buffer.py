@@ -0,0 +1,65 @@
+""" Benchmark of the replay buffer for growing max sizes. The buffer is filled with random 6x6 cases, and the mean time
+of adding a case and of sampling a minibatch is compared with the previous replay buffer, a deque of (state, D) tuples
+where every minibatch recomputed np.linspace weights over the whole buffer and sampled them with random.choices.
+Run from the project root with: python -m benchmarks.replay_buffer"""
+import collections
+import random
+import time
+import numpy as np
+from agent.replay_buffer import ReplayBuffer
+
+BOARD_SIZE = 6
+MAX_SIZES = [750, 100000, 1000000]
+NUM_MINIBATCHES = 20
+
+
+def fill_deque(max_size, player_states, distributions):
+    """ Returns the previous replay buffer filled with max_size cases, and the mean time in seconds of adding a case"""
+    buffer = collections.deque()
+    start_time = time.perf_counter()
+    for i in range(max_size):
+        buffer.append((player_states[i % len(player_states)], distributions[i % len(distributions)]))
+        if len(buffer) > max_size:
+            buffer.popleft()
+    return buffer, (time.perf_counter() - start_time) / max_size
+
+
+def sample_deque(buffer):
+    """ The previous minibatch sampling"""
+    weights = np.linspace(0.0, 1.0, len(buffer))
+    return random.choices(population=buffer, weights=weights, k=min(len(buffer), 256))
+
+
+def fill_ring_buffer(max_size, player_states, distributions):
+    """ Returns a ring replay buffer filled with max_size cases, and the mean time in seconds of adding a case"""
+    replay_buffer = ReplayBuffer(max_size)
+    start_time = time.perf_counter()
+    for i in range(max_size):
+        replay_buffer.add_state_case(player_states[i % len(player_states)], distributions[i % len(distributions)])
+    return replay_buffer, (time.perf_counter() - start_time) / max_size
+
+
+def time_sampling(sample):
+    """ Returns the mean time in milliseconds of sampling a minibatch"""
+    start_time = time.perf_counter()
+    for _ in range(NUM_MINIBATCHES):
+        sample()
+    return 1000 * (time.perf_counter() - start_time) / NUM_MINIBATCHES
+
+
+def run_benchmark():
+    rng = np.random.default_rng(0)
+    player_states = [bytes(rng.integers(0, 3, 1 + BOARD_SIZE ** 2, dtype=np.int8)) for _ in range(1000)]
+    distributions = list(rng.dirichlet(np.ones(BOARD_SIZE ** 2), 1000).astype(np.float32))
+    for max_size in MAX_SIZES:
+        buffer, deque_add_time = fill_deque(max_size, player_states, distributions)
+        deque_sample_time = time_sampling(lambda: sample_deque(buffer))
+        del buffer
+        replay_buffer, ring_add_time = fill_ring_buffer(max_size, player_states, distributions)
+        ring_sample_time = time_sampling(replay_buffer.get_random_minibatch)
+        print("size {}x{}, max_size {:7d}: deque add {:.2f} us, minibatch {:8.3f} ms; ring buffer add {:.2f} us, stacked minibatch {:.3f} ms".format(
+            BOARD_SIZE, BOARD_SIZE, max_size, 1e6 * deque_add_time, deque_sample_time, 1e6 * ring_add_time, ring_sample_time))
+
+
+if __name__ == '__main__':
+    run_benchmark()
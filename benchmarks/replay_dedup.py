@@ -0,0 +1,63 @@
+""" Benchmark of the deduplication of the replay buffer. NUM_EPISODES self-play episodes with random rollouts are played
+for each board size, and their cases are added to a replay buffer of the default max size with and without dedup.
+The number of unique positions in the buffer, the number of self-play visits they stand for and the memory of the
+case arrays, the dedup index and the replacement order per unique position are reported. Run from the project root with: python -m benchmarks.replay_dedup"""
+import random
+import numpy as np
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from agent.replay_buffer import ReplayBuffer
+from environment.state_manager import StateManager
+
+BOARD_SIZES = {4: 200, 6: 60}  # Board size -> NUM_EPISODES
+NUM_SIMULATIONS = 50
+
+
+def play_episode(actor, state_manager):
+    """ Plays one self-play episode with tree reuse, and returns its cases (state with player indicator, D) and winner"""
+    state_manager.init_game()
+    state = state_manager.get_state()
+    player = 1
+    mcts = MonteCarloTreeSearch(actor, state_manager, state, player, rollout_mode="fill")
+    cases = []
+    while not state_manager.is_game_over(state):
+        mcts.simulate(NUM_SIMULATIONS)
+        D = mcts.get_root_distribution(mcts.get_root())
+        cases.append((state.with_player(player), D))
+        state_manager.reset_state(state)
+        chosen_child = state_manager.select_action(mcts.get_root(), player, D)
+        state_manager.perform_action(mcts.get_root().get_action_to(chosen_child))
+        state = state_manager.get_state()
+        player = 1 if player == 2 else 2
+        mcts.set_root(chosen_child)
+    return cases, state_manager.get_winner(state)
+
+
+def run_benchmark():
+    for board_size, num_episodes in BOARD_SIZES.items():
+        random.seed(0)
+        np.random.seed(0)
+        state_manager = StateManager("HEX_BITBOARD", board_size)
+        actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, board_size, train_config.nn_dims,
+                      train_config.activation, train_config.optimizer, train_config.loss_function)
+        replay_buffers = {dedup: ReplayBuffer(dedup=dedup) for dedup in [False, True]}
+        for _ in range(num_episodes):
+            cases, winner = play_episode(actor, state_manager)
+            for replay_buffer in replay_buffers.values():
+                for player_state, D in cases:
+                    replay_buffer.add_state_case(player_state, D)
+                replay_buffer.add_outcome(winner)
+        for dedup, replay_buffer in replay_buffers.items():
+            num_cases = len(replay_buffer)
+            num_unique = len({bytes(row) for row in replay_buffer.states[:num_cases]})
+            num_visits = int(replay_buffer.visit_counts[:num_cases].sum())
+            case_bytes = replay_buffer.states.nbytes + replay_buffer.distributions.nbytes + replay_buffer.outcomes.nbytes + replay_buffer.visit_counts.nbytes + replay_buffer.outcome_counts.nbytes
+            if dedup:
+                case_bytes += replay_buffer.index.table.nbytes + replay_buffer.index.keys.nbytes + replay_buffer.slot_list.next_slots.nbytes + replay_buffer.slot_list.previous_slots.nbytes
+            print("size {}x{}, {} episodes, dedup {!s:5}: {:3d} cases, {:3d} unique positions, {:4d} visits, {:5.0f} bytes per unique position, {} merged visits".format(
+                board_size, board_size, num_episodes, dedup, num_cases, num_unique, num_visits, case_bytes / num_unique, replay_buffer.num_merged))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,54 @@
+""" Benchmark of the memory-mapped replay store. Episodes of EPISODE_LENGTH random 6x6 cases are appended to a store in a
+temporary directory, and the mean time of committing an episode, of reopening the store (as a new training run or a
+restarted process does) and of sampling a minibatch of the newest MAX_SIZE cases are reported, with the sampling time
+of the in-memory replay buffer for comparison. Run from the project root with: python -m benchmarks.replay_store"""
+import tempfile
+import time
+import numpy as np
+from agent.replay_buffer import ReplayBuffer
+from agent.replay_store import ReplayStore
+
+BOARD_SIZE = 6
+EPISODE_LENGTH = 20
+NUM_CASES = [10000, 200000]
+MAX_SIZE = 100000
+NUM_MINIBATCHES = 20
+
+
+def fill(replay_buffer, num_cases, player_states, distributions):
+    """ Adds num_cases cases in episodes of EPISODE_LENGTH cases, and returns the mean time in milliseconds per episode"""
+    start_time = time.perf_counter()
+    for i in range(num_cases):
+        replay_buffer.add_state_case(player_states[i % len(player_states)], distributions[i % len(distributions)])
+        if (i + 1) % EPISODE_LENGTH == 0:
+            replay_buffer.add_outcome(1 + i % 2)
+    return 1000 * (time.perf_counter() - start_time) / (num_cases // EPISODE_LENGTH)
+
+
+def time_sampling(replay_buffer):
+    """ Returns the mean time in milliseconds of sampling a minibatch"""
+    start_time = time.perf_counter()
+    for _ in range(NUM_MINIBATCHES):
+        replay_buffer.get_random_minibatch()
+    return 1000 * (time.perf_counter() - start_time) / NUM_MINIBATCHES
+
+
+def run_benchmark():
+    rng = np.random.default_rng(0)
+    player_states = [bytes(rng.integers(0, 3, 1 + BOARD_SIZE ** 2, dtype=np.int8)) for _ in range(1000)]
+    distributions = list(rng.dirichlet(np.ones(BOARD_SIZE ** 2), 1000).astype(np.float32))
+    for num_cases in NUM_CASES:
+        memory_buffer = ReplayBuffer(MAX_SIZE)
+        memory_episode_time = fill(memory_buffer, num_cases, player_states, distributions)
+        with tempfile.TemporaryDirectory() as directory:
+            store_buffer = ReplayBuffer(MAX_SIZE, store=ReplayStore(directory, 1 + BOARD_SIZE ** 2, BOARD_SIZE ** 2))
+            store_episode_time = fill(store_buffer, num_cases, player_states, distributions)
+            start_time = time.perf_counter()
+            reopened_buffer = ReplayBuffer(MAX_SIZE, store=ReplayStore(directory))
+            reopen_time = 1000 * (time.perf_counter() - start_time)
+            print("size {}x{}, {:6d} cases: episode of {} cases in memory {:.3f} ms, in store {:.3f} ms; reopen {:.2f} ms; minibatch in memory {:.3f} ms, from store {:.3f} ms".format(
+                BOARD_SIZE, BOARD_SIZE, num_cases, EPISODE_LENGTH, memory_episode_time, store_episode_time, reopen_time, time_sampling(memory_buffer), time_sampling(reopened_buffer)))
+
+
+if __name__ == '__main__':
+    run_benchmark()
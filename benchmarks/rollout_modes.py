@@ -0,0 +1,41 @@
+""" Benchmark comparing the rollout throughput of the step rollout (winner check after each action) and the fill rollout
+(fill the board, then a single winner check) on 6x6 and 11x11 boards. Both a random default policy (epsilon = 1) and the
+ANET default policy (epsilon = 0) are measured from the empty board. Run from the project root with:
+python -m benchmarks.rollout_modes"""
+import time
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+from environment.board_state import BoardState
+
+BOARD_SIZES = [6, 11]
+NUM_ROLLOUTS = {1: 500, 0: 20}  # Number of rollouts for epsilon = 1 (random) and epsilon = 0 (ANET)
+
+
+def time_rollouts(mcts, num_rollouts):
+    """ Returns the number of rollouts per second performed from the root of the given search"""
+    root = mcts.get_root()
+    start_time = time.perf_counter()
+    for _ in range(num_rollouts):
+        mcts.leaf_evaluation(root)
+    return num_rollouts / (time.perf_counter() - start_time)
+
+
+def run_benchmark():
+    for board_size in BOARD_SIZES:
+        state_manager = StateManager("HEX_BITBOARD", board_size)
+        for epsilon, num_rollouts in NUM_ROLLOUTS.items():
+            actor = Actor(train_config.learning_rate, epsilon, train_config.decay_rate, board_size, train_config.nn_dims,
+                          train_config.activation, train_config.optimizer, train_config.loss_function)
+            policy = "random" if epsilon == 1 else "ANET"
+            rates = {}
+            for rollout_mode in ["step", "fill"]:
+                mcts = MonteCarloTreeSearch(actor, state_manager, BoardState.empty(board_size), 1, rollout_mode=rollout_mode)
+                rates[rollout_mode] = time_rollouts(mcts, num_rollouts)
+                print("size {}x{}, {} policy, {} rollout: {:9.1f} rollouts/s".format(board_size, board_size, policy, rollout_mode, rates[rollout_mode]))
+            print("size {}x{}, {} policy, speedup: {:.1f}x".format(board_size, board_size, policy, rates["fill"] / rates["step"]))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,40 @@
+""" Benchmark of the wall-clock scaling of root-parallel MCTS. The same number of simulations is run from the empty board
+by the single process search and by pools of 1 to N worker processes, where N is the number of CPU cores (at most 8).
+The pools are started before timing. Run from the project root with: python -m benchmarks.root_parallel"""
+import os
+import time
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from agent.root_parallel import SearchPool, RootParallelSearch
+from environment.state_manager import StateManager
+from environment.board_state import BoardState
+
+BOARD_SIZE = 6
+NUM_SIMULATIONS = 4000
+MAX_WORKERS = min(8, os.cpu_count())
+
+
+def time_search(mcts):
+    """ Returns the time in seconds of running the simulations from the root of the given search"""
+    start_time = time.perf_counter()
+    mcts.simulate(NUM_SIMULATIONS)
+    return time.perf_counter() - start_time
+
+
+def run_benchmark():
+    state_manager = StateManager("HEX_BITBOARD", BOARD_SIZE)
+    actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, BOARD_SIZE, train_config.nn_dims,
+                  train_config.activation, train_config.optimizer, train_config.loss_function)
+    base_time = time_search(MonteCarloTreeSearch(actor, state_manager, BoardState.empty(BOARD_SIZE), 1))
+    print("size {}x{}, {} simulations, single process: {:.2f} s".format(BOARD_SIZE, BOARD_SIZE, NUM_SIMULATIONS, base_time))
+    for num_workers in range(1, MAX_WORKERS + 1):
+        search_pool = SearchPool(num_workers, actor, "HEX_BITBOARD", BOARD_SIZE)
+        search_pool.search(BoardState.empty(BOARD_SIZE), 1, num_workers, 0)  # Warm up, so that every worker has started
+        parallel_time = time_search(RootParallelSearch(actor, state_manager, BoardState.empty(BOARD_SIZE), 1, search_pool))
+        search_pool.close()
+        print("size {}x{}, {} simulations, {} workers: {:.2f} s ({:.2f}x)".format(BOARD_SIZE, BOARD_SIZE, NUM_SIMULATIONS, num_workers, parallel_time, base_time / parallel_time))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,58 @@
+""" Benchmark of the self-play pipeline of the GameAgent. The same number of episodes is run with self-play and training
+in turns in one process, and with NUM_SELF_PLAY_WORKERS worker processes that play with the NumPy forward pass while
+the main process trains the ANET, and the positions generated and trained per second are compared. The visualizer and
+the saving of models are replaced, so nothing is drawn or written. The pipeline is only faster with more than one
+CPU core, since the workers and the trainer then run at the same time. Run from the project root with:
+python -m benchmarks.self_play_pipeline"""
+import os
+import random
+import time
+import numpy as np
+from config import train_config
+from environment.state_manager import StateManager
+from agent.actor import Actor
+from agent.replay_buffer import ReplayBuffer
+from game_agent import GameAgent
+
+BOARD_SIZE = 4
+NUM_EPISODES = 20
+NUM_SIMULATIONS = 100
+SETTINGS = [0, 1, 2, 4]  # num_self_play_workers (0 = self-play and training in turns)
+
+
+class SilentVisualizer:
+    """ Visualizer that never draws"""
+    def get_interval(self):
+        return NUM_EPISODES + 1
+
+    def visualize(self, actions, episode):
+        pass
+
+
+def run_agent(num_self_play_workers):
+    """ Returns the positions generated and trained per second by a GameAgent with the given number of workers"""
+    random.seed(0)
+    np.random.seed(0)
+    state_manager = StateManager("HEX_BITBOARD", BOARD_SIZE)
+    actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, BOARD_SIZE, train_config.nn_dims, train_config.activation, train_config.optimizer, train_config.loss_function)
+    actor.load = lambda path: None  # Starts from random weights instead of a trained model
+    actor.save = lambda episode, dir_num: None
+    game_agent = GameAgent(actor, NUM_EPISODES + 1, state_manager, SilentVisualizer(), ReplayBuffer(), 0, NUM_EPISODES, NUM_SIMULATIONS, num_self_play_workers=num_self_play_workers)
+    start_time = time.perf_counter()
+    game_agent.run()
+    elapsed_time = time.perf_counter() - start_time  # Includes starting the workers
+    return game_agent.num_generated_positions / elapsed_time, game_agent.num_trained_positions / elapsed_time
+
+
+def run_benchmark():
+    results = []
+    for num_self_play_workers in SETTINGS:
+        results.append((num_self_play_workers, run_agent(num_self_play_workers)))
+    print()
+    print("{} CPU cores".format(os.cpu_count()))
+    for num_self_play_workers, (generated, trained) in results:
+        print("size {}x{}, {} episodes of {} simulations, {} self-play workers: generated {:.1f} positions/s, trained {:.1f} positions/s".format(BOARD_SIZE, BOARD_SIZE, NUM_EPISODES, NUM_SIMULATIONS, num_self_play_workers, generated, trained))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,63 @@
+""" Benchmark comparing the previous list state with the immutable BoardState. It reports the memory used to store a
+state in a tree node and in the replay buffer, and the time needed to turn a state into network input. Run from the
+project root with: python -m benchmarks.state_representation"""
+import random
+import sys
+import time
+import numpy as np
+import tensorflow as tf
+from environment.board_state import BoardState
+
+BOARD_SIZES = [4, 6, 11]
+NUM_CONVERSIONS = 20000
+
+
+def make_state(board_size, seed=0):
+    """ Returns a half filled random board state as a list"""
+    rng = random.Random(seed)
+    num_cells = board_size ** 2
+    state = [0] * num_cells
+    for index in rng.sample(range(num_cells), num_cells // 2):
+        state[index] = rng.choice([1, 2])
+    return state
+
+
+def list_network_input(state, player):
+    """ The previous conversion: prefix the player, build a NumPy array from the list and convert it to a tensor twice"""
+    player_board_state = [player]
+    player_board_state.extend(state)
+    state_array = np.array(list(player_board_state))
+    tensor_state = tf.convert_to_tensor(state_array, np.float32)
+    return tf.convert_to_tensor(np.expand_dims(tensor_state, axis=0))
+
+
+def board_state_network_input(state, player):
+    """ The BoardState conversion: prefix the player to the bytes and read them as an array without copying"""
+    return np.frombuffer(state.with_player(player), dtype=np.int8).astype(np.float32)[np.newaxis, :]
+
+
+def time_conversions(convert, state):
+    """ Returns the average time in seconds of converting the given state to network input"""
+    start_time = time.perf_counter()
+    for _ in range(NUM_CONVERSIONS):
+        convert(state, 1)
+    return (time.perf_counter() - start_time) / NUM_CONVERSIONS
+
+
+def run_benchmark():
+    for board_size in BOARD_SIZES:
+        list_state = make_state(board_size)
+        board_state = BoardState(list_state)
+        list_case = [1] + list_state  # The replay buffer stored a second list with the player indicator
+        list_bytes = sys.getsizeof(list_state) + sys.getsizeof(list_case)
+        board_state_bytes = sys.getsizeof(board_state) + sys.getsizeof(board_state.with_player(1))
+        print("size {}x{}, memory per state (node + buffer case): list {} bytes, BoardState {} bytes ({:.1f}x smaller)".format(
+            board_size, board_size, list_bytes, board_state_bytes, list_bytes / board_state_bytes))
+        list_time = time_conversions(list_network_input, list_state)
+        board_state_time = time_conversions(board_state_network_input, board_state)
+        print("size {}x{}, network input conversion: list {:.2f} us, BoardState {:.2f} us ({:.1f}x faster)".format(
+            board_size, board_size, list_time * 1e6, board_state_time * 1e6, list_time / board_state_time))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,65 @@
+""" Benchmark comparing the Node object tree backend with the ArrayTree backend. The same search is run with both backends
+from the empty board, using fill rollouts with a random policy so that the time is dominated by the tree. Every child
+node is made during expansion, so that the number of nodes is large and the same for both backends. It reports the
+number of nodes created per second and the number of bytes of memory per node. Run from the project root with:
+python -m benchmarks.tree_backends"""
+import random
+import time
+import tracemalloc
+import numpy as np
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+from environment.board_state import BoardState
+
+BOARD_SIZES = [6, 11]
+NUM_SIMULATIONS = 3000
+
+
+def count_nodes(root):
+    """ Returns the number of nodes reachable from the given root"""
+    visited = {root}
+    stack = [root]
+    while stack:
+        for child in stack.pop().get_child_nodes():
+            if child not in visited:
+                visited.add(child)
+                stack.append(child)
+    return len(visited)
+
+
+def run_search(actor, state_manager, board_size, tree_backend):
+    """ Runs the search with the given backend and returns the search, the elapsed time and the memory used"""
+    random.seed(0)
+    np.random.seed(0)
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    start_time = time.perf_counter()
+    mcts = MonteCarloTreeSearch(actor, state_manager, BoardState.empty(board_size), 1, rollout_mode="fill", tree_backend=tree_backend)
+    for _ in range(NUM_SIMULATIONS):
+        leaf_node = mcts.tree_search()
+        mcts.leaf_node_expansion(leaf_node)
+        for child_num in range(leaf_node.get_child_count()):
+            mcts.create_child(leaf_node, child_num)
+        mcts.backpropagation(leaf_node, mcts.leaf_evaluation(leaf_node))
+    elapsed = time.perf_counter() - start_time
+    memory = tracemalloc.get_traced_memory()[0] - start_memory
+    tracemalloc.stop()
+    return mcts, elapsed, memory
+
+
+def run_benchmark():
+    for board_size in BOARD_SIZES:
+        state_manager = StateManager("HEX_BITBOARD", board_size)
+        actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, board_size, train_config.nn_dims,
+                      train_config.activation, train_config.optimizer, train_config.loss_function)
+        for tree_backend in ["object", "array"]:
+            mcts, elapsed, memory = run_search(actor, state_manager, board_size, tree_backend)
+            num_nodes = count_nodes(mcts.get_root())
+            print("size {}x{}, {:<6} backend: {:7d} nodes, {:9.1f} nodes/s, {:6.1f} bytes/node".format(
+                board_size, board_size, tree_backend, num_nodes, num_nodes / elapsed, memory / num_nodes))
+
+
+if __name__ == '__main__':
+    run_benchmark()
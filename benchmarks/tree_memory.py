@@ -0,0 +1,63 @@
+""" Benchmark of the memory held by the search tree during a self-play episode with tree reuse. One episode is played with
+the random default policy for each setting, and the peak tree size and the largest memory traced by tracemalloc after a
+move (and a garbage collection) are reported. The previous reuse, where the new root kept a reference to its parent, is emulated by keeping
+the previous roots. Run from the project root with: python -m benchmarks.tree_memory"""
+import gc
+import random
+import time
+import tracemalloc
+import numpy as np
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+
+BOARD_SIZE = 6
+NUM_SIMULATIONS = 500
+SETTINGS = [("object", 0, True), ("object", 0, False), ("object", 250, False), ("array", 0, False), ("array", 250, False)]  # (tree backend, node cap, keep previous roots)
+
+
+def play_episode(actor, state_manager, tree_backend, max_tree_size, keep_previous_roots):
+    """ Plays one self-play episode with tree reuse, and returns the search of the last move and the largest memory
+    traced after a move"""
+    state_manager.init_game()
+    state = state_manager.get_state()
+    player = 1
+    mcts = MonteCarloTreeSearch(actor, state_manager, state, player, tree_backend=tree_backend, max_tree_size=max_tree_size)
+    previous_roots = []
+    max_memory = 0
+    while not state_manager.is_game_over(state):
+        mcts.simulate(NUM_SIMULATIONS)
+        D = mcts.get_root_distribution(mcts.get_root())
+        state_manager.reset_state(state)
+        chosen_child = state_manager.select_action(mcts.get_root(), player, D)
+        state_manager.perform_action(mcts.get_root().get_action_to(chosen_child))
+        state = state_manager.get_state()
+        player = 1 if player == 2 else 2
+        if keep_previous_roots:
+            previous_roots.append(mcts.get_root())
+        mcts.set_root(chosen_child)
+        gc.collect()  # Parent and child nodes refer to each other, so discarded branches are freed by the cycle collector
+        max_memory = max(max_memory, tracemalloc.get_traced_memory()[0])
+    return mcts, max_memory
+
+
+def run_benchmark():
+    state_manager = StateManager("HEX_BITBOARD", BOARD_SIZE)
+    actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, BOARD_SIZE, train_config.nn_dims,
+                  train_config.activation, train_config.optimizer, train_config.loss_function)
+    for tree_backend, max_tree_size, keep_previous_roots in SETTINGS:
+        random.seed(0)
+        np.random.seed(0)
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        mcts, max_memory = play_episode(actor, state_manager, tree_backend, max_tree_size, keep_previous_roots)
+        elapsed_time = time.perf_counter() - start_time
+        tracemalloc.stop()
+        reuse = "previous reuse" if keep_previous_roots else "detached reuse"
+        print("size {}x{}, {} backend, {}, node cap {:4d}: peak tree size {:5d} nodes, memory after a move {:6.2f} MB, {:.1f} s".format(
+            BOARD_SIZE, BOARD_SIZE, tree_backend, reuse, max_tree_size, mcts.peak_tree_size, max_memory / 2 ** 20, elapsed_time))
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,76 @@
+""" Benchmark comparing the previous tree search, which found the value of each child in a Python loop, with the tree
+policy that computes the values of all children in one NumPy operation. A deep tree is built with fill rollouts, where
+every child node is made during expansion as the previous tree search expects, and both tree searches are then timed
+on the same tree for both tree backends. The object backend still gathers the statistics of the children with a
+Python loop, so only the ArrayTree backend is vectorised from end to end. Run from the project root with:
+python -m benchmarks.tree_policy"""
+import random
+import time
+from math import log, sqrt
+import numpy as np
+from config import train_config
+from agent.actor import Actor
+from agent.mcts import MonteCarloTreeSearch
+from environment.state_manager import StateManager
+from environment.board_state import BoardState
+
+BOARD_SIZES = [6, 11]
+NUM_SIMULATIONS = 20000
+NUM_SELECTIONS = 2000
+
+
+def loop_tree_search(mcts):
+    """ The previous tree search, where a dict of child values is built in a Python loop at every level"""
+    current_node = mcts.get_root()
+    child_nodes = current_node.get_child_nodes()
+    while not current_node.is_final_state() and len(child_nodes) > 0:
+        child_values = {}
+        for child in child_nodes:
+            if current_node.get_player() == 1:
+                u = mcts.c * sqrt(log(current_node.get_counter())/(1 + child.get_counter()))
+                child_values[child] = child.get_value() + u
+            elif current_node.get_player() == 2:
+                u = mcts.c * sqrt(log(current_node.get_counter())/(1 + child.get_counter()))
+                child_values[child] = child.get_value() - u
+        if current_node.get_player() == 1:
+            current_node = max(child_values, key=child_values.get)
+        elif current_node.get_player() == 2:
+            current_node = min(child_values, key=child_values.get)
+        child_nodes = current_node.get_child_nodes()
+    return current_node
+
+
+def time_selections(tree_search):
+    """ Returns the number of tree searches per second"""
+    start_time = time.perf_counter()
+    for _ in range(NUM_SELECTIONS):
+        tree_search()
+    return NUM_SELECTIONS / (time.perf_counter() - start_time)
+
+
+def run_benchmark():
+    for board_size in BOARD_SIZES:
+        state_manager = StateManager("HEX_BITBOARD", board_size)
+        actor = Actor(train_config.learning_rate, 1, train_config.decay_rate, board_size, train_config.nn_dims,
+                      train_config.activation, train_config.optimizer, train_config.loss_function)
+        for tree_backend in ["object", "array"]:
+            random.seed(0)
+            np.random.seed(0)
+            mcts = MonteCarloTreeSearch(actor, state_manager, BoardState.empty(board_size), 1, rollout_mode="fill", tree_backend=tree_backend)
+            for _ in range(NUM_SIMULATIONS):
+                leaf_node = mcts.tree_search()
+                mcts.leaf_node_expansion(leaf_node)
+                for child_num in range(leaf_node.get_child_count()):
+                    mcts.create_child(leaf_node, child_num)
+                mcts.backpropagation(leaf_node, mcts.leaf_evaluation(leaf_node))
+            if loop_tree_search(mcts) != mcts.tree_search():
+                raise Exception("The tree searches chose different leaf nodes")
+            depth = len(mcts.search_path) - 1
+            loop_rate = time_selections(lambda: loop_tree_search(mcts))
+            vectorized_rate = time_selections(mcts.tree_search)
+            print("size {}x{}, {:<6} backend, depth {}: loop {:8.1f} selections/s, vectorized {:8.1f} selections/s ({:.1f}x)".format(
+                board_size, board_size, tree_backend, depth, loop_rate, vectorized_rate, vectorized_rate / loop_rate))
+
+
+if __name__ == '__main__':
+    run_benchmark()
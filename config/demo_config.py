@@ -1,5 +1,5 @@
 # ----------------------------- BOARD PARAMETERS -----------------------------
-game_type = "HEX"
+game_type = "HEX"  # Available: HEX (Cell objects), HEX_BITBOARD (integer bitboards, faster)
 board_size = 5
 starting_player = 1  # Random starting player for each episode: 0, else 1/2
 
@@ -9,6 +9,21 @@ save_interval = 4  # M: cache interval in preparation for a TOPP
 num_episodes = 15  # ensure this is divisible by save-interval - 1 (e.g. 200/4 = 50 => saved episodes are 0, 50, 100, 150, 200)
 num_simulations = 10
 exploration_c = 1
+rollout_mode = "step"  # Leaf evaluation: step (winner check after each action), fill (fill the board, then a single winner check)
+transposition_table_size = 0  # Max number of positions shared between orders of actions reaching them (0 = plain tree)
+tree_backend = "object"  # Node storage: object (one Node per state), array (NumPy arrays, less memory for large trees)
+leaf_batch_size = 1  # Number of leaves gathered with virtual loss and evaluated with batched NN calls (1 = one leaf at a time)
+num_workers = 1  # Processes running independent searches from the root, whose visit counts are merged (1 = single process search)
+time_budget = None  # Max seconds of search per move, in addition to num_simulations (None = no time limit)
+early_stopping = False  # Stop the search of a move when the most visited root child can not be overtaken in the remaining budget
+max_tree_size = 0  # Number of nodes where the least visited nodes of the search tree are recycled (0 = no limit)
+selection = "uct"  # Tree policy: uct, puct (ANET policy as priors and value head in place of rollouts, needs value_head = True)
+solver = False  # MCTS-Solver: propagate proven wins and losses, skip proven subtrees and choose proven wins at once
+rave_k = 0  # RAVE equivalence parameter k: AMAF values are blended into selection with weight sqrt(k/(3N + k)), e.g. 250 (0 = no RAVE)
+endgame_empty_cells = 0  # Leaves with at most this many empty cells are solved exactly by alpha-beta in place of a rollout, e.g. 10 on 6x6 (0 = always rollouts)
+distribution_cache_size = 0  # Root distributions kept between episodes by canonical position (180 degree rotation), e.g. 10000 (0 = always search)
+distribution_cache_visits = 10  # Root visits a cached distribution needs to be reused in place of a search
+distribution_cache_path = ""  # .npz file the distribution cache is loaded from at the start of training and saved to at the end, e.g. "./models/distribution_cache.npz" ("" = in memory only)
 
 
 # ----------------------------- NN PARAMETERS -----------------------------
@@ -19,6 +34,18 @@ nn_dims = [100, 200, 100, 25]
 activation = ["tanh", "tanh", "tanh", "tanh"]  # Available: linear, sigmoid, tanh, relu (softmax is recommended in requirements p. 10)
 optimizer = "RMSprop"  # Available: adagrad, sgd, RMSprop, adam, adadelta
 loss_function = "mean-squared-error"
+value_head = False  # Adds a value head to the ANET that estimates the outcome of the game, trained towards the episode outcomes
+prediction_cache_size = 0  # ANET predictions kept by (state, player) until the weights change, e.g. 100000 (0 = no cache)
+inference = "keras"  # ANET forward pass of play-only actors (Topp, OHT): keras (TensorFlow), numpy (weights exported to .npz, no TensorFlow import)
+train_epochs = 1  # Passes over the minibatch of each episode when training the ANET
+train_batch_size = 32  # Cases per gradient step when training the ANET
+replay_buffer_size = 750  # Max number of cases in the replay buffer, where the oldest case is replaced when it is full
+replay_sampling = "recency"  # Minibatch sampling: recency (newer cases more often), priority (cases with larger ANET errors more often)
+replay_store_path = ""  # Directory of a memory-mapped replay store kept between training runs and readable by other processes, e.g. "./replay_store" ("" = in memory only)
+replay_dedup = False  # Merges a repeated (state, player) into its case in the replay buffer, keeping the mean distribution and outcome and a visit count (in-memory buffer only)
+num_self_play_workers = 0  # Self-play processes that play episodes with the newest published ANET weights while the main process trains (0 = play and train in turns)
+weights_publish_interval = 1  # Trained episodes between publishing the ANET weights to the self-play workers
+warm_start_path = "./models/ANET_6_ep_300.h5"  # ANET weights that training starts from, skipped if they do not fit the board size and value head ("" = random weights)
 
 
 # ----------------------------- VISUALIZER PARAMETERS -----------------------------
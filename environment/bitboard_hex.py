@@ -0,0 +1,124 @@
+from environment.board_state import BoardState
+
+CELL_BITS = 8  # Each cell owns one byte lane in the bitboards, so conversion to and from the BoardState bytes runs in C through int.from_bytes/to_bytes
+_MASKS = {}  # Precomputed masks shared by all boards of the same size
+
+
+def get_masks(board_size):
+    """ Returns the precomputed bit masks for the given board size. The masks are only computed the first time a board
+    of a given size is made, and are then shared by every bitboard game of that size"""
+    if board_size not in _MASKS:
+        _MASKS[board_size] = BitboardMasks(board_size)
+    return _MASKS[board_size]
+
+
+class BitboardMasks:
+    """ Class for making the bit masks used by the bitboard Hex engine. Cell i = row * size + col is represented by
+    the lowest bit of byte lane i, so that a bitboard can be built directly from the bytes of a list state"""
+    def __init__(self, board_size):
+        self.size = board_size
+        self.num_cells = board_size ** 2
+        self.lanes = int.from_bytes(bytes([1] * self.num_cells), "little")  # Lowest bit of every lane (i.e. every cell on the board)
+        self.cell_bits = [1 << (CELL_BITS * index) for index in range(self.num_cells)]
+        self.first_row = self.make_mask([(0, col) for col in range(board_size)])  # P1 side (top)
+        self.last_row = self.make_mask([(board_size - 1, col) for col in range(board_size)])  # P1 side (bottom)
+        self.first_col = self.make_mask([(row, 0) for row in range(board_size)])  # P2 side (left)
+        self.last_col = self.make_mask([(row, board_size - 1) for row in range(board_size)])  # P2 side (right)
+        self.not_first_col = self.lanes & ~self.first_col
+        self.not_last_col = self.lanes & ~self.last_col
+        self.neighbors = [self.make_mask(self.get_neighbor_locations(index)) for index in range(self.num_cells)]
+
+    def make_mask(self, locations):
+        """ Returns a bitboard where the cells at the given locations are set"""
+        mask = 0
+        for row, col in locations:
+            mask |= self.cell_bits[row * self.size + col]
+        return mask
+
+    def get_neighbor_locations(self, index):
+        """ Returns the locations of the neighbors of the given cell, following the same diamond structure as
+        HexagonalDiamondGrid (left, right, above, below, above-right and below-left)"""
+        row, col = divmod(index, self.size)
+        candidates = [(row, col - 1), (row, col + 1), (row - 1, col), (row + 1, col), (row - 1, col + 1), (row + 1, col - 1)]
+        return [(r, c) for r, c in candidates if 0 <= r < self.size and 0 <= c < self.size]
+
+    def expand(self, bits):
+        """ Returns the given cells together with all their neighbors. The shifts move every cell one step in each of
+        the six neighbor directions at once, and the column masks remove the cells that wrapped around a board edge"""
+        col_shift = CELL_BITS
+        row_shift = CELL_BITS * self.size
+        diagonal_shift = row_shift - col_shift
+        return (bits
+                | ((bits << col_shift) & self.not_first_col) | ((bits >> col_shift) & self.not_last_col)
+                | (bits << row_shift) | (bits >> row_shift)
+                | ((bits >> diagonal_shift) & self.not_first_col) | ((bits << diagonal_shift) & self.not_last_col)) & self.lanes
+
+    def is_connected(self, bits, start_side, end_side):
+        """ Flood fills the given player bitboard from the start side and returns True if the fill reaches the end side"""
+        reached = bits & start_side
+        while reached:
+            if reached & end_side:
+                return True
+            grown = self.expand(reached) & bits
+            if grown == reached:
+                return False
+            reached = grown
+        return False
+
+
+class BitboardHex:
+    """ Class for performing a Hex game where the position is stored as two integer bitboards (one per player) instead
+    of a grid of Cell objects. It offers the same interface as Hex, so it can be used by the StateManager directly"""
+    def __init__(self, board_size):
+        self.size = board_size
+        self.masks = get_masks(board_size)
+        self.p1_board = 0
+        self.p2_board = 0
+
+    def get_current_state(self):
+        """ Returns the state of the board containing the cell states of the board (e.g. [0, 0 , 1, 0, 2, 0, 1, 2, 0])"""
+        return BoardState((self.p1_board | (self.p2_board << 1)).to_bytes(self.masks.num_cells, "little"))
+
+    def get_next_state(self, state, action):
+        """Perform the given action to produce the next state and returns this state"""
+        self.set_cell_states(state)
+        self.perform_action(action)
+        return self.get_current_state()
+
+    def get_legal_locations(self, state):
+        """ Returns the locations (row, col) of the cells that are not owned by any player in the given state"""
+        return [divmod(index, self.size) for index in range(len(state)) if state[index] == 0]
+
+    def set_cell_states(self, cell_states):
+        """ Changes the bitboards to represent the given state"""
+        board = int.from_bytes(cell_states, "little")  # Accepts a BoardState or any list of cell states
+        self.p1_board = board & self.masks.lanes  # cell state 1 = 0b01
+        self.p2_board = (board >> 1) & self.masks.lanes  # cell state 2 = 0b10
+
+    def perform_action(self, action):
+        """Perform action by setting the bit of the cell at the given location in the bitboard of the given player"""
+        (row, col), player = action[0], action[1]
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            raise Exception("Given cell location is invalid")
+        cell_bit = self.masks.cell_bits[row * self.size + col]
+        if (self.p1_board | self.p2_board) & cell_bit:
+            raise Exception("Move is not available because the cell is occupied")
+        if player == 1:
+            self.p1_board |= cell_bit
+        elif player == 2:
+            self.p2_board |= cell_bit
+        else:
+            raise Exception("Invalid state value. Cell state can only be set to 0, 1 or 2")
+
+    def get_winner(self):
+        """ Returns the player that has a complete path between their two sides, or 0 if no player has won yet.
+        Player 1 connects the top and bottom rows, while player 2 connects the left and right columns"""
+        if self.masks.is_connected(self.p1_board, self.masks.first_row, self.masks.last_row):
+            return 1
+        if self.masks.is_connected(self.p2_board, self.masks.first_col, self.masks.last_col):
+            return 2
+        return 0
+
+    def is_winning_state(self):
+        """The Hex game is in a winning state if one of the players has a complete path from one of their sides to the other"""
+        return self.get_winner() != 0
@@ -0,0 +1,36 @@
+import numpy as np
+
+
+class BoardState(bytes):
+    """ Class for an immutable board state where each byte holds the state of one cell (0 = empty, 1 = player 1 and
+    2 = player 2), e.g. BoardState([0, 0, 1, 0, 2, 0, 1, 2, 0]). It can be indexed, iterated and measured like the list
+    state, but it only uses one byte per cell, its hash is cached by bytes, and NumPy can read it without copying"""
+    __slots__ = ()
+
+    @classmethod
+    def empty(cls, board_size):
+        """ Returns the state of an empty board of the given size"""
+        return cls(board_size ** 2)
+
+    def __repr__(self):
+        """ Changes BoardState representation to the list format to make debugging easier"""
+        return str(list(self))
+
+    def __str__(self):
+        """ Changes BoardState representation to the list format to make debugging easier"""
+        return str(list(self))
+
+    def with_action(self, index, player):
+        """ Returns the state produced by placing a stone of the given player in the cell with the given index"""
+        next_state = bytearray(self)
+        next_state[index] = player
+        return BoardState(next_state)
+
+    def with_player(self, player):
+        """ Returns the state with a player indicator in front (e.g. [1, 0, 0, 0, 0, 0, 0, 0, 0, 0] for player 1 in
+        state [0, 0, 0, 0, 0, 0, 0, 0, 0]) as bytes, which is the input format of the neural network"""
+        return bytes((player,)) + self
+
+    def to_array(self):
+        """ Returns a read-only int8 NumPy view of the cell states that shares memory with this state"""
+        return np.frombuffer(self, dtype=np.int8)
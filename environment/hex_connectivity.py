@@ -0,0 +1,129 @@
+_NEIGHBORS = {}  # Precomputed neighbor indexes shared by all connectivity structures of the same board size
+
+
+def get_neighbor_indexes(board_size):
+    """ Returns a list containing the indexes (row * size + col) of the neighbors of each cell, following the same
+    diamond structure as HexagonalDiamondGrid. The list is only computed once per board size"""
+    if board_size not in _NEIGHBORS:
+        neighbor_indexes = []
+        for row in range(board_size):
+            for col in range(board_size):
+                candidates = [(row, col - 1), (row, col + 1), (row - 1, col), (row + 1, col), (row - 1, col + 1), (row + 1, col - 1)]
+                neighbor_indexes.append([r * board_size + c for r, c in candidates if 0 <= r < board_size and 0 <= c < board_size])
+        _NEIGHBORS[board_size] = neighbor_indexes
+    return _NEIGHBORS[board_size]
+
+
+class HexConnectivity:
+    """ Class for detecting winning states incrementally with a union-find structure. Each cell is a node, and four
+    virtual nodes represent the sides of the board (top and bottom for player 1, left and right for player 2). Placing
+    a stone unions it with its same colored neighbors and the sides it touches, so a player has won as soon as their two
+    side nodes are in the same set. This makes the winner available in near O(1) after each move"""
+    def __init__(self, board_size):
+        self.size = board_size
+        self.num_cells = board_size ** 2
+        self.neighbors = get_neighbor_indexes(board_size)
+        self.top, self.bottom, self.left, self.right = range(self.num_cells, self.num_cells + 4)  # Virtual side nodes
+        self.parent = list(range(self.num_cells + 4))
+        self.set_size = [1] * (self.num_cells + 4)
+        self.cell_states = [0] * self.num_cells
+        self.winner = 0
+
+    @classmethod
+    def from_state(cls, state, board_size):
+        """ Returns the connectivity of the given state (e.g. [0, 0 , 1, 0, 2, 0, 1, 2, 0]) by placing each stone"""
+        connectivity = cls(board_size)
+        for index in range(len(state)):
+            if state[index] != 0:
+                connectivity.place_stone(index, state[index])
+        return connectivity
+
+    def copy(self):
+        """ Returns an independent copy that can be updated without changing this connectivity"""
+        connectivity = HexConnectivity.__new__(HexConnectivity)
+        connectivity.__dict__.update(self.__dict__)
+        connectivity.parent = self.parent[:]
+        connectivity.set_size = self.set_size[:]
+        connectivity.cell_states = self.cell_states[:]
+        return connectivity
+
+    def find(self, node):
+        """ Returns the representative of the set containing the given node. Path halving keeps the trees flat"""
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, node_a, node_b):
+        """ Merges the sets containing the two given nodes, where the smaller set is attached to the larger set"""
+        root_a, root_b = self.find(node_a), self.find(node_b)
+        if root_a == root_b:
+            return
+        if self.set_size[root_a] < self.set_size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.set_size[root_a] += self.set_size[root_b]
+
+    def get_sides(self, index, player):
+        """ Returns the virtual side nodes touched by the given cell for the given player"""
+        row, col = divmod(index, self.size)
+        sides = []
+        if player == 1:
+            if row == 0:
+                sides.append(self.top)
+            if row == self.size - 1:
+                sides.append(self.bottom)
+        else:
+            if col == 0:
+                sides.append(self.left)
+            if col == self.size - 1:
+                sides.append(self.right)
+        return sides
+
+    def get_player_sides(self, player):
+        """ Returns the two virtual side nodes the given player must connect"""
+        return (self.top, self.bottom) if player == 1 else (self.left, self.right)
+
+    def place_stone(self, index, player):
+        """ Places a stone of the given player in the cell with the given index and updates the winner"""
+        if self.cell_states[index] != 0:
+            raise Exception("Move is not available because the cell is occupied")
+        self.cell_states[index] = player
+        for neighbor in self.neighbors[index]:
+            if self.cell_states[neighbor] == player:
+                self.union(index, neighbor)
+        for side in self.get_sides(index, player):
+            self.union(index, side)
+        start_side, end_side = self.get_player_sides(player)
+        if self.winner == 0 and self.find(start_side) == self.find(end_side):
+            self.winner = player
+
+    def perform_action(self, action):
+        """ Places the stone of the given action = [cell_location, player]"""
+        (row, col), player = action[0], action[1]
+        self.place_stone(row * self.size + col, player)
+
+    def get_winner_after(self, action):
+        """ Returns the winner of the state produced by the given action = [cell_location, player] without placing the
+        stone. The action wins if the sets of the player's neighbors and touched sides include both of the player's sides"""
+        if self.winner != 0:
+            return self.winner
+        (row, col), player = action[0], action[1]
+        index = row * self.size + col
+        connected_sets = {self.find(side) for side in self.get_sides(index, player)}
+        for neighbor in self.neighbors[index]:
+            if self.cell_states[neighbor] == player:
+                connected_sets.add(self.find(neighbor))
+        start_side, end_side = self.get_player_sides(player)
+        if self.find(start_side) in connected_sets and self.find(end_side) in connected_sets:
+            return player
+        return 0
+
+    def get_winner(self):
+        """ Returns the player that has connected their two sides, or 0 if no player has won yet"""
+        return self.winner
+
+    def is_final_state(self):
+        """ Returns True if one of the players has won"""
+        return self.winner != 0
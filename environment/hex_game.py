@@ -1,4 +1,5 @@
 from environment.game_board import HexagonalDiamondGrid
+from environment.board_state import BoardState
 import collections
 
 
@@ -14,13 +15,13 @@ class Hex:
 
     def get_current_state(self):
         """ Returns the state of the board containing the cell states of the board (e.g. [0, 0 , 1, 0, 2, 0, 1, 2, 0])"""
-        return self.board.get_binary_state()
+        return BoardState(self.board.get_binary_state())
 
     def get_next_state(self, state, action):
         """Perform the given action to produce the next state and returns this state"""
         self.set_cell_states(state)
         self.perform_action(action)
-        return self.board.get_binary_state()
+        return BoardState(self.board.get_binary_state())
 
     def get_legal_cells(self, state):
         """ Returns the legal actions for the given game state by updating the board cell states and
@@ -28,6 +29,10 @@ class Hex:
         self.set_cell_states(state)
         return self.board.get_empty_cells()
 
+    def get_legal_locations(self, state):
+        """ Returns the locations (row, col) of the cells that are not owned by any player in the given state"""
+        return [cell.get_location() for cell in self.get_legal_cells(state)]
+
     def set_cell_states(self, cell_states):
         """ Changes the states of the currents board cells to the given state"""
         board_cells = self.board.get_cells()
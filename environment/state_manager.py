@@ -1,4 +1,6 @@
 from environment.hex_game import Hex
+from environment.bitboard_hex import BitboardHex, get_masks
+from environment.hex_connectivity import HexConnectivity
 from environment.nim_game import Nim
 from agent.node import Node
 import numpy as np
@@ -20,6 +22,8 @@ class StateManager:
         """ Initializes a new game of the given game type"""
         if self.game_type == "HEX":
             self.game = Hex(self.size)
+        elif self.game_type == "HEX_BITBOARD":
+            self.game = BitboardHex(self.size)
         elif self.game_type == "NIM":
             self.game = Nim(self.size, self.nim_k)
 
@@ -27,24 +31,32 @@ class StateManager:
         """ Returns the state of the cells on the current game board"""
         return self.game.get_current_state()
 
-    def get_child_nodes(self, state, player):
+    def get_child_nodes(self, state, player, create_node=Node):
         """ Generates child nodes of the given state. Each created child node contains a child state produced by
         performing one of the legal actions from the given state (i.e. fill cell with state = 0) and the legal
-        action that created this child state"""
+        action that created this child state. create_node makes the nodes (Node or the create_node of an ArrayTree)"""
         child_nodes = []
         legal_actions = self.get_legal_actions(state, player)
+        connectivity = self.get_connectivity(state)  # Built once, so the winner of each child state is found without a search
         for action in legal_actions:
-            child_state = self.game.get_next_state(state, action)
-            child_nodes.append(Node(child_state, action))  # Player is included in action
+            child_nodes.append(self.get_child_node(state, action, connectivity, create_node))  # Player is included in action
         return child_nodes
 
+    def get_child_node(self, state, action, connectivity, create_node=Node):
+        """ Generates the child node containing the state produced by performing the given action in the given state.
+        The connectivity of the given state is used to find the winner of the child state"""
+        child_state = self.game.get_next_state(state, action)
+        child_node = create_node(child_state, action)
+        child_node.set_winner(connectivity.get_winner_after(action))
+        return child_node
+
     def get_legal_actions(self, state, player):
         """ Returns the available actions for the given player when the board is in the given state.
         The player is needed to return action = [cell_location, player] that can be used to create child nodes"""
         legal_actions = []
-        legal_cells = self.game.get_legal_cells(state)  # cells with cell_state = 0
-        for cell in legal_cells:
-            action = [cell.get_location(), player]  # Action = [cell_location, player]
+        legal_locations = self.game.get_legal_locations(state)  # locations of cells with cell_state = 0
+        for location in legal_locations:
+            action = [location, player]  # Action = [cell_location, player]
             legal_actions.append(action)
         return legal_actions
 
@@ -54,6 +66,22 @@ class StateManager:
         self.game.set_cell_states(state)
         return self.game.is_winning_state()
 
+    def get_connectivity(self, state):
+        """ Returns the union-find connectivity of the given state, which can be updated one action at a time and
+        tells the winner after each action without searching the board"""
+        return HexConnectivity.from_state(state, self.size)
+
+    def get_winner(self, state):
+        """ Returns the player that has won in the given state, or 0 if the state is not a winning state"""
+        return self.get_connectivity(state).get_winner()
+
+    def get_full_board_winner(self, state):
+        """ Returns the winner of a state where every cell is owned by a player. Hex can not end in a draw, so a full
+        board always has exactly one winner and only the connection of player 1 has to be checked"""
+        masks = get_masks(self.size)
+        p1_board = int.from_bytes(state, "little") & masks.lanes  # cell state 1 = 0b01
+        return 1 if masks.is_connected(p1_board, masks.first_row, masks.last_row) else 2
+
     def reset_state(self, state):
         """Used to reset cell states to state in root node"""
         self.game.set_cell_states(state)
@@ -70,7 +98,11 @@ class StateManager:
     def select_action(self, root, player, normalized_counters):
         """Method for selecting the action that should be performed in the actual game. This will be the action with
         the highest normalized counter for p1 and lowest normalized counter for p2. The distribution includes 0 for
-        illegal actions, so some array logic is used to locate the corresponding board action given the chosen index"""
+        illegal actions, so some array logic is used to locate the corresponding board action given the chosen index.
+        A child that is proven to be a win for the player (MCTS-Solver) is chosen at once"""
+        for child in root.get_child_nodes():
+            if child.get_proven_winner() == player:
+                return child
         state_len = self.size ** 2
         if player == 1:
             action_index = np.where(normalized_counters == np.max(normalized_counters[np.nonzero(normalized_counters)]))[0][0]  # Returns index of action with highest counter excluding 0
@@ -78,8 +110,8 @@ class StateManager:
             action_index = np.where(normalized_counters == np.min(normalized_counters[np.nonzero(normalized_counters)]))[0][0]  # Returns index of action with lowest counter excluding 0
         row = floor(action_index/sqrt(state_len))
         col = int(action_index % sqrt(state_len))
-        for child in root.get_child_nodes():  # Finds the child node that contains the action = [(row, col), player] corresponding to the chosen (row, col) found above
-            action_loc = child.get_action()[0]
+        for child, action in zip(root.get_child_nodes(), root.get_child_actions()):  # Finds the child node reached by the action = [(row, col), player] corresponding to the chosen (row, col) found above
+            action_loc = action[0]
             if (row, col) == action_loc:
                 return child
 
@@ -1,9 +1,17 @@
 from agent.mcts import MonteCarloTreeSearch
+from agent.root_parallel import SearchPool, RootParallelSearch
+from agent.distribution_cache import DistributionCache
+from agent.self_play import run_self_play_worker
+import multiprocessing
+import os
+import queue
 import random
+import tempfile
+import time
 
 
 class GameAgent:
-    def __init__(self, actor, save_interval, state_manager, visualizer, replay_buffer, starting_player, num_episodes, num_simulations, dir_num=0):
+    def __init__(self, actor, save_interval, state_manager, visualizer, replay_buffer, starting_player, num_episodes, num_simulations, dir_num=0, rollout_mode="step", transposition_table_size=0, tree_backend="object", leaf_batch_size=1, num_workers=1, time_budget=None, early_stopping=False, max_tree_size=0, selection="uct", solver=False, rave_k=0, endgame_empty_cells=0, distribution_cache_size=0, distribution_cache_visits=500, distribution_cache_path="", num_self_play_workers=0, weights_publish_interval=1, warm_start_path=""):
         """ The game agent that performs the entire MCTS Algorithm on Hex games to train neural network models
         that can be used in later more intelligent plays. It also makes visualizations showing the chosen path of actions"""
         self.actor = actor  # 3: ANET with randomly initialized parameters
@@ -15,19 +23,53 @@ class GameAgent:
         self.num_episodes = num_episodes
         self.num_simulations = num_simulations
         self.dir_num = dir_num
+        self.rollout_mode = rollout_mode
+        self.transposition_table_size = transposition_table_size
+        self.tree_backend = tree_backend
+        self.leaf_batch_size = leaf_batch_size
+        self.num_workers = num_workers  # More than 1 worker runs root-parallel searches in a pool of processes
+        self.time_budget = time_budget  # Max seconds of search per move, in addition to the num_simulations budget (None = no time limit)
+        self.early_stopping = early_stopping
+        self.max_tree_size = max_tree_size  # Number of nodes where the least visited nodes of the tree are recycled (0 = no limit)
+        self.selection = selection  # Tree policy: uct, or puct which needs an actor with a value head
+        self.solver = solver  # MCTS-Solver: propagate proven wins and losses, and choose proven wins at once
+        self.rave_k = rave_k  # RAVE equivalence parameter (0 = plain UCT values in the tree policy)
+        self.endgame_empty_cells = endgame_empty_cells  # Leaves with at most this many empty cells are solved exactly (0 = always rollouts)
+        self.distribution_cache = None  # Root distributions kept between episodes by canonical position (None = always search)
+        if distribution_cache_size > 0:
+            self.distribution_cache = DistributionCache(distribution_cache_size, distribution_cache_visits)
+        self.distribution_cache_path = distribution_cache_path  # .npz file the distribution cache is loaded from and saved to, so it is shared between runs ("" = in memory only)
+        if self.distribution_cache is not None and distribution_cache_path and os.path.exists(distribution_cache_path):
+            self.distribution_cache.load(distribution_cache_path)
+        self.num_self_play_workers = num_self_play_workers  # Self-play processes that stream episodes to this process, which only trains (0 = play and train in turns)
+        self.weights_publish_interval = weights_publish_interval  # Trained episodes between publishing the weights to the self-play workers
+        self.num_generated_positions = 0  # Cases played by self-play, used to report the throughput
+        self.num_trained_positions = 0  # Cases given to the ANET in training (with repeats over epochs), used to report the throughput
+        self.warm_start_path = warm_start_path  # Saved ANET weights that training starts from when they fit the architecture of the ANET ("" = random weights)
 
     def run(self):
         """ Runs the entire algorithm connecting the state_manager, MCTS and actor to train the ANET that can be used in later plays"""
 
-        self.actor.load("./models/ANET_6_ep_300.h5")
+        self.warm_start()
 
         # 2: Clear replay buffer
         self.replay_buffer.clear_buffer()
 
+        if self.num_self_play_workers > 0:
+            self.run_pipeline()
+            return
+        start_time = time.perf_counter()
+
+        search_pool = None
+        if self.num_workers > 1:
+            search_pool = SearchPool(self.num_workers, self.actor, self.state_manager.game_type, self.state_manager.size, rollout_mode=self.rollout_mode,
+                                     transposition_table_size=self.transposition_table_size, tree_backend=self.tree_backend, leaf_batch_size=self.leaf_batch_size, early_stopping=self.early_stopping, max_tree_size=self.max_tree_size, selection=self.selection, solver=self.solver, rave_k=self.rave_k, endgame_empty_cells=self.endgame_empty_cells)
+
         # 4: For each episode (i.e. number_actual_games)
         for current_episode in range(1, self.num_episodes + 1):
 
             actions = []  # Used in visualization
+            episode_simulations = 0  # Simulations performed in the episode, used to report the simulations saved by the time budget and early stopping
 
             # 4a: Initialize game board to empty board
             self.state_manager.init_game()
@@ -40,31 +82,41 @@ class GameAgent:
                 player = random.choice([1, 2])
             else:
                 player = self.starting_player
-            mcts = MonteCarloTreeSearch(self.actor, self.state_manager, state, player)
+            if search_pool is not None:
+                mcts = RootParallelSearch(self.actor, self.state_manager, state, player, search_pool, seed=current_episode * self.num_workers * self.state_manager.size ** 2)
+            else:
+                mcts = MonteCarloTreeSearch(self.actor, self.state_manager, state, player, rollout_mode=self.rollout_mode, transposition_table_size=self.transposition_table_size, tree_backend=self.tree_backend, leaf_batch_size=self.leaf_batch_size, early_stopping=self.early_stopping, max_tree_size=self.max_tree_size, selection=self.selection, solver=self.solver, rave_k=self.rave_k, endgame_empty_cells=self.endgame_empty_cells)
 
             # 4D: While episode is not in final state (i.e. no player hos won)
             while not self.state_manager.is_game_over(state):
-                for simulation in range(1, self.num_simulations + 1):
-                    leaf_node = mcts.tree_search()
-                    mcts.leaf_node_expansion(leaf_node)
-                    final_evaluation = mcts.leaf_evaluation(leaf_node)
-                    mcts.backpropagation(leaf_node, final_evaluation)
-
-                D = mcts.get_root_distribution(mcts.get_root())
+                D = None
+                if self.distribution_cache is not None:
+                    D = self.distribution_cache.get_distribution(state, player)  # Reuses the distribution of an earlier search of the position
+                if D is not None:
+                    mcts.make_root_children(D)
+                else:
+                    episode_simulations += mcts.simulate(self.num_simulations, self.time_budget)  # Tree search, node expansion, leaf evaluation and backpropagation for each simulation
+                    D = mcts.get_root_distribution(mcts.get_root())
+                    if self.distribution_cache is not None:
+                        self.distribution_cache.add_distribution(state, player, D, mcts.get_root().get_counter())
 
                 self.replay_buffer.add_case(mcts.get_root(), D)
 
                 self.state_manager.reset_state(state)  # Avoid that any cell states are changed during leaf_node evaluation (i.e. that search actions actually are performed
                 chosen_child = self.state_manager.select_action(mcts.get_root(), player, D)  # select action to be executed in actual game
-                actions.append(chosen_child.get_action())  # used in visualization
+                chosen_action = mcts.get_root().get_action_to(chosen_child)  # The action of the edge, since a shared child can be produced by another action
+                actions.append(chosen_action)  # used in visualization
 
-                self.state_manager.perform_action(chosen_child.get_action())
+                self.state_manager.perform_action(chosen_action)
                 state = self.state_manager.get_state()
                 player = 1 if player == 2 else 2
                 mcts.set_root(chosen_child)
 
+            self.replay_buffer.add_outcome(self.state_manager.get_winner(state))  # Target of the value head
+
             # 4e: Train ANET on random mini batch from buffer
-            self.actor.train(self.replay_buffer.get_random_minibatch())
+            loss, training_time = self.train_actor()
+            self.num_generated_positions += len(actions)
             self.actor.decay_epsilon()
 
             if current_episode == self.num_episodes:
@@ -77,7 +129,111 @@ class GameAgent:
             # Visualize first episode and episodes within the interval defined in config
             if current_episode == 1 or current_episode % self.visualizer.get_interval() == 0:
                 self.visualizer.visualize(actions, current_episode)
-            print("Episode : " + str(current_episode) + ", epsilon: " + str(self.actor.epsilon))
+            simulations_saved = len(actions) * self.num_simulations - episode_simulations
+            print("Episode : " + str(current_episode) + ", epsilon: " + str(self.actor.epsilon) + ", simulations: " + str(episode_simulations) + " (saved " + str(simulations_saved) + "), peak tree size: " + str(mcts.peak_tree_size) + ", training: " + str(round(training_time, 3)) + " s (loss " + str(round(loss, 4)) + ")")
+            if self.actor.prediction_cache_size > 0:
+                print("Prediction cache: hits: " + str(self.actor.cache_hits) + ", misses: " + str(self.actor.cache_misses) + ", evictions: " + str(self.actor.cache_evictions) + ", hit rate: " + str(round(self.actor.get_cache_hit_rate(), 3)))
+            if self.replay_buffer.dedup:
+                print("Replay buffer: " + str(len(self.replay_buffer)) + " unique cases, " + str(self.replay_buffer.num_merged) + " merged visits")
+            if self.distribution_cache is not None:
+                print("Distribution cache: " + str(len(self.distribution_cache)) + " positions, hit rate: " + str(round(self.distribution_cache.get_hit_rate(), 3)) + ", evictions: " + str(self.distribution_cache.evictions))
+
+        if search_pool is not None:
+            search_pool.close()
+        if self.distribution_cache is not None and self.distribution_cache_path:
+            self.distribution_cache.save(self.distribution_cache_path)  # Loaded by the next run with the same path
+        self.print_throughput(time.perf_counter() - start_time)
+
+    def warm_start(self):
+        """ Loads the weights in warm_start_path into the ANET before training. The weights are skipped when the file is
+        missing or was saved by an ANET of another architecture (e.g. another board size, or without the value head that
+        PUCT selection needs), so training then starts from random weights"""
+        if not self.warm_start_path:
+            return
+        if not os.path.exists(self.warm_start_path):
+            print("Warm start skipped: " + self.warm_start_path + " does not exist")
+        elif not self.actor.try_load(self.warm_start_path):
+            print("Warm start skipped: " + self.warm_start_path + " does not fit the architecture of the ANET")
+
+    def run_pipeline(self):
+        """ Runs self-play and training at the same time: num_self_play_workers processes play episodes with the newest
+        published weights and stream their cases to this process through a queue, while this process trains the ANET
+        once per received episode and publishes its weights every weights_publish_interval episodes. The weights are
+        exported for the NumPy forward pass to a file that is replaced at once, and a shared version number tells the
+        workers to load it. Episodes are numbered in the order they are received"""
+        context = multiprocessing.get_context("spawn")  # TensorFlow can not be used safely in a forked process
+        case_queue = context.Queue()
+        weights_version = context.Value("i", 0)
+        epsilon = context.Value("d", self.actor.epsilon)
+        stop_event = context.Event()
+        settings = {"game_type": self.state_manager.game_type, "board_size": self.state_manager.size, "nn_dims": self.actor.anet.hidden_layers_dim, "activation": self.actor.anet.activation,
+                    "value_head": self.actor.anet.value_head, "prediction_cache_size": self.actor.prediction_cache_size, "num_simulations": self.num_simulations, "time_budget": self.time_budget,
+                    "starting_player": self.starting_player, "seed": random.randrange(2 ** 31),
+                    "mcts_settings": {"rollout_mode": self.rollout_mode, "transposition_table_size": self.transposition_table_size, "tree_backend": self.tree_backend, "leaf_batch_size": self.leaf_batch_size,
+                                      "early_stopping": self.early_stopping, "max_tree_size": self.max_tree_size, "selection": self.selection, "solver": self.solver, "rave_k": self.rave_k, "endgame_empty_cells": self.endgame_empty_cells}}
+        with tempfile.TemporaryDirectory() as weights_directory:
+            weights_path = os.path.join(weights_directory, "ANET.npz")
+            self.publish_weights(weights_path, weights_version)
+            workers = [context.Process(target=run_self_play_worker, args=(i, settings, case_queue, weights_path, weights_version, epsilon, stop_event)) for i in range(self.num_self_play_workers)]
+            for worker in workers:
+                worker.start()
+            start_time = time.perf_counter()
+            for current_episode in range(1, self.num_episodes + 1):
+                worker_id, version, cases, actions, winner = case_queue.get()
+                for player_board_state, D in cases:
+                    self.replay_buffer.add_state_case(player_board_state, D)
+                self.replay_buffer.add_outcome(winner)
+                self.num_generated_positions += len(cases)
+
+                loss, training_time = self.train_actor()
+                self.actor.decay_epsilon()
+                if current_episode == self.num_episodes:
+                    self.actor.set_epsilon(0)
+                epsilon.value = self.actor.epsilon
+                if current_episode % self.weights_publish_interval == 0:
+                    self.publish_weights(weights_path, weights_version)
+
+                if current_episode == 1 or current_episode % self.save_interval == 0:
+                    self.actor.save(current_episode, self.dir_num)
+                if current_episode == 1 or current_episode % self.visualizer.get_interval() == 0:
+                    self.visualizer.visualize(actions, current_episode)
+                running_time = time.perf_counter() - start_time
+                print("Episode : " + str(current_episode) + " (worker " + str(worker_id) + ", weights version " + str(version) + " of " + str(weights_version.value) + "), epsilon: " + str(self.actor.epsilon) + ", training: " + str(round(training_time, 3)) + " s (loss " + str(round(loss, 4)) + "), generated: "
+                      + str(round(self.num_generated_positions / running_time, 1)) + " positions/s, trained: " + str(round(self.num_trained_positions / running_time, 1)) + " positions/s")
+            elapsed_time = time.perf_counter() - start_time
+
+            stop_event.set()
+            while any(worker.is_alive() for worker in workers):  # The episodes that are still being played are received and dropped, so no worker waits to flush the queue
+                try:
+                    case_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            for worker in workers:
+                worker.join()
+        self.print_throughput(elapsed_time)
+
+    def publish_weights(self, weights_path, weights_version):
+        """ Exports the weights of the ANET to a temporary file that then replaces the file at weights_path, so a worker
+        never loads a file that is half written, and increments the version number that the workers look for"""
+        temporary_path = weights_path + ".tmp.npz"
+        self.actor.export(temporary_path)
+        os.replace(temporary_path, weights_path)
+        weights_version.value += 1
+
+    def train_actor(self):
+        """ Trains the ANET on a random minibatch from the replay buffer, and returns the loss and the training time
+        (reported, so the time spent in training can be compared with the time spent in search)"""
+        start_time = time.perf_counter()
+        minibatch = self.replay_buffer.get_random_minibatch()
+        loss = self.actor.train(minibatch)
+        if self.replay_buffer.sampling == "priority":
+            self.replay_buffer.update_priorities(self.actor.get_policy_errors(minibatch))  # Cases that the trained ANET still predicts badly are sampled more often
+        self.num_trained_positions += len(minibatch[0]) * self.actor.train_epochs
+        return loss, time.perf_counter() - start_time
+
+    def print_throughput(self, elapsed_time):
+        """ Prints the number of positions generated by self-play and trained on per second over the given time"""
+        print("Throughput: generated " + str(round(self.num_generated_positions / elapsed_time, 1)) + " positions/s, trained " + str(round(self.num_trained_positions / elapsed_time, 1)) + " positions/s (" + str(self.num_generated_positions) + " generated and " + str(self.num_trained_positions) + " trained in " + str(round(elapsed_time, 1)) + " s)")
 
 
 
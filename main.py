@@ -1,32 +1,36 @@
+import glob
 from config import train_config, demo_config, oht_config, topp_config
 from environment.state_manager import StateManager
 from agent.actor import Actor
 from game_agent import GameAgent
 from visualization import Visualizer
 from agent.replay_buffer import ReplayBuffer
+from agent.replay_store import ReplayStore
 from tournament import Topp
 
 
 if __name__ == '__main__':
 
-    run = "train"  # "train" (build good agents), "demo" (4: run short training session), "topp" (5: tournament demo), "oht" (training of oht agent)
+    run = "train"  # "train" (build good agents), "demo" (4: run short training session), "topp" (5: tournament demo), "oht" (training of oht agent), "export" (export the models in the topp load_path for NumPy inference)
 
     if run == "train":
         for i in range(1, 5):
             state_manager = StateManager(train_config.game_type, train_config.board_size, nim_k=1)
-            actor = Actor(train_config.learning_rate, train_config.epsilon, train_config.decay_rate, train_config.board_size, train_config.nn_dims, train_config.activation, train_config.optimizer, train_config.loss_function)
+            actor = Actor(train_config.learning_rate, train_config.epsilon, train_config.decay_rate, train_config.board_size, train_config.nn_dims, train_config.activation, train_config.optimizer, train_config.loss_function, value_head=train_config.value_head, prediction_cache_size=train_config.prediction_cache_size, train_epochs=train_config.train_epochs, train_batch_size=train_config.train_batch_size)
             visualizer = Visualizer(train_config.board_size, train_config.visualization_speed, train_config.visualization_interval)
-            replay_buffer = ReplayBuffer()
-            game_agent = GameAgent(actor, train_config.save_interval, state_manager, visualizer, replay_buffer, train_config.starting_player, train_config.num_episodes, train_config.num_simulations, i)  # i ≠ 0 to save training models in models_x
+            replay_store = ReplayStore(train_config.replay_store_path, train_config.board_size ** 2 + 1, train_config.board_size ** 2) if train_config.replay_store_path else None  # Reopened by each run, so the runs build on the cases of the earlier runs
+            replay_buffer = ReplayBuffer(train_config.replay_buffer_size, train_config.replay_sampling, store=replay_store, dedup=train_config.replay_dedup)
+            game_agent = GameAgent(actor, train_config.save_interval, state_manager, visualizer, replay_buffer, train_config.starting_player, train_config.num_episodes, train_config.num_simulations, i, rollout_mode=train_config.rollout_mode, transposition_table_size=train_config.transposition_table_size, tree_backend=train_config.tree_backend, leaf_batch_size=train_config.leaf_batch_size, num_workers=train_config.num_workers, time_budget=train_config.time_budget, early_stopping=train_config.early_stopping, max_tree_size=train_config.max_tree_size, selection=train_config.selection, solver=train_config.solver, rave_k=train_config.rave_k, endgame_empty_cells=train_config.endgame_empty_cells, distribution_cache_size=train_config.distribution_cache_size, distribution_cache_visits=train_config.distribution_cache_visits, distribution_cache_path=train_config.distribution_cache_path, num_self_play_workers=train_config.num_self_play_workers, weights_publish_interval=train_config.weights_publish_interval, warm_start_path=train_config.warm_start_path)  # i ≠ 0 to save training models in models_x
             game_agent.run()
 
     if run == "demo":
         print("Begin training:")
         state_manager = StateManager(demo_config.game_type, demo_config.board_size, nim_k=1)
-        actor = Actor(demo_config.learning_rate, demo_config.epsilon, demo_config.decay_rate, demo_config.board_size, demo_config.nn_dims, demo_config.activation, demo_config.optimizer, demo_config.loss_function)
+        actor = Actor(demo_config.learning_rate, demo_config.epsilon, demo_config.decay_rate, demo_config.board_size, demo_config.nn_dims, demo_config.activation, demo_config.optimizer, demo_config.loss_function, value_head=demo_config.value_head, prediction_cache_size=demo_config.prediction_cache_size, train_epochs=demo_config.train_epochs, train_batch_size=demo_config.train_batch_size)
         visualizer = Visualizer(demo_config.board_size, demo_config.visualization_speed, demo_config.visualization_interval)
-        replay_buffer = ReplayBuffer()
-        game_agent = GameAgent(actor, demo_config.save_interval, state_manager, visualizer, replay_buffer, demo_config.starting_player, demo_config.num_episodes, demo_config.num_simulations, 0)  # i = 0 to save in demo models in models
+        replay_store = ReplayStore(demo_config.replay_store_path, demo_config.board_size ** 2 + 1, demo_config.board_size ** 2) if demo_config.replay_store_path else None
+        replay_buffer = ReplayBuffer(demo_config.replay_buffer_size, demo_config.replay_sampling, store=replay_store, dedup=demo_config.replay_dedup)
+        game_agent = GameAgent(actor, demo_config.save_interval, state_manager, visualizer, replay_buffer, demo_config.starting_player, demo_config.num_episodes, demo_config.num_simulations, 0, rollout_mode=demo_config.rollout_mode, transposition_table_size=demo_config.transposition_table_size, tree_backend=demo_config.tree_backend, leaf_batch_size=demo_config.leaf_batch_size, num_workers=demo_config.num_workers, time_budget=demo_config.time_budget, early_stopping=demo_config.early_stopping, max_tree_size=demo_config.max_tree_size, selection=demo_config.selection, solver=demo_config.solver, rave_k=demo_config.rave_k, endgame_empty_cells=demo_config.endgame_empty_cells, distribution_cache_size=demo_config.distribution_cache_size, distribution_cache_visits=demo_config.distribution_cache_visits, distribution_cache_path=demo_config.distribution_cache_path, num_self_play_workers=demo_config.num_self_play_workers, weights_publish_interval=demo_config.weights_publish_interval, warm_start_path=demo_config.warm_start_path)  # i = 0 to save in demo models in models
         game_agent.run()
 
         print("\n Begin tournament:")
@@ -37,4 +41,9 @@ if __name__ == '__main__':
         topp = Topp("topp", topp_visualization=topp_config.topp_is_visualized)
         topp.start_tournament()
 
-
+    if run == "export":
+        for filename in glob.glob(topp_config.load_path + "/*.h5"):
+            actor = Actor(topp_config.learning_rate, topp_config.epsilon, topp_config.decay_rate, topp_config.board_size, topp_config.nn_dims, topp_config.activation, topp_config.optimizer, topp_config.loss_function, value_head=topp_config.value_head)
+            actor.load(filename)
+            actor.export(filename)  # Writes the .npz file next to the .h5 file
+            print("Exported " + filename)
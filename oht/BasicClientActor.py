@@ -1,13 +1,20 @@
 import math
 from BasicClientActorAbs import BasicClientActorAbs
 from agent.actor import Actor
-from config import train_config
+from agent.mcts import MonteCarloTreeSearch
+from environment.board_state import BoardState
+from environment.state_manager import StateManager
+from config import train_config, oht_config
 
 
 class BasicClientActor(BasicClientActorAbs):
-    def __init__(self, actor, IP_address=None, verbose=True):
+    def __init__(self, actor, IP_address=None, verbose=True, state_manager=None, num_simulations=0, time_budget=None, early_stopping=False):
         self.series_id = -1
         self.actor = actor
+        self.state_manager = state_manager  # Moves are chosen by MCTS when a state manager and a simulation budget are given, else by the ANET alone
+        self.num_simulations = num_simulations
+        self.time_budget = time_budget  # Max seconds of search per move, which bounds the response time of the actor
+        self.early_stopping = early_stopping
         BasicClientActorAbs.__init__(self, IP_address, verbose=verbose)
 
     def handle_get_action(self, state):
@@ -21,10 +28,24 @@ class BasicClientActor(BasicClientActorAbs):
         :return: Your actor's selected action as a tuple (row, column)
         """
         player = state[0]
-        board_state = state[1:]
+        board_state = BoardState(state[1:])
+        if self.state_manager is not None and self.num_simulations > 0:
+            return self.search_action(board_state, player)
         next_move = self.actor.target_policy(board_state, player, is_top_policy=True)
         return next_move[0]
 
+    def search_action(self, state, player):
+        """ Chooses the move by MCTS from the given state within the simulation and time budget of a move, and returns the
+        (row, column) of the action chosen by StateManager.select_action, as in self-play"""
+        mcts = MonteCarloTreeSearch(self.actor, self.state_manager, state, player, rollout_mode=oht_config.rollout_mode, transposition_table_size=oht_config.transposition_table_size, tree_backend=oht_config.tree_backend, leaf_batch_size=oht_config.leaf_batch_size,
+                                    early_stopping=self.early_stopping, max_tree_size=oht_config.max_tree_size, selection=oht_config.selection, solver=oht_config.solver, rave_k=oht_config.rave_k, endgame_empty_cells=oht_config.endgame_empty_cells)  # The same search options as the GameAgent
+        mcts.simulate(self.num_simulations, self.time_budget)
+        distribution = mcts.get_root_distribution(mcts.get_root())
+        self.state_manager.reset_state(state)  # Avoid that any cell states are changed during leaf_node evaluation
+        chosen_child = self.state_manager.select_action(mcts.get_root(), player, distribution)  # The same choice as in self-play, including proven wins
+        (row, col), _ = mcts.get_root().get_action_to(chosen_child)
+        return row, col
+
     def handle_series_start(self, unique_id, series_id, player_map, num_games, game_params):
         """
         Set the player_number of our actor, so that we can tell our MCTS which actor we are.
@@ -99,7 +120,11 @@ if __name__ == '__main__':
     activation = train_config.activation
     optimizer = train_config.optimizer
     loss_function = train_config.loss_function
-    actor = Actor(learning_rate, epsilon, decay_rate, board_size, nn_dims, activation, optimizer, loss_function)
+    actor = Actor(learning_rate, epsilon, decay_rate, board_size, nn_dims, activation, optimizer, loss_function, value_head=train_config.value_head, prediction_cache_size=oht_config.prediction_cache_size, inference=oht_config.inference)
 
-    bsa = BasicClientActor(actor, verbose=False)
+    if oht_config.online_search:
+        bsa = BasicClientActor(actor, verbose=False, state_manager=StateManager(oht_config.game_type, board_size), num_simulations=oht_config.num_simulations,
+                               time_budget=oht_config.time_budget, early_stopping=oht_config.early_stopping)
+    else:
+        bsa = BasicClientActor(actor, verbose=False)
     bsa.connect_to_server()
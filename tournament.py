@@ -29,11 +29,11 @@ class Topp:
         """ Makes an actor for each file and load the actor with the weights saved in the corresponding file"""
         agents = []
         os.chdir(self.load_directory)  # Changes current working directory to load_directory
-        file_list = glob.glob("*.h5")  # Returns all files in directory with ending .h5
+        file_list = glob.glob("*.npz" if config.inference == "numpy" else "*.h5")  # Returns all files in directory with ending .h5 (or the exported .npz files with NumPy inference)
         file_list = sorted(file_list, key=return_episode_num)
         for file in file_list:
             filename = "../models/" + file  # The path is used in actor which is placed in agent
-            actor = Actor(config.learning_rate, config.epsilon, config.decay_rate, config.board_size, config.nn_dims, config.activation, config.optimizer, config.loss_function, filename)
+            actor = Actor(config.learning_rate, config.epsilon, config.decay_rate, config.board_size, config.nn_dims, config.activation, config.optimizer, config.loss_function, filename, value_head=config.value_head, prediction_cache_size=config.prediction_cache_size, inference=config.inference)
             actor.load(filename)
             agents.append(actor)
         return agents
@@ -61,8 +61,8 @@ class Topp:
                     p2_total_win += p2_wins
                 print(p1.name + ": " + str(p1_total_win) + " wins, " + p2.name + ": " + str(p2_total_win) + " wins")
                 if self.topp_visualization:
-                    p1_num = p1.filename.split("ep_")[1].split(".h5")[0]
-                    p2_num = p2.filename.split("ep_")[1].split(".h5")[0]
+                    p1_num = p1.filename.split("ep_")[1].split(".")[0]
+                    p2_num = p2.filename.split("ep_")[1].split(".")[0]
                     os.chdir(ROOT_DIR)
                     self.visualizer.visualize(actions, p1_num + "_" + p2_num)
         self.print_result()